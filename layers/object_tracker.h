@@ -20,6 +20,10 @@
  * Author: Tobin Ehlis <tobin@lunarg.com>
  */
 
+#include <algorithm>
+#include <atomic>
+#include <condition_variable>
+#include <memory>
 #include <mutex>
 #include <cinttypes>
 #include <stdio.h>
@@ -67,12 +71,60 @@ enum ObjectStatusFlagBits {
     OBJSTATUS_CUSTOM_ALLOCATOR = 0x00000080,          // Allocated with custom allocator
 };
 
+// Bumped every time any tracked object is destroyed
+extern std::atomic<uint64_t> object_destroy_generation;
+
+// Handles already validated while recording a command buffer.  vkCmd* calls pass the same handles over and over, so a
+// small direct-mapped cache of validated handles lets repeated references skip the object table.  Destroying any object
+// bumps object_destroy_generation, which empties every memo on its next use.  A memo is only touched by calls recording
+// into its command buffer, which the application must already synchronize externally.
+class ValidatedHandleMemo {
+   public:
+    ValidatedHandleMemo() : generation_(object_destroy_generation.load()) { Clear(); }
+
+    bool Contains(uint64_t handle, VulkanObjectType object_type) {
+        uint64_t generation = object_destroy_generation.load();
+        if (generation != generation_) {
+            Clear();
+            generation_ = generation;
+            return false;
+        }
+        const Entry &entry = entries_[Slot(handle)];
+        return (entry.handle == handle) && (entry.object_type == object_type);
+    }
+    void Insert(uint64_t handle, VulkanObjectType object_type) {
+        Entry &entry = entries_[Slot(handle)];
+        entry.handle = handle;
+        entry.object_type = object_type;
+    }
+    void Clear() {
+        for (uint32_t i = 0; i < kEntryCount; i++) {
+            entries_[i].handle = 0;
+            entries_[i].object_type = kVulkanObjectTypeUnknown;
+        }
+    }
+
+   private:
+    struct Entry {
+        uint64_t handle;
+        VulkanObjectType object_type;
+    };
+    static const uint32_t kEntryBits = 5;
+    static const uint32_t kEntryCount = 1 << kEntryBits;
+
+    static uint32_t Slot(uint64_t handle) { return static_cast<uint32_t>((handle * 0x9e3779b97f4a7c15ULL) >> (64 - kEntryBits)); }
+
+    Entry entries_[kEntryCount];
+    uint64_t generation_;
+};
+
 // Object and state information structure
 struct ObjTrackState {
-    uint64_t handle;               // Object handle (new)
-    VulkanObjectType object_type;  // Object type identifier
-    ObjectStatusFlags status;      // Object state
-    uint64_t parent_object;        // Parent object
+    uint64_t handle;                         // Object handle (new)
+    VulkanObjectType object_type;            // Object type identifier
+    ObjectStatusFlags status;                // Object state
+    uint64_t parent_object;                  // Parent object
+    ValidatedHandleMemo *validated_handles;  // Handles validated in the current recording (command buffers only)
 };
 
 // Track Queue information
@@ -81,7 +133,244 @@ struct ObjTrackQueueInfo {
     VkQueue queue;
 };
 
-typedef std::unordered_map<uint64_t, ObjTrackState *> object_map_type;
+// Pool of ObjTrackState records.  Records are carved out of fixed-size slabs and recycled through an
+// intrusive free list, so creating and destroying objects does not allocate from the heap per object.
+class ObjTrackStatePool {
+   public:
+    ObjTrackStatePool() : free_list_(nullptr) {}
+
+    ObjTrackState *Allocate() {
+        if (free_list_ == nullptr) {
+            slabs_.emplace_back(new PoolSlot[kSlabSize]);
+            PoolSlot *slab = slabs_.back().get();
+            for (uint32_t i = 0; i < kSlabSize; i++) {
+                slab[i].next_free = (i + 1 < kSlabSize) ? &slab[i + 1] : nullptr;
+            }
+            free_list_ = slab;
+        }
+        PoolSlot *slot = free_list_;
+        free_list_ = slot->next_free;
+        slot->state = ObjTrackState();
+        return &slot->state;
+    }
+    // Every record is returned here when its object is destroyed, which makes this the one place to invalidate memos
+    void Free(ObjTrackState *state) {
+        delete state->validated_handles;
+        object_destroy_generation++;
+        PoolSlot *slot = reinterpret_cast<PoolSlot *>(state);
+        slot->next_free = free_list_;
+        free_list_ = slot;
+    }
+    size_t MemoryUsage() const { return slabs_.size() * kSlabSize * sizeof(PoolSlot); }
+
+   private:
+    union PoolSlot {
+        ObjTrackState state;
+        PoolSlot *next_free;
+    };
+    static const uint32_t kSlabSize = 256;
+    std::vector<std::unique_ptr<PoolSlot[]>> slabs_;
+    PoolSlot *free_list_;
+};
+
+// Flat open-addressing hash table mapping object handles to their pooled state records.  Slots are stored
+// inline in a single array and probed linearly.  Erasing leaves a tombstone rather than moving entries, so
+// iterators stay valid across erase; only inserting can rehash and invalidate them.
+class ObjectTable {
+   public:
+    typedef std::pair<uint64_t, ObjTrackState *> value_type;
+
+    class iterator {
+       public:
+        iterator(value_type *slot, value_type *end) : slot_(slot), end_(end) { SkipUnused(); }
+        value_type &operator*() const { return *slot_; }
+        value_type *operator->() const { return slot_; }
+        iterator &operator++() {
+            ++slot_;
+            SkipUnused();
+            return *this;
+        }
+        iterator operator++(int) {
+            iterator prev = *this;
+            ++(*this);
+            return prev;
+        }
+        bool operator==(const iterator &other) const { return slot_ == other.slot_; }
+        bool operator!=(const iterator &other) const { return slot_ != other.slot_; }
+
+       private:
+        void SkipUnused() {
+            while ((slot_ != end_) && ((slot_->first == kEmptySlot) || (slot_->first == kErasedSlot))) ++slot_;
+        }
+        value_type *slot_;
+        value_type *end_;
+    };
+
+    ObjectTable() : size_(0), used_(0) {}
+
+    iterator begin() { return iterator(slots_.data(), slots_.data() + slots_.size()); }
+    iterator end() { return iterator(slots_.data() + slots_.size(), slots_.data() + slots_.size()); }
+    bool empty() const { return size_ == 0; }
+    size_t size() const { return size_; }
+
+    iterator find(uint64_t handle) {
+        size_t index = FindSlot(handle);
+        return (index == kNotFound) ? end() : iterator(&slots_[index], slots_.data() + slots_.size());
+    }
+    size_t count(uint64_t handle) const { return (FindSlot(handle) == kNotFound) ? 0 : 1; }
+
+    // Hint that handle is about to be looked up, so its home slot can be pulled into cache ahead of the probe
+    void prefetch(uint64_t handle) const {
+#if defined(__GNUC__)
+        if (!slots_.empty()) __builtin_prefetch(&slots_[Hash(handle) & (slots_.size() - 1)]);
+#else
+        (void)handle;
+#endif
+    }
+
+    // Returns the state record for handle, inserting an empty entry if it is not present
+    ObjTrackState *&operator[](uint64_t handle) {
+        assert((handle != kEmptySlot) && (handle != kErasedSlot));
+        size_t index = FindSlot(handle);
+        if (index != kNotFound) {
+            return slots_[index].second;
+        }
+        if ((used_ + 1) * 4 > slots_.size() * 3) {
+            // Grow when live entries fill half the table, otherwise just clear out the tombstones
+            Rehash(((size_ + 1) * 2 > slots_.size()) ? std::max(size_t(kMinCapacity), slots_.size() * 2) : slots_.size());
+        }
+        size_t mask = slots_.size() - 1;
+        index = Hash(handle) & mask;
+        while ((slots_[index].first != kEmptySlot) && (slots_[index].first != kErasedSlot)) index = (index + 1) & mask;
+        if (slots_[index].first == kEmptySlot) used_++;
+        size_++;
+        slots_[index] = value_type(handle, nullptr);
+        return slots_[index].second;
+    }
+
+    iterator erase(iterator item) {
+        item->first = kErasedSlot;
+        item->second = nullptr;
+        size_--;
+        return ++item;
+    }
+    size_t erase(uint64_t handle) {
+        iterator item = find(handle);
+        if (item == end()) return 0;
+        erase(item);
+        return 1;
+    }
+    void clear() {
+        slots_.clear();
+        size_ = 0;
+        used_ = 0;
+    }
+
+    // Bytes used by the slot array, not counting the state records themselves
+    size_t MemoryUsage() const { return slots_.capacity() * sizeof(value_type); }
+
+   private:
+    static const uint64_t kEmptySlot = 0;
+    static const uint64_t kErasedSlot = ~0ULL;
+    static const size_t kNotFound = ~size_t(0);
+    static const size_t kMinCapacity = 16;
+
+    // Handles are frequently pointers with zero low bits, so mix all of the bits into the slot index
+    static size_t Hash(uint64_t handle) {
+        handle ^= handle >> 33;
+        handle *= 0xff51afd7ed558ccdULL;
+        handle ^= handle >> 33;
+        return static_cast<size_t>(handle);
+    }
+    size_t FindSlot(uint64_t handle) const {
+        // The sentinel values mark unused slots and can never be live entries
+        if (slots_.empty() || (handle == kEmptySlot) || (handle == kErasedSlot)) return kNotFound;
+        size_t mask = slots_.size() - 1;
+        for (size_t index = Hash(handle) & mask;; index = (index + 1) & mask) {
+            if (slots_[index].first == handle) return index;
+            if (slots_[index].first == kEmptySlot) return kNotFound;
+        }
+    }
+    void Rehash(size_t capacity) {
+        std::vector<value_type> old_slots(capacity, value_type(uint64_t(kEmptySlot), nullptr));
+        old_slots.swap(slots_);
+        size_t mask = slots_.size() - 1;
+        for (const auto &slot : old_slots) {
+            if ((slot.first == kEmptySlot) || (slot.first == kErasedSlot)) continue;
+            size_t index = Hash(slot.first) & mask;
+            while (slots_[index].first != kEmptySlot) index = (index + 1) & mask;
+            slots_[index] = slot;
+        }
+        used_ = size_;
+    }
+
+    std::vector<value_type> slots_;
+    size_t size_;  // Live entries
+    size_t used_;  // Live entries plus tombstones
+};
+
+typedef ObjectTable object_map_type;
+
+// Reader-writer lock guarding the object maps.  Validation only reads the maps and takes the lock shared,
+// so checks from many threads can run concurrently.  Creating and destroying objects takes it exclusively.
+// Waiting writers block new readers so that a steady stream of validation cannot starve them.
+class ReadWriteLock {
+   public:
+    ReadWriteLock() : readers_(0), waiting_writers_(0), writer_(false) {}
+
+    void lock() {
+        std::unique_lock<std::mutex> lock(mutex_);
+        waiting_writers_++;
+        while (writer_ || (readers_ > 0)) {
+            writer_condition_.wait(lock);
+        }
+        waiting_writers_--;
+        writer_ = true;
+    }
+    void unlock() {
+        std::unique_lock<std::mutex> lock(mutex_);
+        writer_ = false;
+        if (waiting_writers_ > 0) {
+            writer_condition_.notify_one();
+        } else {
+            reader_condition_.notify_all();
+        }
+    }
+    void lock_shared() {
+        std::unique_lock<std::mutex> lock(mutex_);
+        while (writer_ || (waiting_writers_ > 0)) {
+            reader_condition_.wait(lock);
+        }
+        readers_++;
+    }
+    void unlock_shared() {
+        std::unique_lock<std::mutex> lock(mutex_);
+        readers_--;
+        if ((readers_ == 0) && (waiting_writers_ > 0)) {
+            writer_condition_.notify_one();
+        }
+    }
+
+   private:
+    std::mutex mutex_;
+    std::condition_variable reader_condition_;
+    std::condition_variable writer_condition_;
+    uint32_t readers_;
+    uint32_t waiting_writers_;
+    bool writer_;
+};
+
+// Scoped shared ownership of a ReadWriteLock, the reader counterpart of std::lock_guard
+class ReadLockGuard {
+   public:
+    explicit ReadLockGuard(ReadWriteLock &rw_lock) : rw_lock_(rw_lock) { rw_lock_.lock_shared(); }
+    ~ReadLockGuard() { rw_lock_.unlock_shared(); }
+    ReadLockGuard(const ReadLockGuard &) = delete;
+    ReadLockGuard &operator=(const ReadLockGuard &) = delete;
+
+   private:
+    ReadWriteLock &rw_lock_;
+};
 
 struct layer_data {
     VkInstance instance;
@@ -89,6 +378,9 @@ struct layer_data {
 
     uint64_t num_objects[kVulkanObjectTypeMax + 1];
     uint64_t num_total_objects;
+    // Highest live count reached by each object type, and the number of objects ever created
+    uint64_t peak_objects[kVulkanObjectTypeMax + 1];
+    uint64_t num_created_objects;
 
     debug_report_data *report_data;
     std::vector<VkDebugReportCallbackEXT> logging_callback;
@@ -104,10 +396,12 @@ struct layer_data {
 
     std::vector<VkQueueFamilyProperties> queue_family_properties;
 
-    // Vector of unordered_maps per object type to hold ObjTrackState info
+    // Vector of object tables per object type to hold ObjTrackState info
     std::vector<object_map_type> object_map;
     // Special-case map for swapchain images
-    std::unordered_map<uint64_t, ObjTrackState *> swapchainImageMap;
+    object_map_type swapchainImageMap;
+    // Backing storage for the ObjTrackState records of all of the above
+    ObjTrackStatePool object_state_pool;
     // Map of queue information structures, one per queue
     std::unordered_map<VkQueue, ObjTrackQueueInfo *> queue_info_map;
 
@@ -118,6 +412,8 @@ struct layer_data {
           physical_device(nullptr),
           num_objects{},
           num_total_objects(0),
+          peak_objects{},
+          num_created_objects(0),
           report_data(nullptr),
           num_tmp_report_callbacks(0),
           tmp_report_create_infos(nullptr),
@@ -134,13 +430,38 @@ struct layer_data {
 extern std::unordered_map<void *, layer_data *> layer_data_map;
 extern device_table_map ot_device_table_map;
 extern instance_table_map ot_instance_table_map;
-extern std::mutex global_lock;
+extern ReadWriteLock global_lock;
 extern uint64_t object_track_index;
 extern uint32_t loader_layer_if_version;
 extern const std::unordered_map<std::string, void *> name_to_funcptr_map;
+extern uint32_t object_count_report_interval;
+
+// Layer-specific entry point, retrieved with vkGetDeviceProcAddr, which fills arrays of kVulkanObjectTypeMax counts
+// indexed by VulkanObjectType with the device's live and peak object counts.  Either array may be null.
+typedef void(VKAPI_PTR *PFN_vkGetObjectCountsLUNARG)(VkDevice device, uint64_t *pLiveCounts, uint64_t *pPeakCounts);
+VKAPI_ATTR void VKAPI_CALL GetObjectCountsLUNARG(VkDevice device, uint64_t *pLiveCounts, uint64_t *pPeakCounts);
+
+void ReportObjectCounts(layer_data *object_data, uint64_t dispatch_handle);
+
+// Account for a newly tracked object in the live and peak counts, reporting them every object_count_report_interval creations
+inline void CountCreatedObject(layer_data *object_data, uint64_t dispatch_handle, VulkanObjectType object_type) {
+    object_data->num_total_objects++;
+    if (++object_data->num_objects[object_type] > object_data->peak_objects[object_type]) {
+        object_data->peak_objects[object_type] = object_data->num_objects[object_type];
+    }
+    object_data->num_created_objects++;
+    if (object_count_report_interval && ((object_data->num_created_objects % object_count_report_interval) == 0)) {
+        ReportObjectCounts(object_data, dispatch_handle);
+    }
+}
 
-void DeviceReportUndestroyedObjects(VkDevice device, VulkanObjectType object_type, enum UNIQUE_VALIDATION_ERROR_CODE error_code);
+void ReportLeakedObjects(VkDevice device, const VulkanObjectType *object_types, uint32_t object_type_count,
+                         enum UNIQUE_VALIDATION_ERROR_CODE error_code);
 void DeviceDestroyUndestroyedObjects(VkDevice device, VulkanObjectType object_type);
+void ReportObjectTrackingMemory(VkDevice device);
+void DestroyTrackedObject(layer_data *device_data, uint64_t object_handle, VulkanObjectType object_type,
+                          const VkAllocationCallbacks *pAllocator, enum UNIQUE_VALIDATION_ERROR_CODE expected_custom_allocator_code,
+                          enum UNIQUE_VALIDATION_ERROR_CODE expected_default_allocator_code);
 void CreateQueue(VkDevice device, VkQueue vkObj);
 void AddQueueInfo(VkDevice device, uint32_t queue_node_index, VkQueue queue);
 void ValidateQueueFlags(VkQueue queue, const char *function);
@@ -149,13 +470,23 @@ void AllocateCommandBuffer(VkDevice device, const VkCommandPool command_pool, co
 void AllocateDescriptorSet(VkDevice device, VkDescriptorPool descriptor_pool, VkDescriptorSet descriptor_set);
 void CreateSwapchainImageObject(VkDevice dispatchable_object, VkImage swapchain_image, VkSwapchainKHR swapchain);
 void ReportUndestroyedObjects(VkDevice device, UNIQUE_VALIDATION_ERROR_CODE error_code);
+bool IsObjectTypeTracked(VulkanObjectType object_type);
 void DestroyUndestroyedObjects(VkDevice device);
+bool ValidateRecordingCommandBuffer(VkCommandBuffer command_buffer, ValidatedHandleMemo **memo,
+                                    enum UNIQUE_VALIDATION_ERROR_CODE invalid_handle_code,
+                                    enum UNIQUE_VALIDATION_ERROR_CODE wrong_device_code);
 bool ValidateDeviceObject(uint64_t device_handle, enum UNIQUE_VALIDATION_ERROR_CODE invalid_handle_code,
                           enum UNIQUE_VALIDATION_ERROR_CODE wrong_device_code);
 
+// If object_state is given, it receives the object's record when the handle is found in this device's object table, or
+// nullptr otherwise, so callers needing the record do not probe the table a second time.
 template <typename T1, typename T2>
 bool ValidateObject(T1 dispatchable_object, T2 object, VulkanObjectType object_type, bool null_allowed,
-                    enum UNIQUE_VALIDATION_ERROR_CODE invalid_handle_code, enum UNIQUE_VALIDATION_ERROR_CODE wrong_device_code) {
+                    enum UNIQUE_VALIDATION_ERROR_CODE invalid_handle_code, enum UNIQUE_VALIDATION_ERROR_CODE wrong_device_code,
+                    ObjTrackState **object_state = nullptr) {
+    if (object_state) {
+        *object_state = nullptr;
+    }
     if (null_allowed && (object == VK_NULL_HANDLE)) {
         return false;
     }
@@ -169,7 +500,12 @@ bool ValidateObject(T1 dispatchable_object, T2 object, VulkanObjectType object_t
 
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(dispatchable_object), layer_data_map);
     // Look for object in device object map
-    if (device_data->object_map[object_type].find(object_handle) == device_data->object_map[object_type].end()) {
+    auto object_item = device_data->object_map[object_type].find(object_handle);
+    if (object_item != device_data->object_map[object_type].end()) {
+        if (object_state) {
+            *object_state = object_item->second;
+        }
+    } else {
         // If object is an image, also look for it in the swapchain image map
         if ((object_type != kVulkanObjectTypeImage) ||
             (device_data->swapchainImageMap.find(object_handle) == device_data->swapchainImageMap.end())) {
@@ -193,7 +529,10 @@ bool ValidateObject(T1 dispatchable_object, T2 object, VulkanObjectType object_t
                     }
                 }
             }
-            // Report an error if object was not found anywhere
+            // Report an error if object was not found anywhere, unless its type was left untracked at generation time
+            if (!IsObjectTypeTracked(object_type)) {
+                return false;
+            }
             return log_msg(device_data->report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, debug_object_type, object_handle,
                            invalid_handle_code, "Invalid %s Object 0x%" PRIxLEAST64 ".", object_string[object_type], object_handle);
         }
@@ -201,6 +540,83 @@ bool ValidateObject(T1 dispatchable_object, T2 object, VulkanObjectType object_t
     return false;
 }
 
+// Validate a counted array of handles.  The layer data and object table are looked up once for the whole array and the
+// handles a few elements ahead are prefetched, so each valid handle costs a single probe.  Only handles missing from the
+// table fall back to ValidateObject, which reports them individually.
+template <typename T1, typename T2>
+bool ValidateObjects(T1 dispatchable_object, const T2 *objects, uint32_t count, VulkanObjectType object_type, bool null_allowed,
+                     enum UNIQUE_VALIDATION_ERROR_CODE invalid_handle_code, enum UNIQUE_VALIDATION_ERROR_CODE wrong_device_code) {
+    bool skip = false;
+    if ((objects == nullptr) || (count == 0)) {
+        return skip;
+    }
+
+    if (object_type == kVulkanObjectTypeDevice) {
+        for (uint32_t index = 0; index < count; ++index) {
+            skip |= ValidateObject(dispatchable_object, objects[index], object_type, null_allowed, invalid_handle_code,
+                                   wrong_device_code);
+        }
+        return skip;
+    }
+
+    layer_data *device_data = GetLayerDataPtr(get_dispatch_key(dispatchable_object), layer_data_map);
+    const object_map_type &object_table = device_data->object_map[object_type];
+    const uint32_t prefetch_distance = 8;
+    for (uint32_t index = 0; index < count; ++index) {
+        if (index + prefetch_distance < count) {
+            object_table.prefetch(HandleToUint64(objects[index + prefetch_distance]));
+        }
+        if (object_table.count(HandleToUint64(objects[index])) ||
+            (null_allowed && (objects[index] == VK_NULL_HANDLE))) {
+            continue;
+        }
+        skip |= ValidateObject(dispatchable_object, objects[index], object_type, null_allowed, invalid_handle_code,
+                               wrong_device_code);
+    }
+    return skip;
+}
+
+// Validate an object referenced while recording a command buffer, consulting and filling the command buffer's memo.
+// Only handles found in this device's object table are memoized, so every failing reference is still reported.
+template <typename T1, typename T2>
+bool ValidateRecordedObject(T1 command_buffer, ValidatedHandleMemo *memo, T2 object, VulkanObjectType object_type,
+                            bool null_allowed, enum UNIQUE_VALIDATION_ERROR_CODE invalid_handle_code,
+                            enum UNIQUE_VALIDATION_ERROR_CODE wrong_device_code) {
+    if (memo == nullptr) {
+        return ValidateObject(command_buffer, object, object_type, null_allowed, invalid_handle_code, wrong_device_code);
+    }
+    auto object_handle = HandleToUint64(object);
+    if (memo->Contains(object_handle, object_type)) {
+        return false;
+    }
+    ObjTrackState *object_state = nullptr;
+    bool skip =
+        ValidateObject(command_buffer, object, object_type, null_allowed, invalid_handle_code, wrong_device_code, &object_state);
+    if (object_state) {
+        memo->Insert(object_handle, object_type);
+    }
+    return skip;
+}
+
+// Counted-array form of ValidateRecordedObject
+template <typename T1, typename T2>
+bool ValidateRecordedObjects(T1 command_buffer, ValidatedHandleMemo *memo, const T2 *objects, uint32_t count,
+                             VulkanObjectType object_type, bool null_allowed, enum UNIQUE_VALIDATION_ERROR_CODE invalid_handle_code,
+                             enum UNIQUE_VALIDATION_ERROR_CODE wrong_device_code) {
+    if (memo == nullptr) {
+        return ValidateObjects(command_buffer, objects, count, object_type, null_allowed, invalid_handle_code, wrong_device_code);
+    }
+    bool skip = false;
+    if (objects == nullptr) {
+        return skip;
+    }
+    for (uint32_t index = 0; index < count; ++index) {
+        skip |= ValidateRecordedObject(command_buffer, memo, objects[index], object_type, null_allowed, invalid_handle_code,
+                                       wrong_device_code);
+    }
+    return skip;
+}
+
 template <typename T1, typename T2>
 void CreateObject(T1 dispatchable_object, T2 object, VulkanObjectType object_type, const VkAllocationCallbacks *pAllocator) {
     layer_data *instance_data = GetLayerDataPtr(get_dispatch_key(dispatchable_object), layer_data_map);
@@ -208,20 +624,23 @@ void CreateObject(T1 dispatchable_object, T2 object, VulkanObjectType object_typ
     auto object_handle = HandleToUint64(object);
     bool custom_allocator = pAllocator != nullptr;
 
+    if (!IsObjectTypeTracked(object_type)) {
+        return;
+    }
     if (!instance_data->object_map[object_type].count(object_handle)) {
         VkDebugReportObjectTypeEXT debug_object_type = get_debug_report_enum[object_type];
         log_msg(instance_data->report_data, VK_DEBUG_REPORT_INFORMATION_BIT_EXT, debug_object_type, object_handle, OBJTRACK_NONE,
                 "OBJ[0x%" PRIxLEAST64 "] : CREATE %s object 0x%" PRIxLEAST64, object_track_index++, object_string[object_type],
                 object_handle);
 
-        ObjTrackState *pNewObjNode = new ObjTrackState;
+        ObjTrackState *pNewObjNode = instance_data->object_state_pool.Allocate();
         pNewObjNode->object_type = object_type;
         pNewObjNode->status = custom_allocator ? OBJSTATUS_CUSTOM_ALLOCATOR : OBJSTATUS_NONE;
         pNewObjNode->handle = object_handle;
+        pNewObjNode->parent_object = 0;
 
         instance_data->object_map[object_type][object_handle] = pNewObjNode;
-        instance_data->num_objects[object_type]++;
-        instance_data->num_total_objects++;
+        CountCreatedObject(instance_data, HandleToUint64(dispatchable_object), object_type);
     }
 }
 
@@ -243,7 +662,7 @@ void DestroyObjectSilently(T1 dispatchable_object, T2 object, VulkanObjectType o
 
     device_data->num_objects[pNode->object_type]--;
 
-    delete pNode;
+    device_data->object_state_pool.Free(pNode);
     device_data->object_map[object_type].erase(item);
 }
 
@@ -252,44 +671,23 @@ void DestroyObject(T1 dispatchable_object, T2 object, VulkanObjectType object_ty
                    enum UNIQUE_VALIDATION_ERROR_CODE expected_custom_allocator_code,
                    enum UNIQUE_VALIDATION_ERROR_CODE expected_default_allocator_code) {
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(dispatchable_object), layer_data_map);
+    DestroyTrackedObject(device_data, HandleToUint64(object), object_type, pAllocator, expected_custom_allocator_code,
+                         expected_default_allocator_code);
+}
 
-    auto object_handle = HandleToUint64(object);
-    bool custom_allocator = pAllocator != nullptr;
-    VkDebugReportObjectTypeEXT debug_object_type = get_debug_report_enum[object_type];
-
-    if (object_handle != VK_NULL_HANDLE) {
-        auto item = device_data->object_map[object_type].find(object_handle);
-        if (item != device_data->object_map[object_type].end()) {
-            ObjTrackState *pNode = item->second;
-
-            log_msg(device_data->report_data, VK_DEBUG_REPORT_INFORMATION_BIT_EXT, debug_object_type, object_handle, OBJTRACK_NONE,
-                    "OBJ_STAT Destroy %s obj 0x%" PRIxLEAST64 " (%" PRIu64 " total objs remain & %" PRIu64 " %s objs).",
-                    object_string[object_type], HandleToUint64(object), device_data->num_total_objects - 1,
-                    device_data->num_objects[pNode->object_type] - 1, object_string[object_type]);
-
-            auto allocated_with_custom = (pNode->status & OBJSTATUS_CUSTOM_ALLOCATOR) ? true : false;
-            if (allocated_with_custom && !custom_allocator && expected_custom_allocator_code != VALIDATION_ERROR_UNDEFINED) {
-                // This check only verifies that custom allocation callbacks were provided to both Create and Destroy calls,
-                // it cannot verify that these allocation callbacks are compatible with each other.
-                log_msg(device_data->report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, debug_object_type, object_handle,
-                        expected_custom_allocator_code,
-                        "Custom allocator not specified while destroying %s obj 0x%" PRIxLEAST64 " but specified at creation.",
-                        object_string[object_type], object_handle);
-            } else if (!allocated_with_custom && custom_allocator &&
-                       expected_default_allocator_code != VALIDATION_ERROR_UNDEFINED) {
-                log_msg(device_data->report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, debug_object_type, object_handle,
-                        expected_default_allocator_code,
-                        "Custom allocator specified while destroying %s obj 0x%" PRIxLEAST64 " but not specified at creation.",
-                        object_string[object_type], object_handle);
-            }
-
-            DestroyObjectSilently(dispatchable_object, object, object_type);
-        } else {
-            log_msg(device_data->report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_UNKNOWN_EXT, object_handle,
-                    OBJTRACK_UNKNOWN_OBJECT,
-                    "Unable to remove %s obj 0x%" PRIxLEAST64 ". Was it created? Has it already been destroyed?",
-                    object_string[object_type], object_handle);
-        }
+// Destroy a counted array of objects, as freed by vkFreeCommandBuffers and vkFreeDescriptorSets.  The caller takes the lock
+// once for the whole array and the layer data is looked up once, rather than once per element.
+template <typename T1, typename T2>
+void DestroyObjects(T1 dispatchable_object, const T2 *objects, uint32_t count, VulkanObjectType object_type,
+                    const VkAllocationCallbacks *pAllocator, enum UNIQUE_VALIDATION_ERROR_CODE expected_custom_allocator_code,
+                    enum UNIQUE_VALIDATION_ERROR_CODE expected_default_allocator_code) {
+    if (objects == nullptr) {
+        return;
+    }
+    layer_data *device_data = GetLayerDataPtr(get_dispatch_key(dispatchable_object), layer_data_map);
+    for (uint32_t index = 0; index < count; ++index) {
+        DestroyTrackedObject(device_data, HandleToUint64(objects[index]), object_type, pAllocator, expected_custom_allocator_code,
+                             expected_default_allocator_code);
     }
 }
 
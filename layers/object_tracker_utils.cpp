@@ -29,13 +29,29 @@ namespace object_tracker {
 std::unordered_map<void *, layer_data *> layer_data_map;
 device_table_map ot_device_table_map;
 instance_table_map ot_instance_table_map;
-std::mutex global_lock;
+ReadWriteLock global_lock;
+std::atomic<uint64_t> object_destroy_generation(0);
 uint64_t object_track_index = 0;
 uint32_t loader_layer_if_version = CURRENT_LOADER_LAYER_INTERFACE_VERSION;
 
+// Live and peak object counts are reported every this many object creations on a device, if non-zero
+uint32_t object_count_report_interval = 0;
+
+// Most leaked objects reported with their own message at vkDestroyDevice; the rest are only counted in the summary
+static uint32_t leak_report_limit = 100;
+
 void InitObjectTracker(layer_data *my_data, const VkAllocationCallbacks *pAllocator) {
     layer_debug_report_actions(my_data->report_data, my_data->logging_callback, pAllocator, "lunarg_object_tracker");
     layer_debug_messenger_actions(my_data->report_data, my_data->logging_messenger, pAllocator, "lunarg_object_tracker");
+
+    const char *leak_report_limit_option = getLayerOption("lunarg_object_tracker.leak_report_limit");
+    if (*leak_report_limit_option) {
+        leak_report_limit = static_cast<uint32_t>(strtoul(leak_report_limit_option, nullptr, 10));
+    }
+    const char *count_report_interval_option = getLayerOption("lunarg_object_tracker.count_report_interval");
+    if (*count_report_interval_option) {
+        object_count_report_interval = static_cast<uint32_t>(strtoul(count_report_interval_option, nullptr, 10));
+    }
 }
 
 // Add new queue to head of global queue list
@@ -78,7 +94,7 @@ void DestroyQueueDataStructures(VkDevice device) {
                 queue->second->handle, OBJTRACK_NONE,
                 "OBJ_STAT Destroy Queue obj 0x%" PRIxLEAST64 " (%" PRIu64 " total objs remain & %" PRIu64 " Queue objs).",
                 queue->second->handle, device_data->num_total_objects, device_data->num_objects[obj_index]);
-        delete queue->second;
+        device_data->object_state_pool.Free(queue->second);
         queue = device_data->object_map[kVulkanObjectTypeQueue].erase(queue);
     }
 }
@@ -128,7 +144,7 @@ void AllocateCommandBuffer(VkDevice device, const VkCommandPool command_pool, co
             HandleToUint64(command_buffer), OBJTRACK_NONE, "OBJ[0x%" PRIxLEAST64 "] : CREATE %s object 0x%" PRIxLEAST64,
             object_track_index++, "VK_DEBUG_REPORT_OBJECT_TYPE_COMMAND_BUFFER_EXT", HandleToUint64(command_buffer));
 
-    ObjTrackState *pNewObjNode = new ObjTrackState;
+    ObjTrackState *pNewObjNode = device_data->object_state_pool.Allocate();
     pNewObjNode->object_type = kVulkanObjectTypeCommandBuffer;
     pNewObjNode->handle = HandleToUint64(command_buffer);
     pNewObjNode->parent_object = HandleToUint64(command_pool);
@@ -137,9 +153,73 @@ void AllocateCommandBuffer(VkDevice device, const VkCommandPool command_pool, co
     } else {
         pNewObjNode->status = OBJSTATUS_NONE;
     }
+    pNewObjNode->validated_handles = new ValidatedHandleMemo;
     device_data->object_map[kVulkanObjectTypeCommandBuffer][HandleToUint64(command_buffer)] = pNewObjNode;
-    device_data->num_objects[kVulkanObjectTypeCommandBuffer]++;
-    device_data->num_total_objects++;
+    CountCreatedObject(device_data, HandleToUint64(device), kVulkanObjectTypeCommandBuffer);
+}
+
+// Remove an object from the device's object table, checking that it was destroyed with matching allocation callbacks
+void DestroyTrackedObject(layer_data *device_data, uint64_t object_handle, VulkanObjectType object_type,
+                          const VkAllocationCallbacks *pAllocator, enum UNIQUE_VALIDATION_ERROR_CODE expected_custom_allocator_code,
+                          enum UNIQUE_VALIDATION_ERROR_CODE expected_default_allocator_code) {
+    if (object_handle == VK_NULL_HANDLE) {
+        return;
+    }
+    bool custom_allocator = pAllocator != nullptr;
+    VkDebugReportObjectTypeEXT debug_object_type = get_debug_report_enum[object_type];
+
+    auto item = device_data->object_map[object_type].find(object_handle);
+    if (item == device_data->object_map[object_type].end()) {
+        if (!IsObjectTypeTracked(object_type)) {
+            return;
+        }
+        log_msg(device_data->report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_UNKNOWN_EXT, object_handle,
+                OBJTRACK_UNKNOWN_OBJECT,
+                "Unable to remove %s obj 0x%" PRIxLEAST64 ". Was it created? Has it already been destroyed?",
+                object_string[object_type], object_handle);
+        return;
+    }
+    ObjTrackState *pNode = item->second;
+
+    log_msg(device_data->report_data, VK_DEBUG_REPORT_INFORMATION_BIT_EXT, debug_object_type, object_handle, OBJTRACK_NONE,
+            "OBJ_STAT Destroy %s obj 0x%" PRIxLEAST64 " (%" PRIu64 " total objs remain & %" PRIu64 " %s objs).",
+            object_string[object_type], object_handle, device_data->num_total_objects - 1,
+            device_data->num_objects[pNode->object_type] - 1, object_string[object_type]);
+
+    auto allocated_with_custom = (pNode->status & OBJSTATUS_CUSTOM_ALLOCATOR) ? true : false;
+    if (allocated_with_custom && !custom_allocator && expected_custom_allocator_code != VALIDATION_ERROR_UNDEFINED) {
+        // This check only verifies that custom allocation callbacks were provided to both Create and Destroy calls,
+        // it cannot verify that these allocation callbacks are compatible with each other.
+        log_msg(device_data->report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, debug_object_type, object_handle,
+                expected_custom_allocator_code,
+                "Custom allocator not specified while destroying %s obj 0x%" PRIxLEAST64 " but specified at creation.",
+                object_string[object_type], object_handle);
+    } else if (!allocated_with_custom && custom_allocator && expected_default_allocator_code != VALIDATION_ERROR_UNDEFINED) {
+        log_msg(device_data->report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, debug_object_type, object_handle,
+                expected_default_allocator_code,
+                "Custom allocator specified while destroying %s obj 0x%" PRIxLEAST64 " but not specified at creation.",
+                object_string[object_type], object_handle);
+    }
+
+    assert(device_data->num_total_objects > 0);
+    device_data->num_total_objects--;
+    assert(device_data->num_objects[pNode->object_type] > 0);
+    device_data->num_objects[pNode->object_type]--;
+
+    device_data->object_state_pool.Free(pNode);
+    device_data->object_map[object_type].erase(item);
+}
+
+// Validate the command buffer being recorded into.  The record found by the same lookup supplies the memo used for the
+// command's remaining handles; the memo is nullptr if the command buffer is unknown.
+bool ValidateRecordingCommandBuffer(VkCommandBuffer command_buffer, ValidatedHandleMemo **memo,
+                                    enum UNIQUE_VALIDATION_ERROR_CODE invalid_handle_code,
+                                    enum UNIQUE_VALIDATION_ERROR_CODE wrong_device_code) {
+    ObjTrackState *command_buffer_state = nullptr;
+    bool skip = ValidateObject(command_buffer, command_buffer, kVulkanObjectTypeCommandBuffer, false, invalid_handle_code,
+                               wrong_device_code, &command_buffer_state);
+    *memo = command_buffer_state ? command_buffer_state->validated_handles : nullptr;
+    return skip;
 }
 
 bool ValidateCommandBuffer(VkDevice device, VkCommandPool command_pool, VkCommandBuffer command_buffer) {
@@ -166,20 +246,22 @@ bool ValidateCommandBuffer(VkDevice device, VkCommandPool command_pool, VkComman
 }
 
 void AllocateDescriptorSet(VkDevice device, VkDescriptorPool descriptor_pool, VkDescriptorSet descriptor_set) {
+    if (!IsObjectTypeTracked(kVulkanObjectTypeDescriptorSet)) {
+        return;
+    }
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
 
     log_msg(device_data->report_data, VK_DEBUG_REPORT_INFORMATION_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_DESCRIPTOR_SET_EXT,
             HandleToUint64(descriptor_set), OBJTRACK_NONE, "OBJ[0x%" PRIxLEAST64 "] : CREATE %s object 0x%" PRIxLEAST64,
             object_track_index++, "VK_DEBUG_REPORT_OBJECT_TYPE_DESCRIPTOR_SET_EXT", HandleToUint64(descriptor_set));
 
-    ObjTrackState *pNewObjNode = new ObjTrackState;
+    ObjTrackState *pNewObjNode = device_data->object_state_pool.Allocate();
     pNewObjNode->object_type = kVulkanObjectTypeDescriptorSet;
     pNewObjNode->status = OBJSTATUS_NONE;
     pNewObjNode->handle = HandleToUint64(descriptor_set);
     pNewObjNode->parent_object = HandleToUint64(descriptor_pool);
     device_data->object_map[kVulkanObjectTypeDescriptorSet][HandleToUint64(descriptor_set)] = pNewObjNode;
-    device_data->num_objects[kVulkanObjectTypeDescriptorSet]++;
-    device_data->num_total_objects++;
+    CountCreatedObject(device_data, HandleToUint64(device), kVulkanObjectTypeDescriptorSet);
 }
 
 bool ValidateDescriptorSet(VkDevice device, VkDescriptorPool descriptor_pool, VkDescriptorSet descriptor_set) {
@@ -197,7 +279,7 @@ bool ValidateDescriptorSet(VkDevice device, VkDescriptorPool descriptor_pool, Vk
                             " belonging to Descriptor Pool 0x%" PRIxLEAST64 " from pool 0x%" PRIxLEAST64 ").",
                             HandleToUint64(descriptor_set), pNode->parent_object, HandleToUint64(descriptor_pool));
         }
-    } else {
+    } else if (IsObjectTypeTracked(kVulkanObjectTypeDescriptorSet)) {
         skip |= log_msg(device_data->report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_DESCRIPTOR_SET_EXT,
                         object_handle, VALIDATION_ERROR_2860026c, "Invalid %s Object 0x%" PRIxLEAST64 ".",
                         object_string[kVulkanObjectTypeDescriptorSet], object_handle);
@@ -216,10 +298,8 @@ static bool ValidateDescriptorWrite(DispObj disp, VkWriteDescriptorSet const *de
 
     if ((desc->descriptorType == VK_DESCRIPTOR_TYPE_UNIFORM_TEXEL_BUFFER) ||
         (desc->descriptorType == VK_DESCRIPTOR_TYPE_STORAGE_TEXEL_BUFFER)) {
-        for (uint32_t idx2 = 0; idx2 < desc->descriptorCount; ++idx2) {
-            skip |= ValidateObject(disp, desc->pTexelBufferView[idx2], kVulkanObjectTypeBufferView, false,
-                                   VALIDATION_ERROR_15c00286, VALIDATION_ERROR_15c00009);
-        }
+        skip |= ValidateObjects(disp, desc->pTexelBufferView, desc->descriptorCount, kVulkanObjectTypeBufferView, false,
+                                VALIDATION_ERROR_15c00286, VALIDATION_ERROR_15c00009);
     }
 
     if ((desc->descriptorType == VK_DESCRIPTOR_TYPE_COMBINED_IMAGE_SAMPLER) ||
@@ -251,7 +331,7 @@ VKAPI_ATTR void VKAPI_CALL CmdPushDescriptorSetKHR(VkCommandBuffer commandBuffer
                                                    const VkWriteDescriptorSet *pDescriptorWrites) {
     bool skip = false;
     {
-        std::lock_guard<std::mutex> lock(global_lock);
+        ReadLockGuard lock(global_lock);
         skip |= ValidateObject(commandBuffer, commandBuffer, kVulkanObjectTypeCommandBuffer, false, VALIDATION_ERROR_1be02401,
                                VALIDATION_ERROR_1be00009);
         skip |= ValidateObject(commandBuffer, layout, kVulkanObjectTypePipelineLayout, false, VALIDATION_ERROR_1be0be01,
@@ -277,10 +357,10 @@ void CreateQueue(VkDevice device, VkQueue vkObj) {
     ObjTrackState *p_obj_node = NULL;
     auto queue_item = device_data->object_map[kVulkanObjectTypeQueue].find(HandleToUint64(vkObj));
     if (queue_item == device_data->object_map[kVulkanObjectTypeQueue].end()) {
-        p_obj_node = new ObjTrackState;
+        p_obj_node = device_data->object_state_pool.Allocate();
+        p_obj_node->parent_object = 0;
         device_data->object_map[kVulkanObjectTypeQueue][HandleToUint64(vkObj)] = p_obj_node;
-        device_data->num_objects[kVulkanObjectTypeQueue]++;
-        device_data->num_total_objects++;
+        CountCreatedObject(device_data, HandleToUint64(device), kVulkanObjectTypeQueue);
     } else {
         p_obj_node = queue_item->second;
     }
@@ -290,12 +370,15 @@ void CreateQueue(VkDevice device, VkQueue vkObj) {
 }
 
 void CreateSwapchainImageObject(VkDevice dispatchable_object, VkImage swapchain_image, VkSwapchainKHR swapchain) {
+    if (!IsObjectTypeTracked(kVulkanObjectTypeImage)) {
+        return;
+    }
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(dispatchable_object), layer_data_map);
     log_msg(device_data->report_data, VK_DEBUG_REPORT_INFORMATION_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_IMAGE_EXT,
             HandleToUint64(swapchain_image), OBJTRACK_NONE, "OBJ[0x%" PRIxLEAST64 "] : CREATE %s object 0x%" PRIxLEAST64,
             object_track_index++, "SwapchainImage", HandleToUint64(swapchain_image));
 
-    ObjTrackState *pNewObjNode = new ObjTrackState;
+    ObjTrackState *pNewObjNode = device_data->object_state_pool.Allocate();
     pNewObjNode->object_type = kVulkanObjectTypeImage;
     pNewObjNode->status = OBJSTATUS_NONE;
     pNewObjNode->handle = HandleToUint64(swapchain_image);
@@ -303,28 +386,113 @@ void CreateSwapchainImageObject(VkDevice dispatchable_object, VkImage swapchain_
     device_data->swapchainImageMap[HandleToUint64(swapchain_image)] = pNewObjNode;
 }
 
-void DeviceReportUndestroyedObjects(VkDevice device, VulkanObjectType object_type, enum UNIQUE_VALIDATION_ERROR_CODE error_code) {
+void ReportLeakedObjects(VkDevice device, const VulkanObjectType *object_types, uint32_t object_type_count,
+                         enum UNIQUE_VALIDATION_ERROR_CODE error_code) {
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
-    for (const auto &item : device_data->object_map[object_type]) {
-        const ObjTrackState *object_info = item.second;
-        log_msg(device_data->report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, get_debug_report_enum[object_type], object_info->handle,
-                error_code, "OBJ ERROR : For device 0x%" PRIxLEAST64 ", %s object 0x%" PRIxLEAST64 " has not been destroyed.",
-                HandleToUint64(device), object_string[object_type], object_info->handle);
+
+    // The live counts are kept up to date by every create and destroy, so a leak-free device needs no table walks
+    uint64_t leaked_count = 0;
+    for (uint32_t i = 0; i < object_type_count; i++) {
+        leaked_count += device_data->num_objects[object_types[i]];
+    }
+    if (leaked_count == 0) {
+        return;
+    }
+
+    std::string histogram;
+    uint32_t reported_count = 0;
+    for (uint32_t i = 0; i < object_type_count; i++) {
+        VulkanObjectType object_type = object_types[i];
+        if (device_data->num_objects[object_type] == 0) {
+            continue;
+        }
+        histogram += histogram.empty() ? "" : ", ";
+        histogram += std::to_string(device_data->num_objects[object_type]) + " " + object_string[object_type];
+        for (const auto &item : device_data->object_map[object_type]) {
+            if (reported_count >= leak_report_limit) {
+                break;
+            }
+            const ObjTrackState *object_info = item.second;
+            log_msg(device_data->report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, get_debug_report_enum[object_type],
+                    object_info->handle, error_code,
+                    "OBJ ERROR : For device 0x%" PRIxLEAST64 ", %s object 0x%" PRIxLEAST64 " has not been destroyed.",
+                    HandleToUint64(device), object_string[object_type], object_info->handle);
+            reported_count++;
+        }
+    }
+
+    // Only summarize when leak_report_limit left some leaked objects without a message of their own
+    if (reported_count < leaked_count) {
+        log_msg(device_data->report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_DEVICE_EXT,
+                HandleToUint64(device), error_code,
+                "OBJ ERROR : For device 0x%" PRIxLEAST64 ", %" PRIu64 " objects have not been destroyed (%s). %" PRIu32
+                " of them were reported individually.",
+                HandleToUint64(device), leaked_count, histogram.c_str(), reported_count);
     }
 }
 
 void DeviceDestroyUndestroyedObjects(VkDevice device, VulkanObjectType object_type) {
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
-    while (!device_data->object_map[object_type].empty()) {
-        auto item = device_data->object_map[object_type].begin();
-
+    if (device_data->num_objects[object_type] == 0) {
+        return;
+    }
+    auto &object_table = device_data->object_map[object_type];
+    // Erasing leaves the table's remaining entries in place, so a single pass visits every object
+    for (auto item = object_table.begin(); item != object_table.end();) {
         ObjTrackState *object_info = item->second;
+        ++item;
         DestroyObjectSilently(device, object_info->handle, object_type);
     }
 }
 
+// Report the memory used by a device's object tables and state records
+void ReportObjectTrackingMemory(VkDevice device) {
+    layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
+    uint64_t table_bytes = device_data->swapchainImageMap.MemoryUsage();
+    uint64_t object_count = device_data->swapchainImageMap.size();
+    for (const auto &object_table : device_data->object_map) {
+        table_bytes += object_table.MemoryUsage();
+        object_count += object_table.size();
+    }
+    uint64_t state_bytes = device_data->object_state_pool.MemoryUsage();
+    uint64_t bytes_per_object = object_count ? (table_bytes + state_bytes) / object_count : 0;
+    log_msg(device_data->report_data, VK_DEBUG_REPORT_INFORMATION_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_DEVICE_EXT,
+            HandleToUint64(device), OBJTRACK_NONE,
+            "OBJ_STAT Tracking %" PRIu64 " objects uses %" PRIu64 " bytes of object tables and %" PRIu64
+            " bytes of state records (%" PRIu64 " bytes per object).",
+            object_count, table_bytes, state_bytes, bytes_per_object);
+}
+
+void ReportObjectCounts(layer_data *object_data, uint64_t dispatch_handle) {
+    std::string counts;
+    for (uint32_t object_type = kVulkanObjectTypeUnknown + 1; object_type < kVulkanObjectTypeMax; object_type++) {
+        if (object_data->peak_objects[object_type] == 0) {
+            continue;
+        }
+        counts += counts.empty() ? "" : ", ";
+        counts += std::string(object_string[object_type]) + " " + std::to_string(object_data->num_objects[object_type]) +
+                  " (peak " + std::to_string(object_data->peak_objects[object_type]) + ")";
+    }
+    log_msg(object_data->report_data, VK_DEBUG_REPORT_INFORMATION_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_UNKNOWN_EXT,
+            dispatch_handle, OBJTRACK_NONE, "OBJ_STAT Live object counts after %" PRIu64 " creations: %s.",
+            object_data->num_created_objects, counts.c_str());
+}
+
+VKAPI_ATTR void VKAPI_CALL GetObjectCountsLUNARG(VkDevice device, uint64_t *pLiveCounts, uint64_t *pPeakCounts) {
+    ReadLockGuard lock(global_lock);
+    layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
+    for (uint32_t object_type = 0; object_type < kVulkanObjectTypeMax; object_type++) {
+        if (pLiveCounts) {
+            pLiveCounts[object_type] = device_data->num_objects[object_type];
+        }
+        if (pPeakCounts) {
+            pPeakCounts[object_type] = device_data->peak_objects[object_type];
+        }
+    }
+}
+
 VKAPI_ATTR void VKAPI_CALL DestroyInstance(VkInstance instance, const VkAllocationCallbacks *pAllocator) {
-    std::unique_lock<std::mutex> lock(global_lock);
+    std::unique_lock<ReadWriteLock> lock(global_lock);
 
     dispatch_key key = get_dispatch_key(instance);
     layer_data *instance_data = GetLayerDataPtr(key, layer_data_map);
@@ -415,9 +583,10 @@ VKAPI_ATTR void VKAPI_CALL DestroyInstance(VkInstance instance, const VkAllocati
 }
 
 VKAPI_ATTR void VKAPI_CALL DestroyDevice(VkDevice device, const VkAllocationCallbacks *pAllocator) {
-    std::unique_lock<std::mutex> lock(global_lock);
+    std::unique_lock<ReadWriteLock> lock(global_lock);
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     ValidateObject(device, device, kVulkanObjectTypeDevice, true, VALIDATION_ERROR_24a05601, VALIDATION_ERROR_UNDEFINED);
+    ReportObjectTrackingMemory(device);
     DestroyObject(device_data->instance, device, kVulkanObjectTypeDevice, pAllocator, VALIDATION_ERROR_24a002f6,
                   VALIDATION_ERROR_24a002f8);
 
@@ -440,25 +609,27 @@ VKAPI_ATTR void VKAPI_CALL DestroyDevice(VkDevice device, const VkAllocationCall
 }
 
 VKAPI_ATTR void VKAPI_CALL GetDeviceQueue(VkDevice device, uint32_t queueFamilyIndex, uint32_t queueIndex, VkQueue *pQueue) {
-    std::unique_lock<std::mutex> lock(global_lock);
-    ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_29605601, VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_29605601, VALIDATION_ERROR_UNDEFINED);
+    }
 
     get_dispatch_table(ot_device_table_map, device)->GetDeviceQueue(device, queueFamilyIndex, queueIndex, pQueue);
 
-    lock.lock();
+    std::lock_guard<ReadWriteLock> lock(global_lock);
     CreateQueue(device, *pQueue);
     AddQueueInfo(device, queueFamilyIndex, *pQueue);
 }
 
 VKAPI_ATTR void VKAPI_CALL GetDeviceQueue2(VkDevice device, const VkDeviceQueueInfo2 *pQueueInfo, VkQueue *pQueue) {
-    std::unique_lock<std::mutex> lock(global_lock);
-    ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_43405601, VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_43405601, VALIDATION_ERROR_UNDEFINED);
+    }
 
     get_dispatch_table(ot_device_table_map, device)->GetDeviceQueue2(device, pQueueInfo, pQueue);
 
-    lock.lock();
+    std::lock_guard<ReadWriteLock> lock(global_lock);
     if (*pQueue != VK_NULL_HANDLE) {
         CreateQueue(device, *pQueue);
         AddQueueInfo(device, pQueueInfo->queueFamilyIndex, *pQueue);
@@ -470,7 +641,7 @@ VKAPI_ATTR void VKAPI_CALL UpdateDescriptorSets(VkDevice device, uint32_t descri
                                                 const VkCopyDescriptorSet *pDescriptorCopies) {
     bool skip = false;
     {
-        std::lock_guard<std::mutex> lock(global_lock);
+        ReadLockGuard lock(global_lock);
         skip |=
             ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_33c05601, VALIDATION_ERROR_UNDEFINED);
         if (pDescriptorCopies) {
@@ -502,29 +673,31 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateComputePipelines(VkDevice device, VkPipelin
                                                       const VkComputePipelineCreateInfo *pCreateInfos,
                                                       const VkAllocationCallbacks *pAllocator, VkPipeline *pPipelines) {
     bool skip = VK_FALSE;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_1f205601, VALIDATION_ERROR_UNDEFINED);
-    if (pCreateInfos) {
-        for (uint32_t idx0 = 0; idx0 < createInfoCount; ++idx0) {
-            if (pCreateInfos[idx0].basePipelineHandle) {
-                skip |= ValidateObject(device, pCreateInfos[idx0].basePipelineHandle, kVulkanObjectTypePipeline, true,
-                                       VALIDATION_ERROR_03000572, VALIDATION_ERROR_03000009);
-            }
-            if (pCreateInfos[idx0].layout) {
-                skip |= ValidateObject(device, pCreateInfos[idx0].layout, kVulkanObjectTypePipelineLayout, false,
-                                       VALIDATION_ERROR_0300be01, VALIDATION_ERROR_03000009);
-            }
-            if (pCreateInfos[idx0].stage.module) {
-                skip |= ValidateObject(device, pCreateInfos[idx0].stage.module, kVulkanObjectTypeShaderModule, false,
-                                       VALIDATION_ERROR_1060d201, VALIDATION_ERROR_UNDEFINED);
+    {
+        ReadLockGuard lock(global_lock);
+        skip |=
+            ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_1f205601, VALIDATION_ERROR_UNDEFINED);
+        if (pCreateInfos) {
+            for (uint32_t idx0 = 0; idx0 < createInfoCount; ++idx0) {
+                if (pCreateInfos[idx0].basePipelineHandle) {
+                    skip |= ValidateObject(device, pCreateInfos[idx0].basePipelineHandle, kVulkanObjectTypePipeline, true,
+                                           VALIDATION_ERROR_03000572, VALIDATION_ERROR_03000009);
+                }
+                if (pCreateInfos[idx0].layout) {
+                    skip |= ValidateObject(device, pCreateInfos[idx0].layout, kVulkanObjectTypePipelineLayout, false,
+                                           VALIDATION_ERROR_0300be01, VALIDATION_ERROR_03000009);
+                }
+                if (pCreateInfos[idx0].stage.module) {
+                    skip |= ValidateObject(device, pCreateInfos[idx0].stage.module, kVulkanObjectTypeShaderModule, false,
+                                           VALIDATION_ERROR_1060d201, VALIDATION_ERROR_UNDEFINED);
+                }
             }
         }
+        if (pipelineCache) {
+            skip |= ValidateObject(device, pipelineCache, kVulkanObjectTypePipelineCache, true, VALIDATION_ERROR_1f228001,
+                                   VALIDATION_ERROR_1f228007);
+        }
     }
-    if (pipelineCache) {
-        skip |= ValidateObject(device, pipelineCache, kVulkanObjectTypePipelineCache, true, VALIDATION_ERROR_1f228001,
-                               VALIDATION_ERROR_1f228007);
-    }
-    lock.unlock();
     if (skip) {
         for (uint32_t i = 0; i < createInfoCount; i++) {
             pPipelines[i] = VK_NULL_HANDLE;
@@ -533,7 +706,7 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateComputePipelines(VkDevice device, VkPipelin
     }
     VkResult result = get_dispatch_table(ot_device_table_map, device)
                           ->CreateComputePipelines(device, pipelineCache, createInfoCount, pCreateInfos, pAllocator, pPipelines);
-    lock.lock();
+    std::unique_lock<ReadWriteLock> lock(global_lock);
     for (uint32_t idx1 = 0; idx1 < createInfoCount; ++idx1) {
         if (pPipelines[idx1] != VK_NULL_HANDLE) {
             CreateObject(device, pPipelines[idx1], kVulkanObjectTypePipeline, pAllocator);
@@ -546,7 +719,7 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateComputePipelines(VkDevice device, VkPipelin
 VKAPI_ATTR VkResult VKAPI_CALL ResetDescriptorPool(VkDevice device, VkDescriptorPool descriptorPool,
                                                    VkDescriptorPoolResetFlags flags) {
     bool skip = false;
-    std::unique_lock<std::mutex> lock(global_lock);
+    std::unique_lock<ReadWriteLock> lock(global_lock);
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     skip |= ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_32a05601, VALIDATION_ERROR_UNDEFINED);
     skip |= ValidateObject(device, descriptorPool, kVulkanObjectTypeDescriptorPool, false, VALIDATION_ERROR_32a04601,
@@ -574,11 +747,17 @@ VKAPI_ATTR VkResult VKAPI_CALL BeginCommandBuffer(VkCommandBuffer command_buffer
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(command_buffer), layer_data_map);
     bool skip = false;
     {
-        std::lock_guard<std::mutex> lock(global_lock);
+        ReadLockGuard lock(global_lock);
         skip |= ValidateObject(command_buffer, command_buffer, kVulkanObjectTypeCommandBuffer, false, VALIDATION_ERROR_16e02401,
                                VALIDATION_ERROR_UNDEFINED);
-        if (begin_info) {
-            ObjTrackState *pNode = device_data->object_map[kVulkanObjectTypeCommandBuffer][HandleToUint64(command_buffer)];
+        // Only look up the command buffer's state here; this lock is shared and must not insert into the map
+        auto cb_item = device_data->object_map[kVulkanObjectTypeCommandBuffer].find(HandleToUint64(command_buffer));
+        if ((cb_item != device_data->object_map[kVulkanObjectTypeCommandBuffer].end()) && cb_item->second->validated_handles) {
+            // Beginning a recording resets the command buffer, so start the new recording with an empty memo
+            cb_item->second->validated_handles->Clear();
+        }
+        if (begin_info && (cb_item != device_data->object_map[kVulkanObjectTypeCommandBuffer].end())) {
+            ObjTrackState *pNode = cb_item->second;
             if ((begin_info->pInheritanceInfo) && (pNode->status & OBJSTATUS_COMMAND_BUFFER_SECONDARY) &&
                 (begin_info->flags & VK_COMMAND_BUFFER_USAGE_RENDER_PASS_CONTINUE_BIT)) {
                 skip |= ValidateObject(command_buffer, begin_info->pInheritanceInfo->framebuffer, kVulkanObjectTypeFramebuffer,
@@ -629,22 +808,23 @@ VKAPI_ATTR void VKAPI_CALL DebugReportMessageEXT(VkInstance instance, VkDebugRep
 // VK_EXT_debug_utils commands
 VKAPI_ATTR VkResult VKAPI_CALL SetDebugUtilsObjectNameEXT(VkDevice device, const VkDebugUtilsObjectNameInfoEXT *pNameInfo) {
     bool skip = VK_FALSE;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_UNDEFINED, VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |=
+            ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_UNDEFINED, VALIDATION_ERROR_UNDEFINED);
+    }
     if (skip) {
         return VK_ERROR_VALIDATION_FAILED_EXT;
     }
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
-    if (pNameInfo->pObjectName) {
-        lock.lock();
-        dev_data->report_data->debugUtilsObjectNameMap->insert(
-            std::make_pair<uint64_t, std::string>((uint64_t &&) pNameInfo->objectHandle, pNameInfo->pObjectName));
-        lock.unlock();
-    } else {
-        lock.lock();
-        dev_data->report_data->debugUtilsObjectNameMap->erase(pNameInfo->objectHandle);
-        lock.unlock();
+    {
+        std::lock_guard<ReadWriteLock> lock(global_lock);
+        if (pNameInfo->pObjectName) {
+            dev_data->report_data->debugUtilsObjectNameMap->insert(
+                std::make_pair<uint64_t, std::string>((uint64_t &&) pNameInfo->objectHandle, pNameInfo->pObjectName));
+        } else {
+            dev_data->report_data->debugUtilsObjectNameMap->erase(pNameInfo->objectHandle);
+        }
     }
     VkResult result = dev_data->dispatch_table.SetDebugUtilsObjectNameEXT(device, pNameInfo);
     return result;
@@ -652,9 +832,11 @@ VKAPI_ATTR VkResult VKAPI_CALL SetDebugUtilsObjectNameEXT(VkDevice device, const
 
 VKAPI_ATTR VkResult VKAPI_CALL SetDebugUtilsObjectTagEXT(VkDevice device, const VkDebugUtilsObjectTagInfoEXT *pTagInfo) {
     bool skip = VK_FALSE;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_UNDEFINED, VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |=
+            ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_UNDEFINED, VALIDATION_ERROR_UNDEFINED);
+    }
     if (skip) {
         return VK_ERROR_VALIDATION_FAILED_EXT;
     }
@@ -665,14 +847,16 @@ VKAPI_ATTR VkResult VKAPI_CALL SetDebugUtilsObjectTagEXT(VkDevice device, const
 
 VKAPI_ATTR void VKAPI_CALL QueueBeginDebugUtilsLabelEXT(VkQueue queue, const VkDebugUtilsLabelEXT *pLabelInfo) {
     bool skip = VK_FALSE;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(queue, queue, kVulkanObjectTypeQueue, false, VALIDATION_ERROR_UNDEFINED, VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |= ValidateObject(queue, queue, kVulkanObjectTypeQueue, false, VALIDATION_ERROR_UNDEFINED, VALIDATION_ERROR_UNDEFINED);
+    }
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(queue), layer_data_map);
     if (!skip) {
-        lock.lock();
-        BeginQueueDebugUtilsLabel(dev_data->report_data, queue, pLabelInfo);
-        lock.unlock();
+        {
+            std::lock_guard<ReadWriteLock> lock(global_lock);
+            BeginQueueDebugUtilsLabel(dev_data->report_data, queue, pLabelInfo);
+        }
         if (dev_data->dispatch_table.QueueBeginDebugUtilsLabelEXT) {
             dev_data->dispatch_table.QueueBeginDebugUtilsLabelEXT(queue, pLabelInfo);
         }
@@ -681,30 +865,34 @@ VKAPI_ATTR void VKAPI_CALL QueueBeginDebugUtilsLabelEXT(VkQueue queue, const VkD
 
 VKAPI_ATTR void VKAPI_CALL QueueEndDebugUtilsLabelEXT(VkQueue queue) {
     bool skip = VK_FALSE;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(queue, queue, kVulkanObjectTypeQueue, false, VALIDATION_ERROR_UNDEFINED, VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |= ValidateObject(queue, queue, kVulkanObjectTypeQueue, false, VALIDATION_ERROR_UNDEFINED, VALIDATION_ERROR_UNDEFINED);
+    }
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(queue), layer_data_map);
     if (!skip) {
         if (dev_data->dispatch_table.QueueEndDebugUtilsLabelEXT) {
             dev_data->dispatch_table.QueueEndDebugUtilsLabelEXT(queue);
         }
-        lock.lock();
-        EndQueueDebugUtilsLabel(dev_data->report_data, queue);
-        lock.unlock();
+        {
+            std::lock_guard<ReadWriteLock> lock(global_lock);
+            EndQueueDebugUtilsLabel(dev_data->report_data, queue);
+        }
     }
 }
 
 VKAPI_ATTR void VKAPI_CALL QueueInsertDebugUtilsLabelEXT(VkQueue queue, const VkDebugUtilsLabelEXT *pLabelInfo) {
     bool skip = VK_FALSE;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(queue, queue, kVulkanObjectTypeQueue, false, VALIDATION_ERROR_UNDEFINED, VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |= ValidateObject(queue, queue, kVulkanObjectTypeQueue, false, VALIDATION_ERROR_UNDEFINED, VALIDATION_ERROR_UNDEFINED);
+    }
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(queue), layer_data_map);
     if (!skip) {
-        lock.lock();
-        InsertQueueDebugUtilsLabel(dev_data->report_data, queue, pLabelInfo);
-        lock.unlock();
+        {
+            std::lock_guard<ReadWriteLock> lock(global_lock);
+            InsertQueueDebugUtilsLabel(dev_data->report_data, queue, pLabelInfo);
+        }
         if (dev_data->dispatch_table.QueueInsertDebugUtilsLabelEXT) {
             dev_data->dispatch_table.QueueInsertDebugUtilsLabelEXT(queue, pLabelInfo);
         }
@@ -713,15 +901,17 @@ VKAPI_ATTR void VKAPI_CALL QueueInsertDebugUtilsLabelEXT(VkQueue queue, const Vk
 
 VKAPI_ATTR void VKAPI_CALL CmdBeginDebugUtilsLabelEXT(VkCommandBuffer commandBuffer, const VkDebugUtilsLabelEXT *pLabelInfo) {
     bool skip = VK_FALSE;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(commandBuffer, commandBuffer, kVulkanObjectTypeCommandBuffer, false, VALIDATION_ERROR_UNDEFINED,
-                           VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |= ValidateObject(commandBuffer, commandBuffer, kVulkanObjectTypeCommandBuffer, false, VALIDATION_ERROR_UNDEFINED,
+                               VALIDATION_ERROR_UNDEFINED);
+    }
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(commandBuffer), layer_data_map);
     if (!skip) {
-        lock.lock();
-        BeginCmdDebugUtilsLabel(dev_data->report_data, commandBuffer, pLabelInfo);
-        lock.unlock();
+        {
+            std::lock_guard<ReadWriteLock> lock(global_lock);
+            BeginCmdDebugUtilsLabel(dev_data->report_data, commandBuffer, pLabelInfo);
+        }
         if (dev_data->dispatch_table.CmdBeginDebugUtilsLabelEXT) {
             dev_data->dispatch_table.CmdBeginDebugUtilsLabelEXT(commandBuffer, pLabelInfo);
         }
@@ -730,32 +920,36 @@ VKAPI_ATTR void VKAPI_CALL CmdBeginDebugUtilsLabelEXT(VkCommandBuffer commandBuf
 
 VKAPI_ATTR void VKAPI_CALL CmdEndDebugUtilsLabelEXT(VkCommandBuffer commandBuffer) {
     bool skip = VK_FALSE;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(commandBuffer, commandBuffer, kVulkanObjectTypeCommandBuffer, false, VALIDATION_ERROR_UNDEFINED,
-                           VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |= ValidateObject(commandBuffer, commandBuffer, kVulkanObjectTypeCommandBuffer, false, VALIDATION_ERROR_UNDEFINED,
+                               VALIDATION_ERROR_UNDEFINED);
+    }
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(commandBuffer), layer_data_map);
     if (!skip) {
         if (dev_data->dispatch_table.CmdEndDebugUtilsLabelEXT) {
             dev_data->dispatch_table.CmdEndDebugUtilsLabelEXT(commandBuffer);
         }
-        lock.lock();
-        EndCmdDebugUtilsLabel(dev_data->report_data, commandBuffer);
-        lock.unlock();
+        {
+            std::lock_guard<ReadWriteLock> lock(global_lock);
+            EndCmdDebugUtilsLabel(dev_data->report_data, commandBuffer);
+        }
     }
 }
 
 VKAPI_ATTR void VKAPI_CALL CmdInsertDebugUtilsLabelEXT(VkCommandBuffer commandBuffer, const VkDebugUtilsLabelEXT *pLabelInfo) {
     bool skip = VK_FALSE;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(commandBuffer, commandBuffer, kVulkanObjectTypeCommandBuffer, false, VALIDATION_ERROR_UNDEFINED,
-                           VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |= ValidateObject(commandBuffer, commandBuffer, kVulkanObjectTypeCommandBuffer, false, VALIDATION_ERROR_UNDEFINED,
+                               VALIDATION_ERROR_UNDEFINED);
+    }
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(commandBuffer), layer_data_map);
     if (!skip) {
-        lock.lock();
-        InsertCmdDebugUtilsLabel(dev_data->report_data, commandBuffer, pLabelInfo);
-        lock.unlock();
+        {
+            std::lock_guard<ReadWriteLock> lock(global_lock);
+            InsertCmdDebugUtilsLabel(dev_data->report_data, commandBuffer, pLabelInfo);
+        }
         if (dev_data->dispatch_table.CmdInsertDebugUtilsLabelEXT) {
             dev_data->dispatch_table.CmdInsertDebugUtilsLabelEXT(commandBuffer, pLabelInfo);
         }
@@ -830,7 +1024,7 @@ VKAPI_ATTR VkResult VKAPI_CALL EnumerateDeviceExtensionProperties(VkPhysicalDevi
 
 VKAPI_ATTR VkResult VKAPI_CALL CreateDevice(VkPhysicalDevice physicalDevice, const VkDeviceCreateInfo *pCreateInfo,
                                             const VkAllocationCallbacks *pAllocator, VkDevice *pDevice) {
-    std::lock_guard<std::mutex> lock(global_lock);
+    std::lock_guard<ReadWriteLock> lock(global_lock);
     bool skip = ValidateObject(physicalDevice, physicalDevice, kVulkanObjectTypePhysicalDevice, false, VALIDATION_ERROR_1fc27a01,
                                VALIDATION_ERROR_UNDEFINED);
     if (skip) return VK_ERROR_VALIDATION_FAILED_EXT;
@@ -872,17 +1066,19 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateDevice(VkPhysicalDevice physicalDevice, con
 VKAPI_ATTR VkResult VKAPI_CALL GetSwapchainImagesKHR(VkDevice device, VkSwapchainKHR swapchain, uint32_t *pSwapchainImageCount,
                                                      VkImage *pSwapchainImages) {
     bool skip = false;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_30805601, VALIDATION_ERROR_UNDEFINED);
-    skip |= ValidateObject(device, swapchain, kVulkanObjectTypeSwapchainKHR, false, VALIDATION_ERROR_3082f001,
-                           VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |=
+            ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_30805601, VALIDATION_ERROR_UNDEFINED);
+        skip |= ValidateObject(device, swapchain, kVulkanObjectTypeSwapchainKHR, false, VALIDATION_ERROR_3082f001,
+                               VALIDATION_ERROR_UNDEFINED);
+    }
     if (skip) return VK_ERROR_VALIDATION_FAILED_EXT;
 
     VkResult result = get_dispatch_table(ot_device_table_map, device)
                           ->GetSwapchainImagesKHR(device, swapchain, pSwapchainImageCount, pSwapchainImages);
     if (pSwapchainImages != NULL) {
-        lock.lock();
+        std::unique_lock<ReadWriteLock> lock(global_lock);
         for (uint32_t i = 0; i < *pSwapchainImageCount; i++) {
             CreateSwapchainImageObject(device, pSwapchainImages[i], swapchain);
         }
@@ -896,7 +1092,7 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateDescriptorSetLayout(VkDevice device, const
                                                          VkDescriptorSetLayout *pSetLayout) {
     bool skip = false;
     {
-        std::lock_guard<std::mutex> lock(global_lock);
+        ReadLockGuard lock(global_lock);
         skip |=
             ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_1f805601, VALIDATION_ERROR_UNDEFINED);
         if (pCreateInfo) {
@@ -920,7 +1116,7 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateDescriptorSetLayout(VkDevice device, const
     VkResult result =
         get_dispatch_table(ot_device_table_map, device)->CreateDescriptorSetLayout(device, pCreateInfo, pAllocator, pSetLayout);
     if (VK_SUCCESS == result) {
-        std::lock_guard<std::mutex> lock(global_lock);
+        std::lock_guard<ReadWriteLock> lock(global_lock);
         CreateObject(device, *pSetLayout, kVulkanObjectTypeDescriptorSetLayout, pAllocator);
     }
     return result;
@@ -931,7 +1127,7 @@ VKAPI_ATTR void VKAPI_CALL GetPhysicalDeviceQueueFamilyProperties(VkPhysicalDevi
                                                                   VkQueueFamilyProperties *pQueueFamilyProperties) {
     bool skip = false;
     {
-        std::lock_guard<std::mutex> lock(global_lock);
+        ReadLockGuard lock(global_lock);
         skip |= ValidateObject(physicalDevice, physicalDevice, kVulkanObjectTypePhysicalDevice, false, VALIDATION_ERROR_2da27a01,
                                VALIDATION_ERROR_UNDEFINED);
     }
@@ -940,7 +1136,7 @@ VKAPI_ATTR void VKAPI_CALL GetPhysicalDeviceQueueFamilyProperties(VkPhysicalDevi
     }
     get_dispatch_table(ot_instance_table_map, physicalDevice)
         ->GetPhysicalDeviceQueueFamilyProperties(physicalDevice, pQueueFamilyPropertyCount, pQueueFamilyProperties);
-    std::lock_guard<std::mutex> lock(global_lock);
+    std::lock_guard<ReadWriteLock> lock(global_lock);
     if (pQueueFamilyProperties != NULL) {
         layer_data *instance_data = GetLayerDataPtr(get_dispatch_key(physicalDevice), layer_data_map);
         if (instance_data->queue_family_properties.size() < *pQueueFamilyPropertyCount) {
@@ -996,16 +1192,17 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateInstance(const VkInstanceCreateInfo *pCreat
 VKAPI_ATTR VkResult VKAPI_CALL EnumeratePhysicalDevices(VkInstance instance, uint32_t *pPhysicalDeviceCount,
                                                         VkPhysicalDevice *pPhysicalDevices) {
     bool skip = VK_FALSE;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |=
-        ValidateObject(instance, instance, kVulkanObjectTypeInstance, false, VALIDATION_ERROR_2800bc01, VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |= ValidateObject(instance, instance, kVulkanObjectTypeInstance, false, VALIDATION_ERROR_2800bc01,
+                               VALIDATION_ERROR_UNDEFINED);
+    }
     if (skip) {
         return VK_ERROR_VALIDATION_FAILED_EXT;
     }
     VkResult result = get_dispatch_table(ot_instance_table_map, instance)
                           ->EnumeratePhysicalDevices(instance, pPhysicalDeviceCount, pPhysicalDevices);
-    lock.lock();
+    std::unique_lock<ReadWriteLock> lock(global_lock);
     if (result == VK_SUCCESS) {
         if (pPhysicalDevices) {
             for (uint32_t i = 0; i < *pPhysicalDeviceCount; i++) {
@@ -1020,11 +1217,13 @@ VKAPI_ATTR VkResult VKAPI_CALL EnumeratePhysicalDevices(VkInstance instance, uin
 VKAPI_ATTR VkResult VKAPI_CALL AllocateCommandBuffers(VkDevice device, const VkCommandBufferAllocateInfo *pAllocateInfo,
                                                       VkCommandBuffer *pCommandBuffers) {
     bool skip = VK_FALSE;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_16805601, VALIDATION_ERROR_UNDEFINED);
-    skip |= ValidateObject(device, pAllocateInfo->commandPool, kVulkanObjectTypeCommandPool, false, VALIDATION_ERROR_02602801,
-                           VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |=
+            ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_16805601, VALIDATION_ERROR_UNDEFINED);
+        skip |= ValidateObject(device, pAllocateInfo->commandPool, kVulkanObjectTypeCommandPool, false, VALIDATION_ERROR_02602801,
+                               VALIDATION_ERROR_UNDEFINED);
+    }
 
     if (skip) {
         return VK_ERROR_VALIDATION_FAILED_EXT;
@@ -1033,7 +1232,7 @@ VKAPI_ATTR VkResult VKAPI_CALL AllocateCommandBuffers(VkDevice device, const VkC
     VkResult result =
         get_dispatch_table(ot_device_table_map, device)->AllocateCommandBuffers(device, pAllocateInfo, pCommandBuffers);
 
-    lock.lock();
+    std::unique_lock<ReadWriteLock> lock(global_lock);
     for (uint32_t i = 0; i < pAllocateInfo->commandBufferCount; i++) {
         AllocateCommandBuffer(device, pAllocateInfo->commandPool, pCommandBuffers[i], pAllocateInfo->level);
     }
@@ -1045,15 +1244,15 @@ VKAPI_ATTR VkResult VKAPI_CALL AllocateCommandBuffers(VkDevice device, const VkC
 VKAPI_ATTR VkResult VKAPI_CALL AllocateDescriptorSets(VkDevice device, const VkDescriptorSetAllocateInfo *pAllocateInfo,
                                                       VkDescriptorSet *pDescriptorSets) {
     bool skip = VK_FALSE;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_16a05601, VALIDATION_ERROR_UNDEFINED);
-    skip |= ValidateObject(device, pAllocateInfo->descriptorPool, kVulkanObjectTypeDescriptorPool, false, VALIDATION_ERROR_04c04601,
-                           VALIDATION_ERROR_04c00009);
-    for (uint32_t i = 0; i < pAllocateInfo->descriptorSetCount; i++) {
-        skip |= ValidateObject(device, pAllocateInfo->pSetLayouts[i], kVulkanObjectTypeDescriptorSetLayout, false,
-                               VALIDATION_ERROR_04c22c01, VALIDATION_ERROR_04c00009);
+    {
+        ReadLockGuard lock(global_lock);
+        skip |=
+            ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_16a05601, VALIDATION_ERROR_UNDEFINED);
+        skip |= ValidateObject(device, pAllocateInfo->descriptorPool, kVulkanObjectTypeDescriptorPool, false,
+                               VALIDATION_ERROR_04c04601, VALIDATION_ERROR_04c00009);
+        skip |= ValidateObjects(device, pAllocateInfo->pSetLayouts, pAllocateInfo->descriptorSetCount,
+                                kVulkanObjectTypeDescriptorSetLayout, false, VALIDATION_ERROR_04c22c01, VALIDATION_ERROR_04c00009);
     }
-    lock.unlock();
     if (skip) {
         return VK_ERROR_VALIDATION_FAILED_EXT;
     }
@@ -1062,7 +1261,7 @@ VKAPI_ATTR VkResult VKAPI_CALL AllocateDescriptorSets(VkDevice device, const VkD
         get_dispatch_table(ot_device_table_map, device)->AllocateDescriptorSets(device, pAllocateInfo, pDescriptorSets);
 
     if (VK_SUCCESS == result) {
-        lock.lock();
+        std::unique_lock<ReadWriteLock> lock(global_lock);
         for (uint32_t i = 0; i < pAllocateInfo->descriptorSetCount; i++) {
             AllocateDescriptorSet(device, pAllocateInfo->descriptorPool, pDescriptorSets[i]);
         }
@@ -1075,7 +1274,7 @@ VKAPI_ATTR VkResult VKAPI_CALL AllocateDescriptorSets(VkDevice device, const VkD
 VKAPI_ATTR void VKAPI_CALL FreeCommandBuffers(VkDevice device, VkCommandPool commandPool, uint32_t commandBufferCount,
                                               const VkCommandBuffer *pCommandBuffers) {
     bool skip = false;
-    std::unique_lock<std::mutex> lock(global_lock);
+    std::unique_lock<ReadWriteLock> lock(global_lock);
     ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_28405601, VALIDATION_ERROR_UNDEFINED);
     ValidateObject(device, commandPool, kVulkanObjectTypeCommandPool, false, VALIDATION_ERROR_28402801, VALIDATION_ERROR_28402807);
     for (uint32_t i = 0; i < commandBufferCount; i++) {
@@ -1084,10 +1283,8 @@ VKAPI_ATTR void VKAPI_CALL FreeCommandBuffers(VkDevice device, VkCommandPool com
         }
     }
 
-    for (uint32_t i = 0; i < commandBufferCount; i++) {
-        DestroyObject(device, pCommandBuffers[i], kVulkanObjectTypeCommandBuffer, nullptr, VALIDATION_ERROR_UNDEFINED,
-                      VALIDATION_ERROR_UNDEFINED);
-    }
+    DestroyObjects(device, pCommandBuffers, commandBufferCount, kVulkanObjectTypeCommandBuffer, nullptr, VALIDATION_ERROR_UNDEFINED,
+                   VALIDATION_ERROR_UNDEFINED);
 
     lock.unlock();
     if (!skip) {
@@ -1098,14 +1295,14 @@ VKAPI_ATTR void VKAPI_CALL FreeCommandBuffers(VkDevice device, VkCommandPool com
 
 VKAPI_ATTR void VKAPI_CALL DestroySwapchainKHR(VkDevice device, VkSwapchainKHR swapchain, const VkAllocationCallbacks *pAllocator) {
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
-    std::unique_lock<std::mutex> lock(global_lock);
+    std::unique_lock<ReadWriteLock> lock(global_lock);
     // A swapchain's images are implicitly deleted when the swapchain is deleted.
     // Remove this swapchain's images from our map of such images.
-    std::unordered_map<uint64_t, ObjTrackState *>::iterator itr = device_data->swapchainImageMap.begin();
+    auto itr = device_data->swapchainImageMap.begin();
     while (itr != device_data->swapchainImageMap.end()) {
         ObjTrackState *pNode = (*itr).second;
         if (pNode->parent_object == HandleToUint64(swapchain)) {
-            delete pNode;
+            device_data->object_state_pool.Free(pNode);
             auto delete_item = itr++;
             device_data->swapchainImageMap.erase(delete_item);
         } else {
@@ -1123,7 +1320,7 @@ VKAPI_ATTR VkResult VKAPI_CALL FreeDescriptorSets(VkDevice device, VkDescriptorP
                                                   const VkDescriptorSet *pDescriptorSets) {
     bool skip = false;
     VkResult result = VK_ERROR_VALIDATION_FAILED_EXT;
-    std::unique_lock<std::mutex> lock(global_lock);
+    std::unique_lock<ReadWriteLock> lock(global_lock);
     skip |= ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_28605601, VALIDATION_ERROR_UNDEFINED);
     skip |= ValidateObject(device, descriptorPool, kVulkanObjectTypeDescriptorPool, false, VALIDATION_ERROR_28604601,
                            VALIDATION_ERROR_28604607);
@@ -1133,10 +1330,8 @@ VKAPI_ATTR VkResult VKAPI_CALL FreeDescriptorSets(VkDevice device, VkDescriptorP
         }
     }
 
-    for (uint32_t i = 0; i < descriptorSetCount; i++) {
-        DestroyObject(device, pDescriptorSets[i], kVulkanObjectTypeDescriptorSet, nullptr, VALIDATION_ERROR_UNDEFINED,
-                      VALIDATION_ERROR_UNDEFINED);
-    }
+    DestroyObjects(device, pDescriptorSets, descriptorSetCount, kVulkanObjectTypeDescriptorSet, nullptr, VALIDATION_ERROR_UNDEFINED,
+                   VALIDATION_ERROR_UNDEFINED);
 
     lock.unlock();
     if (!skip) {
@@ -1150,18 +1345,20 @@ VKAPI_ATTR void VKAPI_CALL DestroyDescriptorPool(VkDevice device, VkDescriptorPo
                                                  const VkAllocationCallbacks *pAllocator) {
     bool skip = VK_FALSE;
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_24405601, VALIDATION_ERROR_UNDEFINED);
-    skip |= ValidateObject(device, descriptorPool, kVulkanObjectTypeDescriptorPool, true, VALIDATION_ERROR_24404601,
-                           VALIDATION_ERROR_24404607);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |=
+            ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_24405601, VALIDATION_ERROR_UNDEFINED);
+        skip |= ValidateObject(device, descriptorPool, kVulkanObjectTypeDescriptorPool, true, VALIDATION_ERROR_24404601,
+                               VALIDATION_ERROR_24404607);
+    }
     if (skip) {
         return;
     }
     // A DescriptorPool's descriptor sets are implicitly deleted when the pool is deleted.
     // Remove this pool's descriptor sets from our descriptorSet map.
-    lock.lock();
-    std::unordered_map<uint64_t, ObjTrackState *>::iterator itr = device_data->object_map[kVulkanObjectTypeDescriptorSet].begin();
+    std::unique_lock<ReadWriteLock> lock(global_lock);
+    auto itr = device_data->object_map[kVulkanObjectTypeDescriptorSet].begin();
     while (itr != device_data->object_map[kVulkanObjectTypeDescriptorSet].end()) {
         ObjTrackState *pNode = (*itr).second;
         auto del_itr = itr++;
@@ -1179,15 +1376,17 @@ VKAPI_ATTR void VKAPI_CALL DestroyDescriptorPool(VkDevice device, VkDescriptorPo
 VKAPI_ATTR void VKAPI_CALL DestroyCommandPool(VkDevice device, VkCommandPool commandPool, const VkAllocationCallbacks *pAllocator) {
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     bool skip = false;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_24005601, VALIDATION_ERROR_UNDEFINED);
-    skip |= ValidateObject(device, commandPool, kVulkanObjectTypeCommandPool, true, VALIDATION_ERROR_24002801,
-                           VALIDATION_ERROR_24002807);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |=
+            ValidateObject(device, device, kVulkanObjectTypeDevice, false, VALIDATION_ERROR_24005601, VALIDATION_ERROR_UNDEFINED);
+        skip |= ValidateObject(device, commandPool, kVulkanObjectTypeCommandPool, true, VALIDATION_ERROR_24002801,
+                               VALIDATION_ERROR_24002807);
+    }
     if (skip) {
         return;
     }
-    lock.lock();
+    std::unique_lock<ReadWriteLock> lock(global_lock);
     // A CommandPool's command buffers are implicitly deleted when the pool is deleted.
     // Remove this pool's cmdBuffers from our cmd buffer map.
     auto itr = device_data->object_map[kVulkanObjectTypeCommandBuffer].begin();
@@ -1213,7 +1412,7 @@ VKAPI_ATTR void VKAPI_CALL GetPhysicalDeviceQueueFamilyProperties2(VkPhysicalDev
                                                                    VkQueueFamilyProperties2KHR *pQueueFamilyProperties) {
     bool skip = false;
     {
-        std::lock_guard<std::mutex> lock(global_lock);
+        ReadLockGuard lock(global_lock);
         skip |= ValidateObject(physicalDevice, physicalDevice, kVulkanObjectTypePhysicalDevice, false, VALIDATION_ERROR_UNDEFINED,
                                VALIDATION_ERROR_UNDEFINED);
     }
@@ -1222,7 +1421,7 @@ VKAPI_ATTR void VKAPI_CALL GetPhysicalDeviceQueueFamilyProperties2(VkPhysicalDev
     }
     get_dispatch_table(ot_instance_table_map, physicalDevice)
         ->GetPhysicalDeviceQueueFamilyProperties2(physicalDevice, pQueueFamilyPropertyCount, pQueueFamilyProperties);
-    std::lock_guard<std::mutex> lock(global_lock);
+    std::lock_guard<ReadWriteLock> lock(global_lock);
     if (pQueueFamilyProperties != NULL) {
         layer_data *instance_data = GetLayerDataPtr(get_dispatch_key(physicalDevice), layer_data_map);
         if (instance_data->queue_family_properties.size() < *pQueueFamilyPropertyCount) {
@@ -1240,7 +1439,7 @@ VKAPI_ATTR void VKAPI_CALL GetPhysicalDeviceQueueFamilyProperties2KHR(VkPhysical
                                                                       VkQueueFamilyProperties2KHR *pQueueFamilyProperties) {
     bool skip = false;
     {
-        std::lock_guard<std::mutex> lock(global_lock);
+        ReadLockGuard lock(global_lock);
         skip |= ValidateObject(physicalDevice, physicalDevice, kVulkanObjectTypePhysicalDevice, false, VALIDATION_ERROR_UNDEFINED,
                                VALIDATION_ERROR_UNDEFINED);
     }
@@ -1249,7 +1448,7 @@ VKAPI_ATTR void VKAPI_CALL GetPhysicalDeviceQueueFamilyProperties2KHR(VkPhysical
     }
     get_dispatch_table(ot_instance_table_map, physicalDevice)
         ->GetPhysicalDeviceQueueFamilyProperties2KHR(physicalDevice, pQueueFamilyPropertyCount, pQueueFamilyProperties);
-    std::lock_guard<std::mutex> lock(global_lock);
+    std::lock_guard<ReadWriteLock> lock(global_lock);
     if (pQueueFamilyProperties != NULL) {
         layer_data *instance_data = GetLayerDataPtr(get_dispatch_key(physicalDevice), layer_data_map);
         if (instance_data->queue_family_properties.size() < *pQueueFamilyPropertyCount) {
@@ -1264,10 +1463,11 @@ VKAPI_ATTR void VKAPI_CALL GetPhysicalDeviceQueueFamilyProperties2KHR(VkPhysical
 VKAPI_ATTR VkResult VKAPI_CALL GetPhysicalDeviceDisplayPropertiesKHR(VkPhysicalDevice physicalDevice, uint32_t *pPropertyCount,
                                                                      VkDisplayPropertiesKHR *pProperties) {
     bool skip = false;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(physicalDevice, physicalDevice, kVulkanObjectTypePhysicalDevice, false, VALIDATION_ERROR_2b827a01,
-                           VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |= ValidateObject(physicalDevice, physicalDevice, kVulkanObjectTypePhysicalDevice, false, VALIDATION_ERROR_2b827a01,
+                               VALIDATION_ERROR_UNDEFINED);
+    }
 
     if (skip) {
         return VK_ERROR_VALIDATION_FAILED_EXT;
@@ -1275,7 +1475,7 @@ VKAPI_ATTR VkResult VKAPI_CALL GetPhysicalDeviceDisplayPropertiesKHR(VkPhysicalD
     VkResult result = get_dispatch_table(ot_instance_table_map, physicalDevice)
                           ->GetPhysicalDeviceDisplayPropertiesKHR(physicalDevice, pPropertyCount, pProperties);
 
-    lock.lock();
+    std::unique_lock<ReadWriteLock> lock(global_lock);
     if (result == VK_SUCCESS) {
         if (pProperties) {
             for (uint32_t i = 0; i < *pPropertyCount; ++i) {
@@ -1291,12 +1491,13 @@ VKAPI_ATTR VkResult VKAPI_CALL GetPhysicalDeviceDisplayPropertiesKHR(VkPhysicalD
 VKAPI_ATTR VkResult VKAPI_CALL GetDisplayModePropertiesKHR(VkPhysicalDevice physicalDevice, VkDisplayKHR display,
                                                            uint32_t *pPropertyCount, VkDisplayModePropertiesKHR *pProperties) {
     bool skip = false;
-    std::unique_lock<std::mutex> lock(global_lock);
-    skip |= ValidateObject(physicalDevice, physicalDevice, kVulkanObjectTypePhysicalDevice, false, VALIDATION_ERROR_29827a01,
-                           VALIDATION_ERROR_UNDEFINED);
-    skip |= ValidateObject(physicalDevice, display, kVulkanObjectTypeDisplayKHR, false, VALIDATION_ERROR_29806001,
-                           VALIDATION_ERROR_UNDEFINED);
-    lock.unlock();
+    {
+        ReadLockGuard lock(global_lock);
+        skip |= ValidateObject(physicalDevice, physicalDevice, kVulkanObjectTypePhysicalDevice, false, VALIDATION_ERROR_29827a01,
+                               VALIDATION_ERROR_UNDEFINED);
+        skip |= ValidateObject(physicalDevice, display, kVulkanObjectTypeDisplayKHR, false, VALIDATION_ERROR_29806001,
+                               VALIDATION_ERROR_UNDEFINED);
+    }
 
     if (skip) {
         return VK_ERROR_VALIDATION_FAILED_EXT;
@@ -1304,7 +1505,7 @@ VKAPI_ATTR VkResult VKAPI_CALL GetDisplayModePropertiesKHR(VkPhysicalDevice phys
     VkResult result = get_dispatch_table(ot_instance_table_map, physicalDevice)
                           ->GetDisplayModePropertiesKHR(physicalDevice, display, pPropertyCount, pProperties);
 
-    lock.lock();
+    std::unique_lock<ReadWriteLock> lock(global_lock);
     if (result == VK_SUCCESS) {
         if (pProperties) {
             for (uint32_t i = 0; i < *pPropertyCount; ++i) {
@@ -1319,7 +1520,7 @@ VKAPI_ATTR VkResult VKAPI_CALL GetDisplayModePropertiesKHR(VkPhysicalDevice phys
 
 VKAPI_ATTR VkResult VKAPI_CALL DebugMarkerSetObjectNameEXT(VkDevice device, const VkDebugMarkerObjectNameInfoEXT *pNameInfo) {
     bool skip = VK_FALSE;
-    std::unique_lock<std::mutex> lock(global_lock);
+    std::unique_lock<ReadWriteLock> lock(global_lock);
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     if (pNameInfo->pObjectName) {
         dev_data->report_data->debugObjectNameMap->insert(
@@ -19,6 +19,7 @@
 #define PARAMETER_NAME_H
 
 #include <cassert>
+#include <initializer_list>
 #include <sstream>
 #include <string>
 #include <vector>
@@ -43,12 +44,45 @@
  */
 class ParameterName {
    public:
-    /// Container for index values to be used with parameter name string formatting.
-    typedef std::vector<size_t> IndexVector;
+    /**
+     * Container for index values to be used with parameter name string formatting.
+     *
+     * The index values are stored inline rather than in a heap allocated vector, so that constructing a ParameterName for a
+     * value that passes validation costs no allocation.
+     */
+    class IndexVector {
+       public:
+        IndexVector() : size_(0) { Clear(0); }
+
+        IndexVector(std::initializer_list<size_t> indices) : size_(0) {
+            assert(indices.size() <= MaxIndices);
+            for (size_t index : indices) {
+                if (size_ == MaxIndices) {
+                    break;
+                }
+                values_[size_++] = index;
+            }
+            Clear(size_);
+        }
 
-    /// Format specifier for the parameter name string, to be replaced by an index value.  The parameter name string must contain
-    /// one format specifier for each index value specified.
-    const std::string IndexFormatSpecifier = "%i";
+        bool empty() const { return size_ == 0; }
+        size_t size() const { return size_; }
+        const size_t *begin() const { return values_; }
+        const size_t *end() const { return values_ + size_; }
+
+       private:
+        /// Deepest nesting of array subscripts in a parameter name.
+        enum { MaxIndices = 4 };
+
+        void Clear(size_t first) {
+            for (size_t i = first; i < MaxIndices; ++i) {
+                values_[i] = 0;
+            }
+        }
+
+        size_t values_[MaxIndices];
+        size_t size_;
+    };
 
    public:
     /**
@@ -56,9 +90,9 @@ class ParameterName {
      *
      * @param source Paramater name string without format specifiers.
      *
-     * @pre The source string must not contain the %i format specifier.
+     * @pre The source string must not contain the %i format specifier, and must outlive the ParameterName object.
      */
-    ParameterName(const char *source) : source_(source) { assert(IsValid()); }
+    ParameterName(const char *source) : parent_(nullptr), literal_(source) { assert(IsValid()); }
 
     /**
      * Construct a ParameterName object from a std::string object, without formatting.
@@ -67,7 +101,7 @@ class ParameterName {
      *
      * @pre The source string must not contain the %i format specifier.
      */
-    ParameterName(const std::string &source) : source_(source) { assert(IsValid()); }
+    ParameterName(const std::string &source) : parent_(nullptr), literal_(nullptr), owned_(source) { assert(IsValid()); }
 
     /**
      * Construct a ParameterName object from a std::string object, without formatting.
@@ -76,18 +110,22 @@ class ParameterName {
      *
      * @pre The source string must not contain the %i format specifier.
      */
-    ParameterName(const std::string &&source) : source_(std::move(source)) { assert(IsValid()); }
+    ParameterName(const std::string &&source) : parent_(nullptr), literal_(nullptr), owned_(std::move(source)) {
+        assert(IsValid());
+    }
 
     /**
-     * Construct a ParameterName object from a std::string object, with formatting.
+     * Construct a ParameterName object from a string literal, with formatting.
      *
      * @param source Paramater name string with format specifiers.
      * @param args Array index values to be used for formatting.
      *
      * @pre The number of %i format specifiers contained by the source string must match the number of elements contained
-     *      by the index vector.
+     *      by the index vector, and the source string must outlive the ParameterName object.
      */
-    ParameterName(const std::string &source, const IndexVector &args) : source_(source), args_(args) { assert(IsValid()); }
+    ParameterName(const char *source, const IndexVector &args) : parent_(nullptr), literal_(source), args_(args) {
+        assert(IsValid());
+    }
 
     /**
      * Construct a ParameterName object from a std::string object, with formatting.
@@ -98,51 +136,96 @@ class ParameterName {
      * @pre The number of %i format specifiers contained by the source string must match the number of elements contained
      *      by the index vector.
      */
-    ParameterName(const std::string &&source, const IndexVector &&args) : source_(std::move(source)), args_(std::move(args)) {
+    ParameterName(const std::string &source, const IndexVector &args)
+        : parent_(nullptr), literal_(nullptr), owned_(source), args_(args) {
+        assert(IsValid());
+    }
+
+    /**
+     * Construct a ParameterName object naming a member of another parameter, without formatting.
+     *
+     * Used by the generated struct validation functions, which receive the name of the struct being validated and
+     * append member names to it.  The parent name is only formatted when get_name() is called.
+     *
+     * @param parent Name of the enclosing parameter, including the trailing member access operator.
+     * @param source Member name string literal without format specifiers.
+     *
+     * @pre The source string must not contain the %i format specifier, and parent and source must outlive the
+     *      ParameterName object.
+     */
+    ParameterName(const ParameterName &parent, const char *source) : parent_(&parent), literal_(source) { assert(IsValid()); }
+
+    /**
+     * Construct a ParameterName object naming a member of another parameter, with formatting.
+     *
+     * @param parent Name of the enclosing parameter, including the trailing member access operator.
+     * @param source Member name string literal with format specifiers.
+     * @param args Array index values to be used for formatting the member name.
+     *
+     * @pre The number of %i format specifiers contained by the source string must match the number of elements contained
+     *      by the index vector, and parent and source must outlive the ParameterName object.
+     */
+    ParameterName(const ParameterName &parent, const char *source, const IndexVector &args)
+        : parent_(&parent), literal_(source), args_(args) {
         assert(IsValid());
     }
 
     /// Retrive the formatted name string.
-    std::string get_name() const { return (args_.empty()) ? source_ : Format(); }
+    std::string get_name() const {
+        std::string name = (args_.empty()) ? Source() : Format();
+        return parent_ ? parent_->get_name() + name : name;
+    }
 
    private:
+    /// Format specifier for the parameter name string, to be replaced by an index value.  The parameter name string must contain
+    /// one format specifier for each index value specified.
+    static const char *IndexFormatSpecifier() { return "%i"; }
+
+    /// Retrieve the unformatted source string.
+    std::string Source() const { return literal_ ? std::string(literal_) : owned_; }
+
     /// Replace the %i format specifiers in the source string with the values from the index vector.
     std::string Format() const {
+        const std::string source = Source();
+        const std::string specifier = IndexFormatSpecifier();
         std::string::size_type current = 0;
         std::string::size_type last = 0;
         std::stringstream format;
 
         for (size_t index : args_) {
-            current = source_.find(IndexFormatSpecifier, last);
+            current = source.find(specifier, last);
             if (current == std::string::npos) {
                 break;
             }
-            format << source_.substr(last, (current - last)) << index;
-            last = current + IndexFormatSpecifier.length();
+            format << source.substr(last, (current - last)) << index;
+            last = current + specifier.length();
         }
 
-        format << source_.substr(last, std::string::npos);
+        format << source.substr(last, std::string::npos);
 
         return format.str();
     }
 
     /// Check that the number of %i format specifiers in the source string matches the number of elements in the index vector.
-    bool IsValid() {
+    bool IsValid() const {
         // Count the number of occurances of the format specifier
+        const std::string source = Source();
         uint32_t count = 0;
-        std::string::size_type pos = source_.find(IndexFormatSpecifier);
+        std::string::size_type pos = source.find(IndexFormatSpecifier());
 
         while (pos != std::string::npos) {
             ++count;
-            pos = source_.find(IndexFormatSpecifier, pos + 1);
+            pos = source.find(IndexFormatSpecifier(), pos + 1);
         }
 
         return (count == args_.size());
     }
 
    private:
-    std::string source_;  ///< Format string.
-    IndexVector args_;    ///< Array index values for formatting.
+    const ParameterName *parent_;  ///< Name of the enclosing parameter, or nullptr for a complete name.
+    const char *literal_;          ///< Format string literal, or nullptr when the format string is owned.
+    std::string owned_;            ///< Format string copied from a std::string.
+    IndexVector args_;             ///< Array index values for formatting.
 };
 
 #endif  // PARAMETER_NAME_H
@@ -49,13 +49,16 @@ extern const VkShaderStageFlags AllVkShaderStageFlagBits;
 extern const VkQueryControlFlags AllVkQueryControlFlagBits;
 extern const VkImageUsageFlags AllVkImageUsageFlagBits;
 
-extern const std::vector<VkCompareOp> AllVkCompareOpEnums;
-extern const std::vector<VkStencilOp> AllVkStencilOpEnums;
-extern const std::vector<VkBlendFactor> AllVkBlendFactorEnums;
-extern const std::vector<VkBlendOp> AllVkBlendOpEnums;
-extern const std::vector<VkLogicOp> AllVkLogicOpEnums;
-extern const std::vector<VkBorderColor> AllVkBorderColorEnums;
-extern const std::vector<VkImageLayout> AllVkImageLayoutEnums;
+bool IsValidVkCompareOp(VkCompareOp value);
+bool IsValidVkStencilOp(VkStencilOp value);
+bool IsValidVkBlendFactor(VkBlendFactor value);
+bool IsValidVkBlendOp(VkBlendOp value);
+bool IsValidVkLogicOp(VkLogicOp value);
+bool IsValidVkBorderColor(VkBorderColor value);
+bool IsValidVkImageLayout(VkImageLayout value);
+
+int AllowedPNextIndex_VkPipelineViewportStateCreateInfo(VkStructureType s_type);
+int AllowedPNextIndex_VkPipelineMultisampleStateCreateInfo(VkStructureType s_type);
 
 struct instance_layer_data {
     VkInstance instance = VK_NULL_HANDLE;
@@ -522,6 +525,36 @@ static bool validate_string_array(debug_report_data *report_data, const char *ap
     return skip_call;
 }
 
+/**
+ * Scan the start of a pNext chain for a structure.
+ *
+ * Check the first count elements of the chain for the specified element
+ * itself, which indicates a cycle, and for another structure with the same
+ * type, which indicates a duplicate.
+ *
+ * @param next Pointer to the head of the pNext chain.
+ * @param count Number of chain elements to scan.
+ * @param element Structure to search for.
+ * @param revisited Set to true if element is one of the scanned elements.
+ * @param duplicate Set to true if a scanned element has the same type as element.
+ */
+static void scan_pnext_chain(const void *next, uint32_t count, const GenericHeader *element, bool *revisited, bool *duplicate) {
+    const GenericHeader *current = reinterpret_cast<const GenericHeader *>(next);
+
+    for (uint32_t i = 0; i < count; ++i) {
+        if (current == element) {
+            *revisited = true;
+            return;
+        }
+
+        if (current->sType == element->sType) {
+            *duplicate = true;
+        }
+
+        current = reinterpret_cast<const GenericHeader *>(current->pNext);
+    }
+}
+
 /**
  * Validate a structure's pNext member.
  *
@@ -529,67 +562,75 @@ static bool validate_string_array(debug_report_data *report_data, const char *ap
  * allowed extension structures.  If no extension structures are allowed,
  * verify that pNext is null.
  *
+ * Allowed structure types are identified by their position in the allowed
+ * list, so the types seen so far are tracked in a bit mask while the chain
+ * is walked once.  The chain walked so far is only rescanned for structures
+ * with a disallowed or repeated type, to tell a cycle from a duplicate.
+ *
  * @param report_data debug_report_data object for routing validation messages.
  * @param api_name Name of API call being validated.
  * @param parameter_name Name of parameter being validated.
  * @param allowed_struct_names Names of allowed structs.
  * @param next Pointer to validate.
- * @param allowed_type_count Total number of allowed structure types.
- * @param allowed_types Array of structure types allowed for pNext.
+ * @param allowed_type_index Function returning the position of a structure type in the list of types allowed for pNext,
+ *                           or -1 if the type is not allowed.  NULL if no structure types are allowed.
  * @param header_version Version of header defining the pNext validation rules.
  * @return Boolean value indicating that the call should be skipped.
  */
 static bool validate_struct_pnext(debug_report_data *report_data, const char *api_name, const ParameterName &parameter_name,
-                                  const char *allowed_struct_names, const void *next, size_t allowed_type_count,
-                                  const VkStructureType *allowed_types, uint32_t header_version,
-                                  UNIQUE_VALIDATION_ERROR_CODE vuid) {
+                                  const char *allowed_struct_names, const void *next, int (*allowed_type_index)(VkStructureType),
+                                  uint32_t header_version, UNIQUE_VALIDATION_ERROR_CODE vuid) {
     bool skip_call = false;
-    std::unordered_set<const void *> cycle_check;
-    std::unordered_set<VkStructureType, std::hash<int>> unique_stype_check;
 
     const char disclaimer[] =
         "This warning is based on the Valid Usage documentation for version %d of the Vulkan header.  It is possible that you are "
         "using a struct from a private extension or an extension that was added to a later version of the Vulkan header, in which "
         "case your use of %s is perfectly valid but is not guaranteed to work correctly with validation enabled";
 
-    // TODO: The valid pNext structure types are not recursive. Each structure has its own list of valid sTypes for pNext.
-    // Codegen a map of vectors containing the allowable pNext types for each struct and use that here -- also simplifies parms.
     if (next != NULL) {
-        if (allowed_type_count == 0) {
+        if (allowed_type_index == NULL) {
             std::string message = "%s: value of %s must be NULL. ";
             message += disclaimer;
             skip_call |= log_msg(report_data, VK_DEBUG_REPORT_WARNING_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_UNKNOWN_EXT, 0, vuid,
                                  message.c_str(), api_name, parameter_name.get_name().c_str(), header_version,
                                  parameter_name.get_name().c_str());
         } else {
-            const VkStructureType *start = allowed_types;
-            const VkStructureType *end = allowed_types + allowed_type_count;
+            // Number of allowed structure types that fit in the seen_types mask
+            const int tracked_type_count = 64;
+            uint64_t seen_types = 0;
+            uint32_t position = 0;
             const GenericHeader *current = reinterpret_cast<const GenericHeader *>(next);
 
-            cycle_check.insert(next);
-
             while (current != NULL) {
-                if (cycle_check.find(current->pNext) != cycle_check.end()) {
-                    std::string message = "%s: %s chain contains a cycle -- pNext pointer " PRIx64 " is repeated.";
-                    skip_call |= log_msg(report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_UNKNOWN_EXT, 0,
-                                         INVALID_STRUCT_PNEXT, message.c_str(), api_name, parameter_name.get_name().c_str(),
-                                         reinterpret_cast<uint64_t>(next));
-                    break;
-                } else {
-                    cycle_check.insert(current->pNext);
+                const int index = allowed_type_index(current->sType);
+                const bool tracked = (index >= 0) && (index < tracked_type_count);
+                const uint64_t type_bit = tracked ? (static_cast<uint64_t>(1) << index) : 0;
+                bool duplicate = (seen_types & type_bit) != 0;
+
+                if (!tracked || duplicate) {
+                    bool revisited = false;
+                    scan_pnext_chain(next, position, current, &revisited, &duplicate);
+                    if (revisited) {
+                        std::string message = "%s: %s chain contains a cycle -- pNext pointer 0x%" PRIx64 " is repeated.";
+                        skip_call |= log_msg(report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_UNKNOWN_EXT, 0,
+                                             INVALID_STRUCT_PNEXT, message.c_str(), api_name, parameter_name.get_name().c_str(),
+                                             reinterpret_cast<uint64_t>(current));
+                        break;
+                    }
                 }
 
-                std::string type_name = string_VkStructureType(current->sType);
-                if (unique_stype_check.find(current->sType) != unique_stype_check.end()) {
+                seen_types |= type_bit;
+
+                if (duplicate) {
+                    std::string type_name = string_VkStructureType(current->sType);
                     std::string message = "%s: %s chain contains duplicate structure types: %s appears multiple times.";
                     skip_call |= log_msg(report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_UNKNOWN_EXT, 0,
                                          INVALID_STRUCT_PNEXT, message.c_str(), api_name, parameter_name.get_name().c_str(),
                                          type_name.c_str());
-                } else {
-                    unique_stype_check.insert(current->sType);
                 }
 
-                if (std::find(start, end, current->sType) == end) {
+                if (index < 0) {
+                    std::string type_name = string_VkStructureType(current->sType);
                     if (type_name == UnsupportedStructureTypeString) {
                         std::string message =
                             "%s: %s chain includes a structure with unknown VkStructureType (%d); Allowed structures are [%s]. ";
@@ -607,7 +648,9 @@ static bool validate_struct_pnext(debug_report_data *report_data, const char *ap
                                     allowed_struct_names, header_version, parameter_name.get_name().c_str());
                     }
                 }
+
                 current = reinterpret_cast<const GenericHeader *>(current->pNext);
+                ++position;
             }
         }
     }
@@ -653,16 +696,16 @@ static bool validate_bool32(debug_report_data *report_data, const char *apiName,
  * @param apiName Name of API call being validated.
  * @param parameterName Name of parameter being validated.
  * @param enumName Name of the enumeration being validated.
- * @param valid_values The list of valid values for the enumeration.
+ * @param is_valid Generated predicate accepting the valid values of the enumeration.
  * @param value Enumeration value to validate.
  * @return Boolean value indicating that the call should be skipped.
  */
 template <typename T>
 bool validate_ranged_enum(debug_report_data *report_data, const char *apiName, const ParameterName &parameterName,
-                          const char *enumName, const std::vector<T> &valid_values, T value, UNIQUE_VALIDATION_ERROR_CODE vuid) {
+                          const char *enumName, bool (*is_valid)(T), T value, UNIQUE_VALIDATION_ERROR_CODE vuid) {
     bool skip = false;
 
-    if (std::find(valid_values.begin(), valid_values.end(), value) == valid_values.end()) {
+    if (!is_valid(value)) {
         skip |= log_msg(report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_UNKNOWN_EXT, 0, vuid,
                         "%s: value of %s (%d) does not fall within the begin..end range of the core %s enumeration tokens and is "
                         "not an extension added token.",
@@ -687,7 +730,7 @@ bool validate_ranged_enum(debug_report_data *report_data, const char *apiName, c
  * @param countName Name of count parameter.
  * @param arrayName Name of array parameter.
  * @param enumName Name of the enumeration being validated.
- * @param valid_values The list of valid values for the enumeration.
+ * @param is_valid Generated predicate accepting the valid values of the enumeration.
  * @param count Number of enumeration values in the array.
  * @param array Array of enumeration values to validate.
  * @param countRequired The 'count' parameter may not be 0 when true.
@@ -696,8 +739,8 @@ bool validate_ranged_enum(debug_report_data *report_data, const char *apiName, c
  */
 template <typename T>
 static bool validate_ranged_enum_array(debug_report_data *report_data, const char *apiName, const ParameterName &countName,
-                                       const ParameterName &arrayName, const char *enumName, const std::vector<T> &valid_values,
-                                       uint32_t count, const T *array, bool countRequired, bool arrayRequired) {
+                                       const ParameterName &arrayName, const char *enumName, bool (*is_valid)(T), uint32_t count,
+                                       const T *array, bool countRequired, bool arrayRequired) {
     bool skip_call = false;
 
     if ((count == 0) || (array == NULL)) {
@@ -705,7 +748,7 @@ static bool validate_ranged_enum_array(debug_report_data *report_data, const cha
                                     VALIDATION_ERROR_UNDEFINED, VALIDATION_ERROR_UNDEFINED);
     } else {
         for (uint32_t i = 0; i < count; ++i) {
-            if (std::find(valid_values.begin(), valid_values.end(), array[i]) == valid_values.end()) {
+            if (!is_valid(array[i])) {
                 skip_call |= log_msg(report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_UNKNOWN_EXT, 0,
                                      UNRECOGNIZED_VALUE,
                                      "%s: value of %s[%d] (%d) does not fall within the begin..end range of the core %s "
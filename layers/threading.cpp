@@ -21,6 +21,8 @@
 #include <string.h>
 #include <unordered_map>
 #include <list>
+#include <sstream>
+#include <string>
 
 #define VALIDATION_ERROR_MAP_IMPL
 
@@ -43,9 +45,99 @@ namespace threading {
 
 static uint32_t loader_layer_if_version = CURRENT_LOADER_LAYER_INTERFACE_VERSION;
 
+// File the telemetry summary is appended to.  If empty, the summary is logged through the debug callbacks.
+static std::string telemetry_filename;
+
 static void initThreading(layer_data *my_data, const VkAllocationCallbacks *pAllocator) {
     layer_debug_report_actions(my_data->report_data, my_data->logging_callback, pAllocator, "google_threading");
     layer_debug_messenger_actions(my_data->report_data, my_data->logging_messenger, pAllocator, "google_threading");
+
+    const char *sample_rate_option = getLayerOption("google_threading.sample_rate");
+    if (*sample_rate_option) {
+        uint32_t rate = static_cast<uint32_t>(strtoul(sample_rate_option, nullptr, 10));
+        sample_rate = (rate > 0) ? rate : 1;
+    }
+
+    telemetry_enabled = (strcmp(getLayerOption("google_threading.telemetry"), "true") == 0);
+    telemetry_filename = getLayerOption("google_threading.telemetry_file");
+}
+
+template <typename T>
+static void ReportCounterTelemetry(std::ostringstream &json, const char *&separator, counter<T> &c) {
+    uint64_t lock_wait_time_ns = c.lock_wait_time_ns.load();
+    uint64_t object_wait_time_ns = c.object_wait_time_ns.load();
+    uint64_t object_wait_count = c.object_wait_count.load();
+    uint64_t collision_count = c.collision_count.load();
+    if ((lock_wait_time_ns == 0) && (object_wait_time_ns == 0) && (object_wait_count == 0) && (collision_count == 0)) {
+        return;
+    }
+    json << separator << "\n    \"" << c.typeName << "\": {\"lock_wait_ns\": " << lock_wait_time_ns
+         << ", \"object_wait_ns\": " << object_wait_time_ns << ", \"object_waits\": " << object_wait_count
+         << ", \"collisions\": " << collision_count << "}";
+    separator = ",";
+}
+
+// Summarize the device's call counts and per-handle-type contention as JSON, either to the telemetry file or the debug callbacks
+static void ReportTelemetry(layer_data *dev_data, VkDevice device) {
+    std::ostringstream json;
+    json << "{\n  \"device\": \"0x" << std::hex << HandleToUint64(device) << std::dec << "\",\n  \"commands\": {";
+    const char *separator = "";
+    for (uint32_t index = 0; index < command_count; index++) {
+        uint64_t calls = dev_data->command_call_counts[index].load();
+        if (calls > 0) {
+            json << separator << "\n    \"" << command_names[index] << "\": " << calls;
+            separator = ",";
+        }
+    }
+    json << "\n  },\n  \"handle_types\": {";
+    separator = "";
+    ReportCounterTelemetry(json, separator, dev_data->c_VkCommandBuffer);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkDevice);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkQueue);
+#ifdef DISTINCT_NONDISPATCHABLE_HANDLES
+    ReportCounterTelemetry(json, separator, dev_data->c_VkBuffer);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkBufferView);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkCommandPool);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkDescriptorPool);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkDescriptorSet);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkDescriptorSetLayout);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkDeviceMemory);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkEvent);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkFence);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkFramebuffer);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkImage);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkImageView);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkPipeline);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkPipelineCache);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkPipelineLayout);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkQueryPool);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkRenderPass);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkSampler);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkSemaphore);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkShaderModule);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkObjectTableNVX);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkIndirectCommandsLayoutNVX);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkDisplayKHR);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkDisplayModeKHR);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkSwapchainKHR);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkDescriptorUpdateTemplateKHR);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkValidationCacheEXT);
+    ReportCounterTelemetry(json, separator, dev_data->c_VkSamplerYcbcrConversionKHR);
+#else   // DISTINCT_NONDISPATCHABLE_HANDLES
+    ReportCounterTelemetry(json, separator, dev_data->c_uint64_t);
+#endif  // DISTINCT_NONDISPATCHABLE_HANDLES
+    json << "\n  }\n}\n";
+
+    if (telemetry_filename.empty()) {
+        log_msg(dev_data->report_data, VK_DEBUG_REPORT_INFORMATION_BIT_EXT, VK_DEBUG_REPORT_OBJECT_TYPE_DEVICE_EXT,
+                HandleToUint64(device), THREADING_CHECKER_NONE, "THREADING TELEMETRY : %s", json.str().c_str());
+    } else {
+        FILE *telemetry_file = fopen(telemetry_filename.c_str(), "a");
+        if (telemetry_file) {
+            fputs(json.str().c_str(), telemetry_file);
+            fclose(telemetry_file);
+        }
+    }
 }
 
 VKAPI_ATTR VkResult VKAPI_CALL CreateInstance(const VkInstanceCreateInfo *pCreateInfo, const VkAllocationCallbacks *pAllocator,
@@ -173,6 +265,9 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateDevice(VkPhysicalDevice gpu, const VkDevice
     layer_init_device_dispatch_table(*pDevice, my_device_data->device_dispatch_table, fpGetDeviceProcAddr);
 
     my_device_data->report_data = layer_debug_utils_create_device(my_instance_data->report_data, *pDevice);
+    if (telemetry_enabled) {
+        my_device_data->command_call_counts.reset(new std::atomic<uint64_t>[command_count]());
+    }
     return result;
 }
 
@@ -190,6 +285,10 @@ VKAPI_ATTR void VKAPI_CALL DestroyDevice(VkDevice device, const VkAllocationCall
         finishMultiThread();
     }
 
+    if (telemetry_enabled) {
+        ReportTelemetry(dev_data, device);
+    }
+
     delete dev_data->device_dispatch_table;
     FreeLayerDataPtr(key, layer_data_map);
 }
@@ -403,11 +502,10 @@ VKAPI_ATTR VkResult VKAPI_CALL AllocateCommandBuffers(VkDevice device, const VkC
         finishMultiThread();
     }
 
-    // Record mapping from command buffer to command pool
+    // Record the owning command pool in each command buffer's counter record
     if (VK_SUCCESS == result) {
         for (uint32_t index = 0; index < pAllocateInfo->commandBufferCount; index++) {
-            std::lock_guard<std::mutex> lock(command_pool_lock);
-            command_pool_map[pCommandBuffers[index]] = pAllocateInfo->commandPool;
+            my_data->c_VkCommandBuffer.setPool(pCommandBuffers[index], pAllocateInfo->commandPool);
         }
     }
 
@@ -454,8 +552,7 @@ VKAPI_ATTR void VKAPI_CALL FreeCommandBuffers(VkDevice device, VkCommandPool com
         // These updates need to be done before calling down to the driver.
         for (uint32_t index = 0; index < commandBufferCount; index++) {
             finishWriteObject(my_data, pCommandBuffers[index], lockCommandPool);
-            std::lock_guard<std::mutex> lock(command_pool_lock);
-            command_pool_map.erase(pCommandBuffers[index]);
+            my_data->c_VkCommandBuffer.erasePool(pCommandBuffers[index]);
         }
     }
 
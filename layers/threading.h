@@ -20,7 +20,10 @@
 
 #ifndef THREADING_H
 #define THREADING_H
+#include <atomic>
+#include <chrono>
 #include <condition_variable>
+#include <memory>
 #include <mutex>
 #include <vector>
 #include "vk_layer_config.h"
@@ -55,6 +58,13 @@ struct object_use_data {
     int writer_count;
 };
 
+// Threads waiting for a single object to become free
+struct object_wait_queue {
+    std::condition_variable condition;
+    uint32_t waiter_count;
+    object_wait_queue() : waiter_count(0) {}
+};
+
 struct layer_data;
 
 namespace threading {
@@ -75,6 +85,26 @@ inline bool startMultiThread() {
 
 // finishing check if an application is using vulkan from multiple threads.
 inline void finishMultiThread() { vulkan_in_use = false; }
+
+// When greater than one, the generated intercepts only track object use on 1 in sample_rate
+// calls of each command.  Set from google_threading.sample_rate in vk_layer_settings.txt.
+uint32_t sample_rate = 1;
+// check if this call should track object use.  sample_count is a per-thread call counter
+// kept separately for each command.
+inline bool sampleThreadUse(uint32_t *sample_count) {
+    if (sample_rate <= 1) {
+        return true;
+    }
+    if (++(*sample_count) < sample_rate) {
+        return false;
+    }
+    *sample_count = 0;
+    return true;
+}
+
+// When set, call counts, lock wait times and collisions are gathered and summarized at
+// vkDestroyDevice.  Set from google_threading.telemetry in vk_layer_settings.txt.
+bool telemetry_enabled = false;
 }  // namespace threading
 
 template <typename T>
@@ -84,14 +114,66 @@ class counter {
     VkDebugReportObjectTypeEXT objectType;
     std::unordered_map<T, object_use_data> uses;
     std::mutex counter_lock;
-    std::condition_variable counter_condition;
+    // Wait queues keyed by object, so releasing an object only wakes the threads waiting for it
+    std::unordered_map<T, object_wait_queue> waiters;
+    // Telemetry for this handle type.  Wait times are only measured when telemetry is enabled.
+    std::atomic<uint64_t> lock_wait_time_ns;
+    std::atomic<uint64_t> object_wait_time_ns;
+    std::atomic<uint64_t> object_wait_count;
+    std::atomic<uint64_t> collision_count;
+
+    // Acquire counter_lock, accumulating the time spent blocked on it.
+    std::unique_lock<std::mutex> lockCounter() {
+        std::unique_lock<std::mutex> lock(counter_lock, std::defer_lock);
+        if (threading::telemetry_enabled && !lock.try_lock()) {
+            auto start = std::chrono::steady_clock::now();
+            lock.lock();
+            lock_wait_time_ns +=
+                std::chrono::duration_cast<std::chrono::nanoseconds>(std::chrono::steady_clock::now() - start).count();
+        } else if (!lock.owns_lock()) {
+            lock.lock();
+        }
+        return lock;
+    }
+
+    // Block until there is no current use of the object.  Each call that blocks counts as one wait, however
+    // many times the thread is woken before the object becomes free.
+    void waitForObject(std::unique_lock<std::mutex> &lock, T object) {
+        if (uses.find(object) == uses.end()) {
+            return;
+        }
+        object_wait_count++;
+        auto start = threading::telemetry_enabled ? std::chrono::steady_clock::now() : std::chrono::steady_clock::time_point();
+        object_wait_queue &queue = waiters[object];
+        queue.waiter_count++;
+        while (uses.find(object) != uses.end()) {
+            queue.condition.wait(lock);
+        }
+        queue.waiter_count--;
+        if (queue.waiter_count == 0) {
+            waiters.erase(object);
+        }
+        if (threading::telemetry_enabled) {
+            object_wait_time_ns +=
+                std::chrono::duration_cast<std::chrono::nanoseconds>(std::chrono::steady_clock::now() - start).count();
+        }
+    }
+
+    // Wake the threads waiting for an object which is no longer in use.  Must be called with counter_lock held.
+    void notifyWaiters(T object) {
+        auto queue = waiters.find(object);
+        if (queue != waiters.end()) {
+            queue->second.condition.notify_all();
+        }
+    }
+
     void startWrite(debug_report_data *report_data, T object) {
         if (object == VK_NULL_HANDLE) {
             return;
         }
         bool skipCall = false;
         loader_platform_thread_id tid = loader_platform_get_thread_id();
-        std::unique_lock<std::mutex> lock(counter_lock);
+        std::unique_lock<std::mutex> lock = lockCounter();
         if (uses.find(object) == uses.end()) {
             // There is no current use of the object.  Record writer thread.
             struct object_use_data *use_data = &uses[object];
@@ -103,6 +185,7 @@ class counter {
             if (use_data->reader_count == 0) {
                 // There are no readers.  Two writers just collided.
                 if (use_data->thread != tid) {
+                    collision_count++;
                     skipCall |= log_msg(report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, objectType, (uint64_t)(object),
                                         THREADING_CHECKER_MULTIPLE_THREADS,
                                         "THREADING ERROR : object of type %s is simultaneously used in "
@@ -110,9 +193,7 @@ class counter {
                                         typeName, (uint64_t)use_data->thread, (uint64_t)tid);
                     if (skipCall) {
                         // Wait for thread-safe access to object instead of skipping call.
-                        while (uses.find(object) != uses.end()) {
-                            counter_condition.wait(lock);
-                        }
+                        waitForObject(lock, object);
                         // There is now no current use of the object.  Record writer thread.
                         struct object_use_data *new_use_data = &uses[object];
                         new_use_data->thread = tid;
@@ -131,6 +212,7 @@ class counter {
             } else {
                 // There are readers.  This writer collided with them.
                 if (use_data->thread != tid) {
+                    collision_count++;
                     skipCall |= log_msg(report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, objectType, (uint64_t)(object),
                                         THREADING_CHECKER_MULTIPLE_THREADS,
                                         "THREADING ERROR : object of type %s is simultaneously used in "
@@ -138,9 +220,7 @@ class counter {
                                         typeName, (uint64_t)use_data->thread, (uint64_t)tid);
                     if (skipCall) {
                         // Wait for thread-safe access to object instead of skipping call.
-                        while (uses.find(object) != uses.end()) {
-                            counter_condition.wait(lock);
-                        }
+                        waitForObject(lock, object);
                         // There is now no current use of the object.  Record writer thread.
                         struct object_use_data *new_use_data = &uses[object];
                         new_use_data->thread = tid;
@@ -164,15 +244,19 @@ class counter {
         if (object == VK_NULL_HANDLE) {
             return;
         }
+        std::unique_lock<std::mutex> lock = lockCounter();
+        finishWriteLocked(object);
+    }
+
+    // Record the end of a write.  Must be called with counter_lock held.
+    void finishWriteLocked(T object) {
         // Object is no longer in use
-        std::unique_lock<std::mutex> lock(counter_lock);
         uses[object].writer_count -= 1;
         if ((uses[object].reader_count == 0) && (uses[object].writer_count == 0)) {
             uses.erase(object);
+            // Notify any threads waiting for this object that it is safe to use
+            notifyWaiters(object);
         }
-        // Notify any waiting threads that this object may be safe to use
-        lock.unlock();
-        counter_condition.notify_all();
     }
 
     void startRead(debug_report_data *report_data, T object) {
@@ -181,7 +265,7 @@ class counter {
         }
         bool skipCall = false;
         loader_platform_thread_id tid = loader_platform_get_thread_id();
-        std::unique_lock<std::mutex> lock(counter_lock);
+        std::unique_lock<std::mutex> lock = lockCounter();
         if (uses.find(object) == uses.end()) {
             // There is no current use of the object.  Record reader count
             struct object_use_data *use_data = &uses[object];
@@ -190,6 +274,7 @@ class counter {
             use_data->thread = tid;
         } else if (uses[object].writer_count > 0 && uses[object].thread != tid) {
             // There is a writer of the object.
+            collision_count++;
             skipCall |= log_msg(report_data, VK_DEBUG_REPORT_ERROR_BIT_EXT, objectType, (uint64_t)(object),
                                 THREADING_CHECKER_MULTIPLE_THREADS,
                                 "THREADING ERROR : object of type %s is simultaneously used in "
@@ -197,9 +282,7 @@ class counter {
                                 typeName, (uint64_t)uses[object].thread, (uint64_t)tid);
             if (skipCall) {
                 // Wait for thread-safe access to object instead of skipping call.
-                while (uses.find(object) != uses.end()) {
-                    counter_condition.wait(lock);
-                }
+                waitForObject(lock, object);
                 // There is no current use of the object.  Record reader count
                 struct object_use_data *use_data = &uses[object];
                 use_data->reader_count = 1;
@@ -217,21 +300,75 @@ class counter {
         if (object == VK_NULL_HANDLE) {
             return;
         }
-        std::unique_lock<std::mutex> lock(counter_lock);
+        std::unique_lock<std::mutex> lock = lockCounter();
+        finishReadLocked(object);
+    }
+
+    // Record the end of a read.  Must be called with counter_lock held.
+    void finishReadLocked(T object) {
         uses[object].reader_count -= 1;
         if ((uses[object].reader_count == 0) && (uses[object].writer_count == 0)) {
             uses.erase(object);
+            // Notify any threads waiting for this object that it is safe to use
+            notifyWaiters(object);
         }
-        // Notify any waiting threads that this object may be safe to use
-        lock.unlock();
-        counter_condition.notify_all();
     }
-    counter(const char *name = "", VkDebugReportObjectTypeEXT type = VK_DEBUG_REPORT_OBJECT_TYPE_UNKNOWN_EXT) {
+    counter(const char *name = "", VkDebugReportObjectTypeEXT type = VK_DEBUG_REPORT_OBJECT_TYPE_UNKNOWN_EXT)
+        : lock_wait_time_ns(0), object_wait_time_ns(0), object_wait_count(0), collision_count(0) {
         typeName = name;
         objectType = type;
     }
 };
 
+// Command buffers carry an implicit use of their command pool.  The owning pool is recorded
+// here when the command buffer is allocated, and found under this counter's own lock rather
+// than through a layer-wide command buffer to pool map.  The pool's use must be recorded before
+// the command buffer's, and counter_lock cannot be held while that may wait, so starting a use
+// looks the pool up separately.  Finishing a use finds it under the same counter_lock acquisition.
+class command_buffer_counter : public counter<VkCommandBuffer> {
+   public:
+    std::unordered_map<VkCommandBuffer, VkCommandPool> pools;
+    VkCommandPool getPool(VkCommandBuffer object) {
+        std::lock_guard<std::mutex> lock(counter_lock);
+        return findPool(object);
+    }
+    // Finish a write of the command buffer, returning its pool
+    VkCommandPool finishWriteGetPool(VkCommandBuffer object) {
+        if (object == VK_NULL_HANDLE) {
+            return VK_NULL_HANDLE;
+        }
+        std::unique_lock<std::mutex> lock = lockCounter();
+        finishWriteLocked(object);
+        return findPool(object);
+    }
+    // Finish a read of the command buffer, returning its pool
+    VkCommandPool finishReadGetPool(VkCommandBuffer object) {
+        if (object == VK_NULL_HANDLE) {
+            return VK_NULL_HANDLE;
+        }
+        std::unique_lock<std::mutex> lock = lockCounter();
+        finishReadLocked(object);
+        return findPool(object);
+    }
+    void setPool(VkCommandBuffer object, VkCommandPool pool) {
+        std::lock_guard<std::mutex> lock(counter_lock);
+        pools[object] = pool;
+    }
+    void erasePool(VkCommandBuffer object) {
+        std::lock_guard<std::mutex> lock(counter_lock);
+        pools.erase(object);
+    }
+    command_buffer_counter(const char *name = "", VkDebugReportObjectTypeEXT type = VK_DEBUG_REPORT_OBJECT_TYPE_UNKNOWN_EXT)
+        : counter<VkCommandBuffer>(name, type) {}
+
+   private:
+    // Must be called with counter_lock held.
+    VkCommandPool findPool(VkCommandBuffer object) {
+        auto pool = pools.find(object);
+        return (pool == pools.end()) ? VK_NULL_HANDLE : pool->second;
+    }
+};
+
 struct layer_data {
     VkInstance instance;
 
@@ -250,7 +387,11 @@ struct layer_data {
     VkDebugUtilsMessengerCreateInfoEXT *tmp_messenger_create_infos;
     VkDebugUtilsMessengerEXT *tmp_debug_messengers;
 
-    counter<VkCommandBuffer> c_VkCommandBuffer;
+    // Calls made on this device or instance, indexed by the slot assigned to each command in thread_check.h.
+    // Only allocated for devices, and only when telemetry is enabled.
+    std::unique_ptr<std::atomic<uint64_t>[]> command_call_counts;
+
+    command_buffer_counter c_VkCommandBuffer;
     counter<VkDevice> c_VkDevice;
     counter<VkInstance> c_VkInstance;
     counter<VkQueue> c_VkQueue;
@@ -342,6 +483,14 @@ struct layer_data {
               {};
 };
 
+namespace threading {
+inline void countCall(layer_data *my_data, uint32_t command_index) {
+    if (telemetry_enabled && my_data->command_call_counts) {
+        my_data->command_call_counts[command_index].fetch_add(1, std::memory_order_relaxed);
+    }
+}
+}  // namespace threading
+
 #define WRAPPER(type)                                                                                                 \
     static void startWriteObject(struct layer_data *my_data, type object) {                                           \
         my_data->c_##type.startWrite(my_data->report_data, object);                                                   \
@@ -392,40 +541,30 @@ WRAPPER(uint64_t)
 #endif  // DISTINCT_NONDISPATCHABLE_HANDLES
 
 static std::unordered_map<void *, layer_data *> layer_data_map;
-static std::mutex command_pool_lock;
-static std::unordered_map<VkCommandBuffer, VkCommandPool> command_pool_map;
 
 // VkCommandBuffer needs check for implicit use of command pool
 static void startWriteObject(struct layer_data *my_data, VkCommandBuffer object, bool lockPool = true) {
     if (lockPool) {
-        std::unique_lock<std::mutex> lock(command_pool_lock);
-        VkCommandPool pool = command_pool_map[object];
-        lock.unlock();
+        VkCommandPool pool = my_data->c_VkCommandBuffer.getPool(object);
         startWriteObject(my_data, pool);
     }
     my_data->c_VkCommandBuffer.startWrite(my_data->report_data, object);
 }
 static void finishWriteObject(struct layer_data *my_data, VkCommandBuffer object, bool lockPool = true) {
-    my_data->c_VkCommandBuffer.finishWrite(object);
     if (lockPool) {
-        std::unique_lock<std::mutex> lock(command_pool_lock);
-        VkCommandPool pool = command_pool_map[object];
-        lock.unlock();
+        VkCommandPool pool = my_data->c_VkCommandBuffer.finishWriteGetPool(object);
         finishWriteObject(my_data, pool);
+    } else {
+        my_data->c_VkCommandBuffer.finishWrite(object);
     }
 }
 static void startReadObject(struct layer_data *my_data, VkCommandBuffer object) {
-    std::unique_lock<std::mutex> lock(command_pool_lock);
-    VkCommandPool pool = command_pool_map[object];
-    lock.unlock();
+    VkCommandPool pool = my_data->c_VkCommandBuffer.getPool(object);
     startReadObject(my_data, pool);
     my_data->c_VkCommandBuffer.startRead(my_data->report_data, object);
 }
 static void finishReadObject(struct layer_data *my_data, VkCommandBuffer object) {
-    my_data->c_VkCommandBuffer.finishRead(object);
-    std::unique_lock<std::mutex> lock(command_pool_lock);
-    VkCommandPool pool = command_pool_map[object];
-    lock.unlock();
+    VkCommandPool pool = my_data->c_VkCommandBuffer.finishReadGetPool(object);
     finishReadObject(my_data, pool);
 }
 #endif  // THREADING_H
@@ -63,6 +63,13 @@ static void initUniqueObjects(instance_layer_data *instance_data, const VkAlloca
     layer_debug_report_actions(instance_data->report_data, instance_data->logging_callback, pAllocator, "google_unique_objects");
     layer_debug_messenger_actions(instance_data->report_data, instance_data->logging_messenger, pAllocator,
                                   "google_unique_objects");
+
+    // The handle representation can only be chosen before the first handle is wrapped
+    static bool handle_mode_selected = false;
+    if (!handle_mode_selected) {
+        slab_handles_enabled = (strcmp(getLayerOption("google_unique_objects.slab_handles"), "true") == 0);
+        handle_mode_selected = true;
+    }
 }
 
 // Check enabled instance extensions against supported instance extension whitelist
@@ -220,6 +227,9 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateDevice(VkPhysicalDevice gpu, const VkDevice
     // Set gpu for this device in order to get at any objects mapped at instance level
     my_device_data->instance_data = my_instance_data;
 
+    // Devices in pass-through mode leave device-level handles unwrapped, which is fixed for the lifetime of the device
+    my_device_data->passthrough = (strcmp(getLayerOption("google_unique_objects.passthrough"), "true") == 0);
+
     return result;
 }
 
@@ -273,6 +283,13 @@ VKAPI_ATTR VkResult VKAPI_CALL EnumerateDeviceExtensionProperties(VkPhysicalDevi
 VKAPI_ATTR PFN_vkVoidFunction VKAPI_CALL GetDeviceProcAddr(VkDevice device, const char *funcName) {
     const auto item = name_to_funcptr_map.find(funcName);
     if (item != name_to_funcptr_map.end()) {
+        // Commands that only ever see device-level handles need no wrapping on pass-through devices
+        if (device && passthrough_device_commands.count(funcName)) {
+            layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
+            if (device_data->passthrough && device_data->dispatch_table.GetDeviceProcAddr) {
+                return device_data->dispatch_table.GetDeviceProcAddr(device, funcName);
+            }
+        }
         return reinterpret_cast<PFN_vkVoidFunction>(item->second);
     }
 
@@ -303,16 +320,18 @@ VKAPI_ATTR PFN_vkVoidFunction VKAPI_CALL GetPhysicalDeviceProcAddr(VkInstance in
     return disp_table->GetPhysicalDeviceProcAddr(instance, funcName);
 }
 
+// Pipeline create infos are shallow copied with only their handles replaced, so shader stage arrays and state blocks
+// are passed down as the application provided them instead of being deep copied on every pipeline creation.
 VKAPI_ATTR VkResult VKAPI_CALL CreateComputePipelines(VkDevice device, VkPipelineCache pipelineCache, uint32_t createInfoCount,
                                                       const VkComputePipelineCreateInfo *pCreateInfos,
                                                       const VkAllocationCallbacks *pAllocator, VkPipeline *pPipelines) {
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
-    safe_VkComputePipelineCreateInfo *local_pCreateInfos = NULL;
+    LocalCopyScope local_copy_scope;
+    VkComputePipelineCreateInfo *local_pCreateInfos = NULL;
     if (pCreateInfos) {
-        std::lock_guard<std::mutex> lock(global_lock);
-        local_pCreateInfos = new safe_VkComputePipelineCreateInfo[createInfoCount];
+        local_pCreateInfos = local_copy_scope.Allocate<VkComputePipelineCreateInfo>(createInfoCount);
         for (uint32_t idx0 = 0; idx0 < createInfoCount; ++idx0) {
-            local_pCreateInfos[idx0].initialize(&pCreateInfos[idx0]);
+            local_pCreateInfos[idx0] = pCreateInfos[idx0];
             if (pCreateInfos[idx0].basePipelineHandle) {
                 local_pCreateInfos[idx0].basePipelineHandle = Unwrap(pCreateInfos[idx0].basePipelineHandle);
             }
@@ -325,21 +344,12 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateComputePipelines(VkDevice device, VkPipelin
         }
     }
     if (pipelineCache) {
-        std::lock_guard<std::mutex> lock(global_lock);
         pipelineCache = Unwrap(pipelineCache);
     }
 
     VkResult result = device_data->dispatch_table.CreateComputePipelines(device, pipelineCache, createInfoCount,
-                                                                         local_pCreateInfos->ptr(), pAllocator, pPipelines);
-    delete[] local_pCreateInfos;
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        for (uint32_t i = 0; i < createInfoCount; ++i) {
-            if (pPipelines[i] != VK_NULL_HANDLE) {
-                pPipelines[i] = WrapNew(pPipelines[i]);
-            }
-        }
-    }
+                                                                         local_pCreateInfos, pAllocator, pPipelines);
+    WrapNewArray(pPipelines, createInfoCount);
     return result;
 }
 
@@ -347,26 +357,12 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateGraphicsPipelines(VkDevice device, VkPipeli
                                                        const VkGraphicsPipelineCreateInfo *pCreateInfos,
                                                        const VkAllocationCallbacks *pAllocator, VkPipeline *pPipelines) {
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
-    safe_VkGraphicsPipelineCreateInfo *local_pCreateInfos = nullptr;
+    LocalCopyScope local_copy_scope;
+    VkGraphicsPipelineCreateInfo *local_pCreateInfos = NULL;
     if (pCreateInfos) {
-        local_pCreateInfos = new safe_VkGraphicsPipelineCreateInfo[createInfoCount];
-        std::lock_guard<std::mutex> lock(global_lock);
+        local_pCreateInfos = local_copy_scope.Allocate<VkGraphicsPipelineCreateInfo>(createInfoCount);
         for (uint32_t idx0 = 0; idx0 < createInfoCount; ++idx0) {
-            bool uses_color_attachment = false;
-            bool uses_depthstencil_attachment = false;
-            {
-                const auto subpasses_uses_it = device_data->renderpasses_states.find(Unwrap(pCreateInfos[idx0].renderPass));
-                if (subpasses_uses_it != device_data->renderpasses_states.end()) {
-                    const auto &subpasses_uses = subpasses_uses_it->second;
-                    if (subpasses_uses.subpasses_using_color_attachment.count(pCreateInfos[idx0].subpass))
-                        uses_color_attachment = true;
-                    if (subpasses_uses.subpasses_using_depthstencil_attachment.count(pCreateInfos[idx0].subpass))
-                        uses_depthstencil_attachment = true;
-                }
-            }
-
-            local_pCreateInfos[idx0].initialize(&pCreateInfos[idx0], uses_color_attachment, uses_depthstencil_attachment);
-
+            local_pCreateInfos[idx0] = pCreateInfos[idx0];
             if (pCreateInfos[idx0].basePipelineHandle) {
                 local_pCreateInfos[idx0].basePipelineHandle = Unwrap(pCreateInfos[idx0].basePipelineHandle);
             }
@@ -374,11 +370,15 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateGraphicsPipelines(VkDevice device, VkPipeli
                 local_pCreateInfos[idx0].layout = Unwrap(pCreateInfos[idx0].layout);
             }
             if (pCreateInfos[idx0].pStages) {
+                VkPipelineShaderStageCreateInfo *local_pStages =
+                    local_copy_scope.Allocate<VkPipelineShaderStageCreateInfo>(pCreateInfos[idx0].stageCount);
                 for (uint32_t idx1 = 0; idx1 < pCreateInfos[idx0].stageCount; ++idx1) {
+                    local_pStages[idx1] = pCreateInfos[idx0].pStages[idx1];
                     if (pCreateInfos[idx0].pStages[idx1].module) {
-                        local_pCreateInfos[idx0].pStages[idx1].module = Unwrap(pCreateInfos[idx0].pStages[idx1].module);
+                        local_pStages[idx1].module = Unwrap(pCreateInfos[idx0].pStages[idx1].module);
                     }
                 }
+                local_pCreateInfos[idx0].pStages = local_pStages;
             }
             if (pCreateInfos[idx0].renderPass) {
                 local_pCreateInfos[idx0].renderPass = Unwrap(pCreateInfos[idx0].renderPass);
@@ -386,90 +386,32 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateGraphicsPipelines(VkDevice device, VkPipeli
         }
     }
     if (pipelineCache) {
-        std::lock_guard<std::mutex> lock(global_lock);
         pipelineCache = Unwrap(pipelineCache);
     }
 
     VkResult result = device_data->dispatch_table.CreateGraphicsPipelines(device, pipelineCache, createInfoCount,
-                                                                          local_pCreateInfos->ptr(), pAllocator, pPipelines);
-    delete[] local_pCreateInfos;
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        for (uint32_t i = 0; i < createInfoCount; ++i) {
-            if (pPipelines[i] != VK_NULL_HANDLE) {
-                pPipelines[i] = WrapNew(pPipelines[i]);
-            }
-        }
-    }
-    return result;
-}
-
-static void PostCallCreateRenderPass(layer_data *dev_data, const VkRenderPassCreateInfo *pCreateInfo, VkRenderPass renderPass) {
-    auto &renderpass_state = dev_data->renderpasses_states[renderPass];
-
-    for (uint32_t subpass = 0; subpass < pCreateInfo->subpassCount; ++subpass) {
-        bool uses_color = false;
-        for (uint32_t i = 0; i < pCreateInfo->pSubpasses[subpass].colorAttachmentCount && !uses_color; ++i)
-            if (pCreateInfo->pSubpasses[subpass].pColorAttachments[i].attachment != VK_ATTACHMENT_UNUSED) uses_color = true;
-
-        bool uses_depthstencil = false;
-        if (pCreateInfo->pSubpasses[subpass].pDepthStencilAttachment)
-            if (pCreateInfo->pSubpasses[subpass].pDepthStencilAttachment->attachment != VK_ATTACHMENT_UNUSED)
-                uses_depthstencil = true;
-
-        if (uses_color) renderpass_state.subpasses_using_color_attachment.insert(subpass);
-        if (uses_depthstencil) renderpass_state.subpasses_using_depthstencil_attachment.insert(subpass);
-    }
-}
-
-VKAPI_ATTR VkResult VKAPI_CALL CreateRenderPass(VkDevice device, const VkRenderPassCreateInfo *pCreateInfo,
-                                                const VkAllocationCallbacks *pAllocator, VkRenderPass *pRenderPass) {
-    layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
-    VkResult result = dev_data->dispatch_table.CreateRenderPass(device, pCreateInfo, pAllocator, pRenderPass);
-    if (VK_SUCCESS == result) {
-        std::lock_guard<std::mutex> lock(global_lock);
-
-        PostCallCreateRenderPass(dev_data, pCreateInfo, *pRenderPass);
-
-        *pRenderPass = WrapNew(*pRenderPass);
-    }
+                                                                          local_pCreateInfos, pAllocator, pPipelines);
+    WrapNewArray(pPipelines, createInfoCount);
     return result;
 }
 
-static void PostCallDestroyRenderPass(layer_data *dev_data, VkRenderPass renderPass) {
-    dev_data->renderpasses_states.erase(renderPass);
-}
-
-VKAPI_ATTR void VKAPI_CALL DestroyRenderPass(VkDevice device, VkRenderPass renderPass, const VkAllocationCallbacks *pAllocator) {
-    layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
-    std::unique_lock<std::mutex> lock(global_lock);
-    uint64_t renderPass_id = reinterpret_cast<uint64_t &>(renderPass);
-    renderPass = (VkRenderPass)unique_id_mapping[renderPass_id];
-    unique_id_mapping.erase(renderPass_id);
-    lock.unlock();
-    dev_data->dispatch_table.DestroyRenderPass(device, renderPass, pAllocator);
-
-    lock.lock();
-    PostCallDestroyRenderPass(dev_data, renderPass);
-}
-
 VKAPI_ATTR VkResult VKAPI_CALL CreateSwapchainKHR(VkDevice device, const VkSwapchainCreateInfoKHR *pCreateInfo,
                                                   const VkAllocationCallbacks *pAllocator, VkSwapchainKHR *pSwapchain) {
     layer_data *my_map_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     safe_VkSwapchainCreateInfoKHR *local_pCreateInfo = NULL;
     if (pCreateInfo) {
-        std::lock_guard<std::mutex> lock(global_lock);
         local_pCreateInfo = new safe_VkSwapchainCreateInfoKHR(pCreateInfo);
-        local_pCreateInfo->oldSwapchain = Unwrap(pCreateInfo->oldSwapchain);
-        // Surface is instance-level object
+        if (!my_map_data->passthrough) {
+            local_pCreateInfo->oldSwapchain = Unwrap(pCreateInfo->oldSwapchain);
+        }
+        // Surface is instance-level object, and stays wrapped on pass-through devices
         local_pCreateInfo->surface = Unwrap(pCreateInfo->surface);
     }
 
     VkResult result = my_map_data->dispatch_table.CreateSwapchainKHR(device, local_pCreateInfo->ptr(), pAllocator, pSwapchain);
     delete local_pCreateInfo;
 
-    if (VK_SUCCESS == result) {
-        std::lock_guard<std::mutex> lock(global_lock);
+    if ((VK_SUCCESS == result) && !my_map_data->passthrough) {
         *pSwapchain = WrapNew(*pSwapchain);
     }
     return result;
@@ -480,30 +422,24 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateSharedSwapchainsKHR(VkDevice device, uint32
                                                          const VkAllocationCallbacks *pAllocator, VkSwapchainKHR *pSwapchains) {
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     safe_VkSwapchainCreateInfoKHR *local_pCreateInfos = NULL;
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        if (pCreateInfos) {
-            local_pCreateInfos = new safe_VkSwapchainCreateInfoKHR[swapchainCount];
-            for (uint32_t i = 0; i < swapchainCount; ++i) {
-                local_pCreateInfos[i].initialize(&pCreateInfos[i]);
-                if (pCreateInfos[i].surface) {
-                    // Surface is instance-level object
-                    local_pCreateInfos[i].surface = Unwrap(pCreateInfos[i].surface);
-                }
-                if (pCreateInfos[i].oldSwapchain) {
-                    local_pCreateInfos[i].oldSwapchain = Unwrap(pCreateInfos[i].oldSwapchain);
-                }
+    if (pCreateInfos) {
+        local_pCreateInfos = new safe_VkSwapchainCreateInfoKHR[swapchainCount];
+        for (uint32_t i = 0; i < swapchainCount; ++i) {
+            local_pCreateInfos[i].initialize(&pCreateInfos[i]);
+            if (pCreateInfos[i].surface) {
+                // Surface is instance-level object
+                local_pCreateInfos[i].surface = Unwrap(pCreateInfos[i].surface);
+            }
+            if (pCreateInfos[i].oldSwapchain && !dev_data->passthrough) {
+                local_pCreateInfos[i].oldSwapchain = Unwrap(pCreateInfos[i].oldSwapchain);
             }
         }
     }
     VkResult result = dev_data->dispatch_table.CreateSharedSwapchainsKHR(device, swapchainCount, local_pCreateInfos->ptr(),
                                                                          pAllocator, pSwapchains);
     delete[] local_pCreateInfos;
-    if (VK_SUCCESS == result) {
-        std::lock_guard<std::mutex> lock(global_lock);
-        for (uint32_t i = 0; i < swapchainCount; i++) {
-            pSwapchains[i] = WrapNew(pSwapchains[i]);
-        }
+    if ((VK_SUCCESS == result) && !dev_data->passthrough) {
+        WrapNewArray(pSwapchains, swapchainCount);
     }
     return result;
 }
@@ -513,7 +449,6 @@ VKAPI_ATTR VkResult VKAPI_CALL GetSwapchainImagesKHR(VkDevice device, VkSwapchai
     layer_data *my_device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     VkSwapchainKHR wrapped_swapchain_handle = swapchain;
     if (VK_NULL_HANDLE != swapchain) {
-        std::lock_guard<std::mutex> lock(global_lock);
         swapchain = Unwrap(swapchain);
     }
     VkResult result =
@@ -539,33 +474,28 @@ VKAPI_ATTR void VKAPI_CALL DestroySwapchainKHR(VkDevice device, VkSwapchainKHR s
 
     auto &image_array = dev_data->swapchain_wrapped_image_handle_map[swapchain];
     for (auto &image_handle : image_array) {
-        unique_id_mapping.erase(HandleToUint64(image_handle));
+        UnwrapAndErase(HandleToUint64(image_handle));
     }
     dev_data->swapchain_wrapped_image_handle_map.erase(swapchain);
-
-    uint64_t swapchain_id = HandleToUint64(swapchain);
-    swapchain = (VkSwapchainKHR)unique_id_mapping[swapchain_id];
-    unique_id_mapping.erase(swapchain_id);
     lock.unlock();
+
+    swapchain = UnwrapAndErase(swapchain);
     dev_data->dispatch_table.DestroySwapchainKHR(device, swapchain, pAllocator);
 }
 
 VKAPI_ATTR VkResult VKAPI_CALL QueuePresentKHR(VkQueue queue, const VkPresentInfoKHR *pPresentInfo) {
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(queue), layer_data_map);
     safe_VkPresentInfoKHR *local_pPresentInfo = NULL;
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        if (pPresentInfo) {
-            local_pPresentInfo = new safe_VkPresentInfoKHR(pPresentInfo);
-            if (local_pPresentInfo->pWaitSemaphores) {
-                for (uint32_t index1 = 0; index1 < local_pPresentInfo->waitSemaphoreCount; ++index1) {
-                    local_pPresentInfo->pWaitSemaphores[index1] = Unwrap(pPresentInfo->pWaitSemaphores[index1]);
-                }
+    if (pPresentInfo) {
+        local_pPresentInfo = new safe_VkPresentInfoKHR(pPresentInfo);
+        if (local_pPresentInfo->pWaitSemaphores) {
+            for (uint32_t index1 = 0; index1 < local_pPresentInfo->waitSemaphoreCount; ++index1) {
+                local_pPresentInfo->pWaitSemaphores[index1] = Unwrap(pPresentInfo->pWaitSemaphores[index1]);
             }
-            if (local_pPresentInfo->pSwapchains) {
-                for (uint32_t index1 = 0; index1 < local_pPresentInfo->swapchainCount; ++index1) {
-                    local_pPresentInfo->pSwapchains[index1] = Unwrap(pPresentInfo->pSwapchains[index1]);
-                }
+        }
+        if (local_pPresentInfo->pSwapchains) {
+            for (uint32_t index1 = 0; index1 < local_pPresentInfo->swapchainCount; ++index1) {
+                local_pPresentInfo->pSwapchains[index1] = Unwrap(pPresentInfo->pSwapchains[index1]);
             }
         }
     }
@@ -590,28 +520,27 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateDescriptorUpdateTemplate(VkDevice device,
                                                               VkDescriptorUpdateTemplateKHR *pDescriptorUpdateTemplate) {
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     safe_VkDescriptorUpdateTemplateCreateInfo *local_create_info = NULL;
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        if (pCreateInfo) {
-            local_create_info = new safe_VkDescriptorUpdateTemplateCreateInfo(pCreateInfo);
-            if (pCreateInfo->descriptorSetLayout) {
-                local_create_info->descriptorSetLayout = Unwrap(pCreateInfo->descriptorSetLayout);
-            }
-            if (pCreateInfo->pipelineLayout) {
-                local_create_info->pipelineLayout = Unwrap(pCreateInfo->pipelineLayout);
-            }
+    if (pCreateInfo) {
+        local_create_info = new safe_VkDescriptorUpdateTemplateCreateInfo(pCreateInfo);
+        if (pCreateInfo->descriptorSetLayout) {
+            local_create_info->descriptorSetLayout = Unwrap(pCreateInfo->descriptorSetLayout);
+        }
+        if (pCreateInfo->pipelineLayout) {
+            local_create_info->pipelineLayout = Unwrap(pCreateInfo->pipelineLayout);
         }
     }
     VkResult result = dev_data->dispatch_table.CreateDescriptorUpdateTemplate(device, local_create_info->ptr(), pAllocator,
                                                                               pDescriptorUpdateTemplate);
     if (VK_SUCCESS == result) {
-        std::lock_guard<std::mutex> lock(global_lock);
         *pDescriptorUpdateTemplate = WrapNew(*pDescriptorUpdateTemplate);
 
-        // Shadow template createInfo for later updates
-        std::unique_ptr<TEMPLATE_STATE> template_state(new TEMPLATE_STATE(*pDescriptorUpdateTemplate, local_create_info));
+        // Compile the template entries once so later updates only copy and unwrap precomputed slots
+        std::unique_ptr<TEMPLATE_STATE> template_state(new TEMPLATE_STATE(*pDescriptorUpdateTemplate));
+        CompileDescriptorUpdateTemplate(local_create_info->ptr(), template_state.get());
+        std::lock_guard<std::mutex> lock(global_lock);
         dev_data->desc_template_map[(uint64_t)*pDescriptorUpdateTemplate] = std::move(template_state);
     }
+    delete local_create_info;
     return result;
 }
 
@@ -622,28 +551,27 @@ VKAPI_ATTR VkResult VKAPI_CALL CreateDescriptorUpdateTemplateKHR(VkDevice device
                                                                  VkDescriptorUpdateTemplateKHR *pDescriptorUpdateTemplate) {
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     safe_VkDescriptorUpdateTemplateCreateInfo *local_create_info = NULL;
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        if (pCreateInfo) {
-            local_create_info = new safe_VkDescriptorUpdateTemplateCreateInfo(pCreateInfo);
-            if (pCreateInfo->descriptorSetLayout) {
-                local_create_info->descriptorSetLayout = Unwrap(pCreateInfo->descriptorSetLayout);
-            }
-            if (pCreateInfo->pipelineLayout) {
-                local_create_info->pipelineLayout = Unwrap(pCreateInfo->pipelineLayout);
-            }
+    if (pCreateInfo) {
+        local_create_info = new safe_VkDescriptorUpdateTemplateCreateInfo(pCreateInfo);
+        if (pCreateInfo->descriptorSetLayout) {
+            local_create_info->descriptorSetLayout = Unwrap(pCreateInfo->descriptorSetLayout);
+        }
+        if (pCreateInfo->pipelineLayout) {
+            local_create_info->pipelineLayout = Unwrap(pCreateInfo->pipelineLayout);
         }
     }
     VkResult result = dev_data->dispatch_table.CreateDescriptorUpdateTemplateKHR(device, local_create_info->ptr(), pAllocator,
                                                                                  pDescriptorUpdateTemplate);
     if (VK_SUCCESS == result) {
-        std::lock_guard<std::mutex> lock(global_lock);
         *pDescriptorUpdateTemplate = WrapNew(*pDescriptorUpdateTemplate);
 
-        // Shadow template createInfo for later updates
-        std::unique_ptr<TEMPLATE_STATE> template_state(new TEMPLATE_STATE(*pDescriptorUpdateTemplate, local_create_info));
+        // Compile the template entries once so later updates only copy and unwrap precomputed slots
+        std::unique_ptr<TEMPLATE_STATE> template_state(new TEMPLATE_STATE(*pDescriptorUpdateTemplate));
+        CompileDescriptorUpdateTemplate(local_create_info->ptr(), template_state.get());
+        std::lock_guard<std::mutex> lock(global_lock);
         dev_data->desc_template_map[(uint64_t)*pDescriptorUpdateTemplate] = std::move(template_state);
     }
+    delete local_create_info;
     return result;
 }
 
@@ -654,9 +582,8 @@ VKAPI_ATTR void VKAPI_CALL DestroyDescriptorUpdateTemplate(VkDevice device, VkDe
     std::unique_lock<std::mutex> lock(global_lock);
     uint64_t descriptor_update_template_id = reinterpret_cast<uint64_t &>(descriptorUpdateTemplate);
     dev_data->desc_template_map.erase(descriptor_update_template_id);
-    descriptorUpdateTemplate = (VkDescriptorUpdateTemplate)unique_id_mapping[descriptor_update_template_id];
-    unique_id_mapping.erase(descriptor_update_template_id);
     lock.unlock();
+    descriptorUpdateTemplate = UnwrapAndErase(descriptorUpdateTemplate);
     dev_data->dispatch_table.DestroyDescriptorUpdateTemplate(device, descriptorUpdateTemplate, pAllocator);
 }
 
@@ -668,92 +595,46 @@ VKAPI_ATTR void VKAPI_CALL DestroyDescriptorUpdateTemplateKHR(VkDevice device,
     std::unique_lock<std::mutex> lock(global_lock);
     uint64_t descriptor_update_template_id = reinterpret_cast<uint64_t &>(descriptorUpdateTemplate);
     dev_data->desc_template_map.erase(descriptor_update_template_id);
-    descriptorUpdateTemplate = (VkDescriptorUpdateTemplate)unique_id_mapping[descriptor_update_template_id];
-    unique_id_mapping.erase(descriptor_update_template_id);
     lock.unlock();
+    descriptorUpdateTemplate = UnwrapAndErase(descriptorUpdateTemplate);
     dev_data->dispatch_table.DestroyDescriptorUpdateTemplateKHR(device, descriptorUpdateTemplate, pAllocator);
 }
 
-void *BuildUnwrappedUpdateTemplateBuffer(layer_data *dev_data, uint64_t descriptorUpdateTemplate, const void *pData) {
-    auto const template_map_entry = dev_data->desc_template_map.find(descriptorUpdateTemplate);
-    if (template_map_entry == dev_data->desc_template_map.end()) {
-        assert(0);
-    }
-    auto const &create_info = template_map_entry->second->create_info;
-    size_t allocation_size = 0;
-    std::vector<std::tuple<size_t, VulkanObjectType, void *>> template_entries;
-
-    for (uint32_t i = 0; i < create_info.descriptorUpdateEntryCount; i++) {
-        for (uint32_t j = 0; j < create_info.pDescriptorUpdateEntries[i].descriptorCount; j++) {
-            size_t offset = create_info.pDescriptorUpdateEntries[i].offset + j * create_info.pDescriptorUpdateEntries[i].stride;
-            char *update_entry = (char *)(pData) + offset;
-
-            switch (create_info.pDescriptorUpdateEntries[i].descriptorType) {
-                case VK_DESCRIPTOR_TYPE_SAMPLER:
-                case VK_DESCRIPTOR_TYPE_COMBINED_IMAGE_SAMPLER:
-                case VK_DESCRIPTOR_TYPE_SAMPLED_IMAGE:
-                case VK_DESCRIPTOR_TYPE_STORAGE_IMAGE:
-                case VK_DESCRIPTOR_TYPE_INPUT_ATTACHMENT: {
-                    auto image_entry = reinterpret_cast<VkDescriptorImageInfo *>(update_entry);
-                    allocation_size = std::max(allocation_size, offset + sizeof(VkDescriptorImageInfo));
-
-                    VkDescriptorImageInfo *wrapped_entry = new VkDescriptorImageInfo(*image_entry);
-                    wrapped_entry->sampler = Unwrap(image_entry->sampler);
-                    wrapped_entry->imageView = Unwrap(image_entry->imageView);
-                    template_entries.emplace_back(offset, kVulkanObjectTypeImage, reinterpret_cast<void *>(wrapped_entry));
-                } break;
-
-                case VK_DESCRIPTOR_TYPE_UNIFORM_BUFFER:
-                case VK_DESCRIPTOR_TYPE_STORAGE_BUFFER:
-                case VK_DESCRIPTOR_TYPE_UNIFORM_BUFFER_DYNAMIC:
-                case VK_DESCRIPTOR_TYPE_STORAGE_BUFFER_DYNAMIC: {
-                    auto buffer_entry = reinterpret_cast<VkDescriptorBufferInfo *>(update_entry);
-                    allocation_size = std::max(allocation_size, offset + sizeof(VkDescriptorBufferInfo));
-
-                    VkDescriptorBufferInfo *wrapped_entry = new VkDescriptorBufferInfo(*buffer_entry);
-                    wrapped_entry->buffer = Unwrap(buffer_entry->buffer);
-                    template_entries.emplace_back(offset, kVulkanObjectTypeBuffer, reinterpret_cast<void *>(wrapped_entry));
-                } break;
-
-                case VK_DESCRIPTOR_TYPE_UNIFORM_TEXEL_BUFFER:
-                case VK_DESCRIPTOR_TYPE_STORAGE_TEXEL_BUFFER: {
-                    auto buffer_view_handle = reinterpret_cast<VkBufferView *>(update_entry);
-                    allocation_size = std::max(allocation_size, offset + sizeof(VkBufferView));
-
-                    VkBufferView wrapped_entry = Unwrap(*buffer_view_handle);
-                    template_entries.emplace_back(offset, kVulkanObjectTypeBufferView, reinterpret_cast<void *>(wrapped_entry));
-                } break;
-                default:
-                    assert(0);
-                    break;
-            }
+// Copy the application's template data into storage owned by scope, unwrapping the handle slots the template was
+// compiled to
+void *BuildUnwrappedUpdateTemplateBuffer(layer_data *dev_data, uint64_t descriptorUpdateTemplate, const void *pData,
+                                         LocalCopyScope *scope) {
+    const TEMPLATE_STATE *template_state = nullptr;
+    {
+        std::lock_guard<std::mutex> lock(global_lock);
+        auto const template_map_entry = dev_data->desc_template_map.find(descriptorUpdateTemplate);
+        if (template_map_entry == dev_data->desc_template_map.end()) {
+            assert(0);
+            return nullptr;
         }
+        template_state = template_map_entry->second.get();
     }
-    // Allocate required buffer size and populate with source/unwrapped data
-    void *unwrapped_data = malloc(allocation_size);
-    for (auto &this_entry : template_entries) {
-        VulkanObjectType type = std::get<1>(this_entry);
-        void *destination = (char *)unwrapped_data + std::get<0>(this_entry);
-        void *source = (char *)std::get<2>(this_entry);
-
-        switch (type) {
-            case kVulkanObjectTypeImage:
-                *(reinterpret_cast<VkDescriptorImageInfo *>(destination)) = *(reinterpret_cast<VkDescriptorImageInfo *>(source));
-                delete reinterpret_cast<VkDescriptorImageInfo *>(source);
-                break;
-            case kVulkanObjectTypeBuffer:
-                *(reinterpret_cast<VkDescriptorBufferInfo *>(destination)) = *(reinterpret_cast<VkDescriptorBufferInfo *>(source));
-                delete reinterpret_cast<VkDescriptorBufferInfo *>(source);
-                break;
-            case kVulkanObjectTypeBufferView:
-                *(reinterpret_cast<VkBufferView *>(destination)) = reinterpret_cast<VkBufferView>(source);
-                break;
-            default:
-                assert(0);
-                break;
+
+    const char *source = static_cast<const char *>(pData);
+    char *unwrapped_data =
+        reinterpret_cast<char *>(scope->Allocate<uint64_t>((template_state->data_size + sizeof(uint64_t) - 1) / sizeof(uint64_t)));
+    for (const auto &range : template_state->copy_ranges) {
+        if (range.stride == range.size) {
+            memcpy(unwrapped_data + range.offset, source + range.offset, range.count * range.size);
+            continue;
+        }
+        for (uint32_t i = 0; i < range.count; i++) {
+            size_t offset = range.offset + i * range.stride;
+            memcpy(unwrapped_data + offset, source + offset, range.size);
         }
     }
-    return (void *)unwrapped_data;
+    for (const auto &slots : template_state->handle_slots) {
+        for (uint32_t i = 0; i < slots.count; i++) {
+            uint64_t *handle = reinterpret_cast<uint64_t *>(unwrapped_data + slots.offset + i * slots.stride);
+            *handle = Unwrap(*handle);
+        }
+    }
+    return unwrapped_data;
 }
 
 // This is the core version of this routine.  The extension version is below.
@@ -762,14 +643,11 @@ VKAPI_ATTR void VKAPI_CALL UpdateDescriptorSetWithTemplate(VkDevice device, VkDe
                                                            const void *pData) {
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     uint64_t template_handle = reinterpret_cast<uint64_t &>(descriptorUpdateTemplate);
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        descriptorSet = Unwrap(descriptorSet);
-        descriptorUpdateTemplate = (VkDescriptorUpdateTemplate)unique_id_mapping[template_handle];
-    }
-    void *unwrapped_buffer = BuildUnwrappedUpdateTemplateBuffer(dev_data, template_handle, pData);
+    LocalCopyScope local_copy_scope;
+    descriptorSet = Unwrap(descriptorSet);
+    descriptorUpdateTemplate = Unwrap(descriptorUpdateTemplate);
+    void *unwrapped_buffer = BuildUnwrappedUpdateTemplateBuffer(dev_data, template_handle, pData, &local_copy_scope);
     dev_data->dispatch_table.UpdateDescriptorSetWithTemplate(device, descriptorSet, descriptorUpdateTemplate, unwrapped_buffer);
-    free(unwrapped_buffer);
 }
 
 // This is the extension version of this routine.  The core version is above.
@@ -778,15 +656,11 @@ VKAPI_ATTR void VKAPI_CALL UpdateDescriptorSetWithTemplateKHR(VkDevice device, V
                                                               const void *pData) {
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     uint64_t template_handle = reinterpret_cast<uint64_t &>(descriptorUpdateTemplate);
-    void *unwrapped_buffer = nullptr;
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        descriptorSet = Unwrap(descriptorSet);
-        descriptorUpdateTemplate = (VkDescriptorUpdateTemplate)unique_id_mapping[template_handle];
-        unwrapped_buffer = BuildUnwrappedUpdateTemplateBuffer(dev_data, template_handle, pData);
-    }
+    LocalCopyScope local_copy_scope;
+    descriptorSet = Unwrap(descriptorSet);
+    descriptorUpdateTemplate = Unwrap(descriptorUpdateTemplate);
+    void *unwrapped_buffer = BuildUnwrappedUpdateTemplateBuffer(dev_data, template_handle, pData, &local_copy_scope);
     dev_data->dispatch_table.UpdateDescriptorSetWithTemplateKHR(device, descriptorSet, descriptorUpdateTemplate, unwrapped_buffer);
-    free(unwrapped_buffer);
 }
 
 VKAPI_ATTR void VKAPI_CALL CmdPushDescriptorSetWithTemplateKHR(VkCommandBuffer commandBuffer,
@@ -794,16 +668,12 @@ VKAPI_ATTR void VKAPI_CALL CmdPushDescriptorSetWithTemplateKHR(VkCommandBuffer c
                                                                VkPipelineLayout layout, uint32_t set, const void *pData) {
     layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(commandBuffer), layer_data_map);
     uint64_t template_handle = reinterpret_cast<uint64_t &>(descriptorUpdateTemplate);
-    void *unwrapped_buffer = nullptr;
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        descriptorUpdateTemplate = Unwrap(descriptorUpdateTemplate);
-        layout = Unwrap(layout);
-        unwrapped_buffer = BuildUnwrappedUpdateTemplateBuffer(dev_data, template_handle, pData);
-    }
+    LocalCopyScope local_copy_scope;
+    descriptorUpdateTemplate = Unwrap(descriptorUpdateTemplate);
+    layout = Unwrap(layout);
+    void *unwrapped_buffer = BuildUnwrappedUpdateTemplateBuffer(dev_data, template_handle, pData, &local_copy_scope);
     dev_data->dispatch_table.CmdPushDescriptorSetWithTemplateKHR(commandBuffer, descriptorUpdateTemplate, layout, set,
                                                                  unwrapped_buffer);
-    free(unwrapped_buffer);
 }
 
 #ifndef __ANDROID__
@@ -814,7 +684,6 @@ VKAPI_ATTR VkResult VKAPI_CALL GetPhysicalDeviceDisplayPropertiesKHR(VkPhysicalD
     VkResult result =
         my_map_data->dispatch_table.GetPhysicalDeviceDisplayPropertiesKHR(physicalDevice, pPropertyCount, pProperties);
     if ((result == VK_SUCCESS || result == VK_INCOMPLETE) && pProperties) {
-        std::lock_guard<std::mutex> lock(global_lock);
         for (uint32_t idx0 = 0; idx0 < *pPropertyCount; ++idx0) {
             pProperties[idx0].display = WrapNew(pProperties[idx0].display);
         }
@@ -829,12 +698,11 @@ VKAPI_ATTR VkResult VKAPI_CALL GetDisplayPlaneSupportedDisplaysKHR(VkPhysicalDev
         my_map_data->dispatch_table.GetDisplayPlaneSupportedDisplaysKHR(physicalDevice, planeIndex, pDisplayCount, pDisplays);
     if (VK_SUCCESS == result) {
         if ((*pDisplayCount > 0) && pDisplays) {
-            std::lock_guard<std::mutex> lock(global_lock);
             for (uint32_t i = 0; i < *pDisplayCount; i++) {
                 // TODO: this looks like it really wants a /reverse/ mapping. What's going on here?
-                auto it = unique_id_mapping.find(reinterpret_cast<const uint64_t &>(pDisplays[i]));
-                assert(it != unique_id_mapping.end());
-                pDisplays[i] = reinterpret_cast<VkDisplayKHR &>(it->second);
+                uint64_t display = Unwrap(reinterpret_cast<const uint64_t &>(pDisplays[i]));
+                assert(display != 0);
+                pDisplays[i] = reinterpret_cast<VkDisplayKHR &>(display);
             }
         }
     }
@@ -844,14 +712,10 @@ VKAPI_ATTR VkResult VKAPI_CALL GetDisplayPlaneSupportedDisplaysKHR(VkPhysicalDev
 VKAPI_ATTR VkResult VKAPI_CALL GetDisplayModePropertiesKHR(VkPhysicalDevice physicalDevice, VkDisplayKHR display,
                                                            uint32_t *pPropertyCount, VkDisplayModePropertiesKHR *pProperties) {
     instance_layer_data *my_map_data = GetLayerDataPtr(get_dispatch_key(physicalDevice), instance_layer_data_map);
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        display = Unwrap(display);
-    }
+    display = Unwrap(display);
 
     VkResult result = my_map_data->dispatch_table.GetDisplayModePropertiesKHR(physicalDevice, display, pPropertyCount, pProperties);
     if (result == VK_SUCCESS && pProperties) {
-        std::lock_guard<std::mutex> lock(global_lock);
         for (uint32_t idx0 = 0; idx0 < *pPropertyCount; ++idx0) {
             pProperties[idx0].displayMode = WrapNew(pProperties[idx0].displayMode);
         }
@@ -862,23 +726,48 @@ VKAPI_ATTR VkResult VKAPI_CALL GetDisplayModePropertiesKHR(VkPhysicalDevice phys
 VKAPI_ATTR VkResult VKAPI_CALL GetDisplayPlaneCapabilitiesKHR(VkPhysicalDevice physicalDevice, VkDisplayModeKHR mode,
                                                               uint32_t planeIndex, VkDisplayPlaneCapabilitiesKHR *pCapabilities) {
     instance_layer_data *dev_data = GetLayerDataPtr(get_dispatch_key(physicalDevice), instance_layer_data_map);
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        mode = Unwrap(mode);
-    }
+    mode = Unwrap(mode);
     VkResult result = dev_data->dispatch_table.GetDisplayPlaneCapabilitiesKHR(physicalDevice, mode, planeIndex, pCapabilities);
     return result;
 }
 #endif
 
+// Pass-through devices only wrap instance-level handles, so any other object handle is already the driver's handle and must
+// not be looked up: it could collide with a unique ID handed out for a wrapped object.
+static bool IsWrappedObjectType(const layer_data *device_data, VkDebugReportObjectTypeEXT object_type) {
+    if (!device_data->passthrough) return true;
+    switch (object_type) {
+        case VK_DEBUG_REPORT_OBJECT_TYPE_SURFACE_KHR_EXT:
+        case VK_DEBUG_REPORT_OBJECT_TYPE_DISPLAY_KHR_EXT:
+        case VK_DEBUG_REPORT_OBJECT_TYPE_DISPLAY_MODE_KHR_EXT:
+        case VK_DEBUG_REPORT_OBJECT_TYPE_DEBUG_REPORT_EXT:
+            return true;
+        default:
+            return false;
+    }
+}
+
+static bool IsWrappedObjectType(const layer_data *device_data, VkObjectType object_type) {
+    if (!device_data->passthrough) return true;
+    switch (object_type) {
+        case VK_OBJECT_TYPE_SURFACE_KHR:
+        case VK_OBJECT_TYPE_DISPLAY_KHR:
+        case VK_OBJECT_TYPE_DISPLAY_MODE_KHR:
+        case VK_OBJECT_TYPE_DEBUG_REPORT_CALLBACK_EXT:
+        case VK_OBJECT_TYPE_DEBUG_UTILS_MESSENGER_EXT:
+            return true;
+        default:
+            return false;
+    }
+}
+
 VKAPI_ATTR VkResult VKAPI_CALL DebugMarkerSetObjectTagEXT(VkDevice device, const VkDebugMarkerObjectTagInfoEXT *pTagInfo) {
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     safe_VkDebugMarkerObjectTagInfoEXT local_tag_info(pTagInfo);
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        auto it = unique_id_mapping.find(reinterpret_cast<uint64_t &>(local_tag_info.object));
-        if (it != unique_id_mapping.end()) {
-            local_tag_info.object = it->second;
+    if (IsWrappedObjectType(device_data, local_tag_info.objectType)) {
+        uint64_t object_handle = Unwrap(reinterpret_cast<uint64_t &>(local_tag_info.object));
+        if (object_handle) {
+            local_tag_info.object = object_handle;
         }
     }
     VkResult result = device_data->dispatch_table.DebugMarkerSetObjectTagEXT(
@@ -889,11 +778,10 @@ VKAPI_ATTR VkResult VKAPI_CALL DebugMarkerSetObjectTagEXT(VkDevice device, const
 VKAPI_ATTR VkResult VKAPI_CALL DebugMarkerSetObjectNameEXT(VkDevice device, const VkDebugMarkerObjectNameInfoEXT *pNameInfo) {
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     safe_VkDebugMarkerObjectNameInfoEXT local_name_info(pNameInfo);
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        auto it = unique_id_mapping.find(reinterpret_cast<uint64_t &>(local_name_info.object));
-        if (it != unique_id_mapping.end()) {
-            local_name_info.object = it->second;
+    if (IsWrappedObjectType(device_data, local_name_info.objectType)) {
+        uint64_t object_handle = Unwrap(reinterpret_cast<uint64_t &>(local_name_info.object));
+        if (object_handle) {
+            local_name_info.object = object_handle;
         }
     }
     VkResult result = device_data->dispatch_table.DebugMarkerSetObjectNameEXT(
@@ -905,11 +793,10 @@ VKAPI_ATTR VkResult VKAPI_CALL DebugMarkerSetObjectNameEXT(VkDevice device, cons
 VKAPI_ATTR VkResult VKAPI_CALL SetDebugUtilsObjectTagEXT(VkDevice device, const VkDebugUtilsObjectTagInfoEXT *pTagInfo) {
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     safe_VkDebugUtilsObjectTagInfoEXT local_tag_info(pTagInfo);
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        auto it = unique_id_mapping.find(reinterpret_cast<uint64_t &>(local_tag_info.objectHandle));
-        if (it != unique_id_mapping.end()) {
-            local_tag_info.objectHandle = it->second;
+    if (IsWrappedObjectType(device_data, local_tag_info.objectType)) {
+        uint64_t object_handle = Unwrap(reinterpret_cast<uint64_t &>(local_tag_info.objectHandle));
+        if (object_handle) {
+            local_tag_info.objectHandle = object_handle;
         }
     }
     VkResult result = device_data->dispatch_table.SetDebugUtilsObjectTagEXT(
@@ -920,11 +807,10 @@ VKAPI_ATTR VkResult VKAPI_CALL SetDebugUtilsObjectTagEXT(VkDevice device, const
 VKAPI_ATTR VkResult VKAPI_CALL SetDebugUtilsObjectNameEXT(VkDevice device, const VkDebugUtilsObjectNameInfoEXT *pNameInfo) {
     layer_data *device_data = GetLayerDataPtr(get_dispatch_key(device), layer_data_map);
     safe_VkDebugUtilsObjectNameInfoEXT local_name_info(pNameInfo);
-    {
-        std::lock_guard<std::mutex> lock(global_lock);
-        auto it = unique_id_mapping.find(reinterpret_cast<uint64_t &>(local_name_info.objectHandle));
-        if (it != unique_id_mapping.end()) {
-            local_name_info.objectHandle = it->second;
+    if (IsWrappedObjectType(device_data, local_name_info.objectType)) {
+        uint64_t object_handle = Unwrap(reinterpret_cast<uint64_t &>(local_name_info.objectHandle));
+        if (object_handle) {
+            local_name_info.objectHandle = object_handle;
         }
     }
     VkResult result = device_data->dispatch_table.SetDebugUtilsObjectNameEXT(
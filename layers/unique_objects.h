@@ -21,8 +21,13 @@
 
 #include "vulkan/vulkan.h"
 
+#include <algorithm>
+#include <atomic>
+#include <memory>
+#include <new>
 #include <unordered_map>
 #include <unordered_set>
+#include <vector>
 
 #include "vk_layer_data.h"
 #include "vk_safe_struct.h"
@@ -33,16 +38,220 @@
 
 namespace unique_objects {
 
-// All increments must be guarded by global_lock
-static uint64_t global_unique_id = 1;
-static std::unordered_map<uint64_t, uint64_t> unique_id_mapping;  // Map uniqueID to actual object handle
+// Map of unique IDs to actual object handles, split into independently locked shards so that wrapping and unwrapping
+// on different threads and devices do not serialize on a single lock.  Unique IDs are handed out sequentially, so the
+// low bits of the ID spread consecutive objects evenly across the shards.
+class UniqueIdMap {
+   public:
+    static const uint32_t kShardBits = 6;
+    static const uint32_t kShardCount = 1 << kShardBits;
 
+    // Add a mapping from unique_id to handle
+    void insert(uint64_t unique_id, uint64_t handle) {
+        Shard &shard = GetShard(unique_id);
+        std::lock_guard<std::mutex> lock(shard.lock);
+        shard.map[unique_id] = handle;
+    }
+
+    // Return the handle mapped to unique_id, or 0 if there is none
+    uint64_t find(uint64_t unique_id) {
+        Shard &shard = GetShard(unique_id);
+        std::lock_guard<std::mutex> lock(shard.lock);
+        auto it = shard.map.find(unique_id);
+        return (it != shard.map.end()) ? it->second : 0;
+    }
+
+    // Remove the mapping for unique_id and return the handle it mapped to, or 0 if there was none
+    uint64_t pop(uint64_t unique_id) {
+        Shard &shard = GetShard(unique_id);
+        std::lock_guard<std::mutex> lock(shard.lock);
+        auto it = shard.map.find(unique_id);
+        if (it == shard.map.end()) return 0;
+        uint64_t handle = it->second;
+        shard.map.erase(it);
+        return handle;
+    }
+
+    void erase(uint64_t unique_id) { pop(unique_id); }
+
+    // Add mappings for count consecutive unique IDs starting at first_id, taking each shard's lock once.  Zero handles
+    // are skipped.
+    void insert_range(uint64_t first_id, const uint64_t *handles, uint32_t count) {
+        for (uint32_t offset = 0; (offset < kShardCount) && (offset < count); offset++) {
+            Shard &shard = GetShard(first_id + offset);
+            std::lock_guard<std::mutex> lock(shard.lock);
+            shard.map.reserve(shard.map.size() + count / kShardCount + 1);
+            for (uint32_t i = offset; i < count; i += kShardCount) {
+                if (handles[i]) {
+                    shard.map[first_id + i] = handles[i];
+                }
+            }
+        }
+    }
+
+   private:
+    struct Shard {
+        std::mutex lock;
+        std::unordered_map<uint64_t, uint64_t> map;
+    };
+
+    Shard &GetShard(uint64_t unique_id) { return shards_[unique_id & (kShardCount - 1)]; }
+
+    Shard shards_[kShardCount];
+};
+
+// Slot storage for wrapped handles when google_unique_objects.slab_handles is enabled.  A wrapped handle encodes the slot
+// index in its low 32 bits and the slot's generation in its high 32 bits, so unwrapping is an array index and a
+// generation compare with no hashing or locking.  Freeing a slot bumps its generation, so a stale wrapped handle unwraps
+// to VK_NULL_HANDLE instead of aliasing whichever object reuses the slot.  Generations are never zero, which keeps slab
+// handles apart from the small unique IDs handed out by unique_id_mapping once the slab is full.
+class HandleSlab {
+   public:
+    static const uint32_t kChunkBits = 12;
+    static const uint32_t kChunkSize = 1 << kChunkBits;
+    static const uint32_t kMaxChunks = 1 << 14;
+
+    HandleSlab() : next_index_(0) {
+        for (uint32_t i = 0; i < kMaxChunks; i++) {
+            chunks_[i].store(nullptr, std::memory_order_relaxed);
+        }
+    }
+
+    ~HandleSlab() {
+        for (uint32_t i = 0; i < kMaxChunks; i++) {
+            delete[] chunks_[i].load(std::memory_order_relaxed);
+        }
+    }
+
+    // Store handle in a free slot and return the wrapped handle for it, or 0 if the slab is full
+    uint64_t Insert(uint64_t handle) {
+        std::lock_guard<std::mutex> lock(alloc_lock_);
+        return InsertLocked(handle);
+    }
+
+    // Replace each non-zero handle in the array with a wrapped handle, taking the allocation lock once.  Returns the
+    // number of leading elements processed, which is less than count if the slab filled up.
+    uint32_t InsertRange(uint64_t *handles, uint32_t count) {
+        std::lock_guard<std::mutex> lock(alloc_lock_);
+        for (uint32_t i = 0; i < count; i++) {
+            if (handles[i]) {
+                uint64_t wrapped_handle = InsertLocked(handles[i]);
+                if (!wrapped_handle) return i;
+                handles[i] = wrapped_handle;
+            }
+        }
+        return count;
+    }
+
+    // Return the handle stored for wrapped_handle, or 0 if the wrapped handle is unknown or stale
+    uint64_t Find(uint64_t wrapped_handle) const {
+        const Slot *slot = FindSlot(wrapped_handle);
+        return slot ? slot->handle.load(std::memory_order_relaxed) : 0;
+    }
+
+    // Release the slot for wrapped_handle and return the handle it stored, or 0 if the wrapped handle is unknown or stale
+    uint64_t Remove(uint64_t wrapped_handle) {
+        std::lock_guard<std::mutex> lock(alloc_lock_);
+        Slot *slot = const_cast<Slot *>(FindSlot(wrapped_handle));
+        if (!slot) return 0;
+        uint64_t handle = slot->handle.load(std::memory_order_relaxed);
+        uint32_t generation = slot->generation.load(std::memory_order_relaxed) + 1;
+        slot->generation.store(generation ? generation : 1, std::memory_order_release);
+        free_slots_.push_back(static_cast<uint32_t>(wrapped_handle));
+        return handle;
+    }
+
+   private:
+    // The driver's handle can use all 64 bits, so the generation cannot be packed into the same word and each slot
+    // takes 16 bytes once padded.  Keeping both in one slot means an unwrap touches a single cache line.
+    struct Slot {
+        std::atomic<uint64_t> handle;
+        std::atomic<uint32_t> generation;
+    };
+
+    // Must hold alloc_lock_
+    uint64_t InsertLocked(uint64_t handle) {
+        uint32_t index;
+        if (!free_slots_.empty()) {
+            index = free_slots_.back();
+            free_slots_.pop_back();
+        } else {
+            uint32_t chunk = next_index_ >> kChunkBits;
+            if (chunk >= kMaxChunks) return 0;
+            index = next_index_++;
+            if (!chunks_[chunk].load(std::memory_order_relaxed)) {
+                Slot *slots = new Slot[kChunkSize]();
+                for (uint32_t i = 0; i < kChunkSize; i++) {
+                    // Generation zero is never handed out, so no wrapped handle is ever VK_NULL_HANDLE
+                    slots[i].generation.store(1, std::memory_order_relaxed);
+                }
+                chunks_[chunk].store(slots, std::memory_order_release);
+            }
+        }
+        Slot &slot = GetSlot(index);
+        slot.handle.store(handle, std::memory_order_relaxed);
+        uint32_t generation = slot.generation.load(std::memory_order_relaxed);
+        return (static_cast<uint64_t>(generation) << 32) | index;
+    }
+
+    Slot &GetSlot(uint32_t index) {
+        return chunks_[index >> kChunkBits].load(std::memory_order_relaxed)[index & (kChunkSize - 1)];
+    }
+
+    const Slot *FindSlot(uint64_t wrapped_handle) const {
+        uint32_t index = static_cast<uint32_t>(wrapped_handle);
+        uint32_t chunk = index >> kChunkBits;
+        if (chunk >= kMaxChunks) return nullptr;
+        const Slot *slots = chunks_[chunk].load(std::memory_order_acquire);
+        if (!slots) return nullptr;
+        const Slot *slot = &slots[index & (kChunkSize - 1)];
+        if (slot->generation.load(std::memory_order_acquire) != static_cast<uint32_t>(wrapped_handle >> 32)) return nullptr;
+        return slot;
+    }
+
+    std::atomic<Slot *> chunks_[kMaxChunks];
+    std::mutex alloc_lock_;
+    std::vector<uint32_t> free_slots_;
+    uint32_t next_index_;
+};
+
+static std::atomic<uint64_t> global_unique_id(1);
+static UniqueIdMap unique_id_mapping;  // Map uniqueID to actual object handle
+
+// Set from google_unique_objects.slab_handles when the first instance is created, before any handle is wrapped
+static bool slab_handles_enabled = false;
+static HandleSlab handle_slab;
+
+// A run of count elements of size bytes each in descriptor update template data, starting at offset and stride bytes apart
+struct TEMPLATE_RANGE {
+    size_t offset;
+    size_t stride;
+    uint32_t count;
+    size_t size;
+};
+
+// A descriptor update template compiled at creation into the ranges of the application's data an update copies, and
+// the handle slots inside them which are unwrapped in the copy
 struct TEMPLATE_STATE {
     VkDescriptorUpdateTemplateKHR desc_update_template;
-    safe_VkDescriptorUpdateTemplateCreateInfo create_info;
+    std::vector<TEMPLATE_RANGE> copy_ranges;
+    std::vector<TEMPLATE_RANGE> handle_slots;
+    size_t data_size;
 
-    TEMPLATE_STATE(VkDescriptorUpdateTemplateKHR update_template, safe_VkDescriptorUpdateTemplateCreateInfo *pCreateInfo)
-        : desc_update_template(update_template), create_info(*pCreateInfo) {}
+    TEMPLATE_STATE(VkDescriptorUpdateTemplateKHR update_template) : desc_update_template(update_template), data_size(0) {}
+
+    void AddCopyRange(const VkDescriptorUpdateTemplateEntry &entry, size_t element_size) {
+        if (entry.descriptorCount == 0) return;
+        TEMPLATE_RANGE range = {entry.offset, entry.stride, entry.descriptorCount, element_size};
+        copy_ranges.push_back(range);
+        data_size = std::max(data_size, entry.offset + (entry.descriptorCount - 1) * entry.stride + element_size);
+    }
+
+    void AddHandleSlots(const VkDescriptorUpdateTemplateEntry &entry, size_t handle_offset) {
+        if (entry.descriptorCount == 0) return;
+        TEMPLATE_RANGE slots = {entry.offset + handle_offset, entry.stride, entry.descriptorCount, sizeof(uint64_t)};
+        handle_slots.push_back(slots);
+    }
 };
 
 struct instance_layer_data {
@@ -75,24 +284,106 @@ struct layer_data {
     bool wsi_enabled;
     VkPhysicalDevice gpu;
 
-    struct SubpassesUsageStates {
-        std::unordered_set<uint32_t> subpasses_using_color_attachment;
-        std::unordered_set<uint32_t> subpasses_using_depthstencil_attachment;
-    };
-    // Uses unwrapped handles
-    std::unordered_map<VkRenderPass, SubpassesUsageStates> renderpasses_states;
+    // Set when device-level handles are handed out unwrapped; only instance-level handles are then translated
+    bool passthrough;
 
     // Map of wrapped swapchain handles to arrays of wrapped swapchain image IDs
     // Each swapchain has an immutable list of wrapped swapchain image IDs -- always return these IDs if they exist
     std::unordered_map<VkSwapchainKHR, std::vector<VkImage>> swapchain_wrapped_image_handle_map;
 
-    layer_data() : wsi_enabled(false), gpu(VK_NULL_HANDLE){};
+    layer_data() : wsi_enabled(false), gpu(VK_NULL_HANDLE), passthrough(false){};
 };
 
 static std::unordered_map<void *, instance_layer_data *> instance_layer_data_map;
 static std::unordered_map<void *, layer_data *> layer_data_map;
 
-static std::mutex global_lock;  // Protect map accesses and unique_id increments
+static std::mutex global_lock;  // Protect per-device layer_data maps; unique_id_mapping is internally synchronized
+
+// Per-thread bump arena for the short-lived copies the generated wrappers make of structs and handle arrays before
+// calling down the chain.  Kept trivially constructible so it can live in THREAD_LOCAL_DECL storage.
+struct LocalCopyArena {
+    static const size_t kCapacity = 8 * 1024;
+    static const size_t kAlignment = sizeof(uint64_t);
+
+    uint64_t storage[kCapacity / sizeof(uint64_t)];
+    size_t used;
+
+    // Return size bytes of arena storage, or nullptr if they do not fit and the caller must use the heap
+    void *Allocate(size_t size) {
+        size_t aligned_size = (size + kAlignment - 1) & ~(kAlignment - 1);
+        if (aligned_size > kCapacity - used) return nullptr;
+        void *memory = reinterpret_cast<char *>(storage) + used;
+        used += aligned_size;
+        return memory;
+    }
+
+    bool Contains(const void *memory) const {
+        const char *begin = reinterpret_cast<const char *>(storage);
+        return (memory >= begin) && (memory < begin + kCapacity);
+    }
+};
+
+static THREAD_LOCAL_DECL LocalCopyArena local_copy_arena;
+
+// Releases everything allocated from the calling thread's arena during the enclosing wrapper call
+class LocalCopyScope {
+   public:
+    LocalCopyScope() : mark_(local_copy_arena.used) {}
+    ~LocalCopyScope() { local_copy_arena.used = mark_; }
+
+    // Return uninitialized storage for count trivially copyable T's which lives until this scope exits
+    template <typename T>
+    T *Allocate(size_t count) {
+        void *memory = local_copy_arena.Allocate(sizeof(T) * count);
+        if (!memory) {
+            heap_copies_.emplace_back(new char[sizeof(T) * count]);
+            memory = heap_copies_.back().get();
+        }
+        return static_cast<T *>(memory);
+    }
+
+   private:
+    size_t mark_;
+    std::vector<std::unique_ptr<char[]>> heap_copies_;
+};
+
+// Construct a local copy in the calling thread's arena, falling back to the heap when the arena is full
+template <typename T, typename Arg>
+T *NewLocal(const Arg &arg) {
+    void *memory = local_copy_arena.Allocate(sizeof(T));
+    return memory ? new (memory) T(arg) : new T(arg);
+}
+
+template <typename T>
+T *NewLocalArray(size_t count) {
+    T *array = static_cast<T *>(local_copy_arena.Allocate(sizeof(T) * count));
+    if (!array) return new T[count];
+    for (size_t i = 0; i < count; i++) {
+        new (&array[i]) T();
+    }
+    return array;
+}
+
+// Destroy a copy made by NewLocal; arena storage itself is reclaimed by the enclosing LocalCopyScope
+template <typename T>
+void DeleteLocal(T *object) {
+    if (local_copy_arena.Contains(object)) {
+        object->~T();
+    } else {
+        delete object;
+    }
+}
+
+template <typename T>
+void DeleteLocalArray(T *array, size_t count) {
+    if (local_copy_arena.Contains(array)) {
+        for (size_t i = 0; i < count; i++) {
+            array[i].~T();
+        }
+    } else {
+        delete[] array;
+    }
+}
 
 struct GenericHeader {
     VkStructureType sType;
@@ -116,20 +407,56 @@ bool ContainsExtStruct(const T *target, VkStructureType ext_type) {
     return false;
 }
 
+// Slab handles carry a non-zero generation in their high 32 bits.  Anything else is a unique ID from unique_id_mapping.
+static inline bool IsSlabHandle(uint64_t wrapped_handle) { return slab_handles_enabled && (wrapped_handle >> 32) != 0; }
+
 /* Unwrap a handle. */
-// must hold lock!
 template <typename HandleType>
 HandleType Unwrap(HandleType wrappedHandle) {
-    // TODO: don't use operator[] here.
-    return (HandleType)unique_id_mapping[reinterpret_cast<uint64_t const &>(wrappedHandle)];
+    uint64_t unique_id = reinterpret_cast<uint64_t const &>(wrappedHandle);
+    return (HandleType)(IsSlabHandle(unique_id) ? handle_slab.Find(unique_id) : unique_id_mapping.find(unique_id));
 }
 
-// Wrap a newly created handle with a new unique ID, and return the new ID -- must hold lock!
+// Wrap a newly created handle with a new unique ID, and return the new ID
 template <typename HandleType>
 HandleType WrapNew(HandleType newlyCreatedHandle) {
+    uint64_t handle = reinterpret_cast<uint64_t const &>(newlyCreatedHandle);
+    if (slab_handles_enabled) {
+        uint64_t wrapped_handle = handle_slab.Insert(handle);
+        // Once the slab is full, fall back to a unique ID
+        if (wrapped_handle) return (HandleType)wrapped_handle;
+    }
     auto unique_id = global_unique_id++;
-    unique_id_mapping[unique_id] = reinterpret_cast<uint64_t const &>(newlyCreatedHandle);
+    unique_id_mapping.insert(unique_id, handle);
     return (HandleType)unique_id;
 }
 
+// Wrap an array of newly created handles in one pass, allocating a contiguous range of unique IDs.  VK_NULL_HANDLE
+// entries are left as they are.
+template <typename HandleType>
+void WrapNewArray(HandleType *handles, uint32_t count) {
+    uint64_t *unique_ids = reinterpret_cast<uint64_t *>(handles);
+    if (slab_handles_enabled) {
+        uint32_t wrapped_count = handle_slab.InsertRange(unique_ids, count);
+        if (wrapped_count == count) return;
+        // Once the slab is full, fall back to unique IDs for the rest of the array
+        unique_ids += wrapped_count;
+        count -= wrapped_count;
+    }
+    uint64_t first_id = global_unique_id.fetch_add(count);
+    unique_id_mapping.insert_range(first_id, unique_ids, count);
+    for (uint32_t i = 0; i < count; i++) {
+        if (unique_ids[i]) {
+            unique_ids[i] = first_id + i;
+        }
+    }
+}
+
+// Remove a wrapped handle from the map and return the handle it wrapped
+template <typename HandleType>
+HandleType UnwrapAndErase(HandleType wrappedHandle) {
+    uint64_t unique_id = reinterpret_cast<uint64_t const &>(wrappedHandle);
+    return (HandleType)(IsSlabHandle(unique_id) ? handle_slab.Remove(unique_id) : unique_id_mapping.pop(unique_id));
+}
+
 }  // namespace unique_objects
@@ -83,6 +83,13 @@ def makeGenOpts(args):
     # Output target directory
     directory = args.directory
 
+    # Handle types the object tracker leaves untracked, or the only ones it tracks
+    excludeHandleTypes = args.excludeHandleTypes
+    includeHandleTypes = args.includeHandleTypes if len(args.includeHandleTypes) > 0 else None
+
+    # Whether unique objects shallow copies struct parameters, replacing only members leading to handles
+    minimalStructCopy = not args.fullStructCopy
+
     # Descriptive names for various regexp patterns used to select
     # versions and extensions
     allFeatures     = allExtensions = '.*'
@@ -192,7 +199,8 @@ def makeGenOpts(args):
             apientry          = 'VKAPI_CALL ',
             apientryp         = 'VKAPI_PTR *',
             alignFuncParam    = 48,
-            expandEnumerants = False)
+            expandEnumerants = False,
+            minimalStructCopy = minimalStructCopy)
         ]
 
     # Options for object_tracker layer
@@ -215,7 +223,9 @@ def makeGenOpts(args):
             apientry          = 'VKAPI_CALL ',
             apientryp         = 'VKAPI_PTR *',
             alignFuncParam    = 48,
-            expandEnumerants = False)
+            expandEnumerants = False,
+            excludeHandleTypes = excludeHandleTypes,
+            includeHandleTypes = includeHandleTypes)
         ]
 
     # Options for dispatch table helper generator
@@ -465,6 +475,14 @@ if __name__ == '__main__':
     parser.add_argument('-feature', action='append',
                         default=[],
                         help='Specify a core API feature name or names to add to targets')
+    parser.add_argument('-excludeHandleTypes', action='append',
+                        default=[],
+                        help='Specify a non-dispatchable handle type or types the object tracker does not track')
+    parser.add_argument('-includeHandleTypes', action='append',
+                        default=[],
+                        help='Specify the only non-dispatchable handle type or types the object tracker tracks')
+    parser.add_argument('-fullStructCopy', action='store_true',
+                        help='Deep copy whole struct parameters in unique objects wrappers instead of only the members with handles')
     parser.add_argument('-debug', action='store_true',
                         help='Enable debugging')
     parser.add_argument('-dump', action='store_true',
@@ -501,6 +519,8 @@ if __name__ == '__main__':
     # This splits arguments which are space-separated lists
     args.feature = [name for arg in args.feature for name in arg.split()]
     args.extension = [name for arg in args.extension for name in arg.split()]
+    args.excludeHandleTypes = [name for arg in args.excludeHandleTypes for name in arg.split()]
+    args.includeHandleTypes = [name for arg in args.includeHandleTypes for name in arg.split()]
 
     # Load & parse registry
     reg = Registry()
@@ -62,6 +62,10 @@ from io import open
 #     parameter on a separate line
 #   alignFuncParam - if nonzero and parameters are being put on a
 #     separate line, align parameter names at the specified column
+#   excludeHandleTypes - list of non-dispatchable handle types (e.g.
+#     'VkDescriptorSet') which the generated layer does not track
+#   includeHandleTypes - if not None, list of the only non-dispatchable
+#     handle types which the generated layer tracks
 class ObjectTrackerGeneratorOptions(GeneratorOptions):
     def __init__(self,
                  filename = None,
@@ -85,7 +89,9 @@ class ObjectTrackerGeneratorOptions(GeneratorOptions):
                  indentFuncProto = True,
                  indentFuncPointer = False,
                  alignFuncParam = 0,
-                 expandEnumerants = True):
+                 expandEnumerants = True,
+                 excludeHandleTypes = None,
+                 includeHandleTypes = None):
         GeneratorOptions.__init__(self, filename, directory, apiname, profile,
                                   versions, emitversions, defaultExtensions,
                                   addExtensions, removeExtensions, emitExtensions, sortProcedure)
@@ -100,6 +106,8 @@ class ObjectTrackerGeneratorOptions(GeneratorOptions):
         self.indentFuncPointer = indentFuncPointer
         self.alignFuncParam  = alignFuncParam
         self.expandEnumerants = expandEnumerants
+        self.excludeHandleTypes = excludeHandleTypes
+        self.includeHandleTypes = includeHandleTypes
 
 
 # ObjectTrackerOutputGenerator - subclass of OutputGenerator.
@@ -243,6 +251,7 @@ class ObjectTrackerOutputGenerator(OutputGenerator):
                                        # A sister-struct may contain no handles but shares <validextensionstructs> with one that does
         self.structTypes = dict()      # Map of Vulkan struct typename to required VkStructureType
         self.struct_member_dict = dict()
+        self.recording_memo = False    # True while generating a vkCmd* wrapper, whose checks go through the command buffer memo
         # Named tuples to store struct and command data
         self.StructType = namedtuple('StructType', ['name', 'value'])
         self.CmdMemberData = namedtuple('CmdMemberData', ['name', 'members'])
@@ -251,6 +260,7 @@ class ObjectTrackerOutputGenerator(OutputGenerator):
         self.CommandParam = namedtuple('CommandParam', ['type', 'name', 'ispointer', 'isconst', 'isoptional', 'iscount', 'len', 'extstructs', 'cdecl', 'islocal', 'iscreate', 'isdestroy', 'feature_protect'])
         self.StructMemberData = namedtuple('StructMemberData', ['name', 'members'])
         self.object_types = []         # List of all handle types
+        self.untracked_types = set()   # Handle types excluded from tracking by the generator options
         self.valid_vuids = set()       # Set of all valid VUIDs
         self.vuid_file = None
         # Cover cases where file is built from scripts directory, Lin/Win, or Android build structure
@@ -344,10 +354,13 @@ class ObjectTrackerOutputGenerator(OutputGenerator):
     def GenReportFunc(self):
         output_func = ''
         output_func += 'void ReportUndestroyedObjects(VkDevice device, enum UNIQUE_VALIDATION_ERROR_CODE error_code) {\n'
-        output_func += '    DeviceReportUndestroyedObjects(device, kVulkanObjectTypeCommandBuffer, error_code);\n'
+        output_func += '    static const VulkanObjectType leak_checked_types[] = {\n'
+        output_func += '        kVulkanObjectTypeCommandBuffer,\n'
         for handle in self.object_types:
-            if self.isHandleTypeNonDispatchable(handle):
-                output_func += '    DeviceReportUndestroyedObjects(device, %s, error_code);\n' % (self.GetVulkanObjType(handle))
+            if self.isHandleTypeNonDispatchable(handle) and handle not in self.untracked_types:
+                output_func += '        %s,\n' % (self.GetVulkanObjType(handle))
+        output_func += '    };\n'
+        output_func += '    ReportLeakedObjects(device, leak_checked_types, sizeof(leak_checked_types) / sizeof(leak_checked_types[0]), error_code);\n'
         output_func += '}\n'
         return output_func
 
@@ -358,15 +371,50 @@ class ObjectTrackerOutputGenerator(OutputGenerator):
         output_func += 'void DestroyUndestroyedObjects(VkDevice device) {\n'
         output_func += '    DeviceDestroyUndestroyedObjects(device, kVulkanObjectTypeCommandBuffer);\n'
         for handle in self.object_types:
-            if self.isHandleTypeNonDispatchable(handle):
+            if self.isHandleTypeNonDispatchable(handle) and handle not in self.untracked_types:
                 output_func += '    DeviceDestroyUndestroyedObjects(device, %s);\n' % (self.GetVulkanObjType(handle))
         output_func += '}\n'
         return output_func
 
+    #
+    # Generate the query for handle types which were excluded from tracking at generation time
+    def GenTrackedTypeFunc(self):
+        output_func = ''
+        if not self.untracked_types:
+            output_func += 'bool IsObjectTypeTracked(VulkanObjectType) { return true; }\n'
+            return output_func
+        output_func += 'bool IsObjectTypeTracked(VulkanObjectType object_type) {\n'
+        output_func += '    switch (object_type) {\n'
+        for handle in sorted(self.untracked_types):
+            output_func += '        case %s:\n' % self.GetVulkanObjType(handle)
+        output_func += '            return false;\n'
+        output_func += '        default:\n'
+        output_func += '            return true;\n'
+        output_func += '    }\n'
+        output_func += '}\n'
+        return output_func
+
+    #
+    # Work out which handle types the generator options exclude from tracking
+    def GetUntrackedTypes(self, genOpts):
+        handle_types = [elem.find('name').text for elem in self.registry.tree.findall("types/type[@category='handle']") if elem.find('name') is not None]
+        requested = (genOpts.excludeHandleTypes or []) + (genOpts.includeHandleTypes or [])
+        for handle in requested:
+            if handle not in handle_types:
+                raise Exception('Unknown handle type ' + handle)
+            # Dispatchable objects are tracked by hand-written code the rest of the layer depends on
+            if not self.isHandleTypeNonDispatchable(handle):
+                raise Exception('Dispatchable handle type ' + handle + ' cannot be excluded from tracking')
+        untracked = set(genOpts.excludeHandleTypes or [])
+        if genOpts.includeHandleTypes is not None:
+            untracked |= set([handle for handle in handle_types if self.isHandleTypeNonDispatchable(handle) and handle not in genOpts.includeHandleTypes])
+        return untracked
+
     #
     # Called at beginning of processing as file is opened
     def beginFile(self, genOpts):
         OutputGenerator.beginFile(self, genOpts)
+        self.untracked_types = self.GetUntrackedTypes(genOpts)
         # Open vk_validation_error_messages.h file to verify computed VUIDs
         for line in self.vuid_file:
             # Grab hex number from enum definition
@@ -428,6 +476,8 @@ class ObjectTrackerOutputGenerator(OutputGenerator):
         write('// ObjectTracker undestroyed objects validation function', file=self.outFile)
         write('%s' % report_func, file=self.outFile)
         write('%s' % destroy_func, file=self.outFile)
+        write('// Handle types excluded from tracking when this file was generated', file=self.outFile)
+        write('%s' % self.GenTrackedTypeFunc(), file=self.outFile)
         # Actually write the interface to the output file.
         if (self.emit):
             self.newline()
@@ -441,6 +491,8 @@ class ObjectTrackerOutputGenerator(OutputGenerator):
             else:
                 self.newline()
 
+        # Layer-specific entry points, which are not in the registry
+        self.intercepts += [ '    {"vkGetObjectCountsLUNARG", (void*)GetObjectCountsLUNARG},' ]
         # Record intercepted procedures
         write('// Map of all APIs to be intercepted by this layer', file=self.outFile)
         write('const std::unordered_map<std::string, void*> name_to_funcptr_map = {', file=self.outFile)
@@ -510,6 +562,9 @@ class ObjectTrackerOutputGenerator(OutputGenerator):
     #
     # Check if a parent object is dispatchable or not
     def isHandleTypeObject(self, handletype):
+        # Handle types excluded from tracking get no create, destroy or validation code
+        if handletype in self.untracked_types:
+            return False
         handle = self.registry.tree.find("types/type/[name='" + handletype + "'][@category='handle']")
         if handle is not None:
             return True
@@ -611,9 +666,13 @@ class ObjectTrackerOutputGenerator(OutputGenerator):
                                                  feature_protect=self.featureExtraProtect))
         self.structMembers.append(self.StructMemberData(name=typeName, members=membersInfo))
     #
-    # Insert a lock_guard line
+    # Insert a lock_guard line.  Validation only reads the object maps, so it takes the lock shared.
     def lock_guard(self, indent):
-        return '%sstd::lock_guard<std::mutex> lock(global_lock);\n' % indent
+        return '%sReadLockGuard lock(global_lock);\n' % indent
+    #
+    # Insert an exclusive lock_guard line, for code which creates or destroys objects
+    def write_lock_guard(self, indent):
+        return '%sstd::lock_guard<ReadWriteLock> lock(global_lock);\n' % indent
     #
     # Determine if a struct has an object as a member or an embedded member
     def struct_contains_object(self, struct_item):
@@ -695,7 +754,7 @@ class ObjectTrackerOutputGenerator(OutputGenerator):
             handle_name = params[-1].find('name')
             create_obj_code += '%sif (VK_SUCCESS == result) {\n' % (indent)
             indent = self.incIndent(indent)
-            create_obj_code += '%sstd::lock_guard<std::mutex> lock(global_lock);\n' % (indent)
+            create_obj_code += self.write_lock_guard(indent)
             object_dest = '*%s' % handle_name.text
             if object_array == True:
                 create_obj_code += '%sfor (uint32_t index = 0; index < %s; index++) {\n' % (indent, cmd_info[-1].len)
@@ -726,13 +785,16 @@ class ObjectTrackerOutputGenerator(OutputGenerator):
             nullalloc_vuid = self.manual_vuids.get(nullalloc_vuid_string, "VALIDATION_ERROR_UNDEFINED")
             if self.isHandleTypeObject(cmd_info[param].type) == True:
                 if object_array == True:
-                    # This API is freeing an array of handles -- add loop control
-                    destroy_obj_code += 'HEY, NEED TO DESTROY AN ARRAY\n'
+                    # This API is freeing an array of handles -- destroy them all under a single lock
+                    destroy_obj_code += '%sif (!skip) {\n' % indent
+                    destroy_obj_code += self.write_lock_guard(self.incIndent(indent))
+                    destroy_obj_code += '%s    DestroyObjects(%s, %s, %s, %s, nullptr, %s, %s);\n' % (indent, cmd_info[0].name, cmd_info[param].name, cmd_info[param].len, self.GetVulkanObjType(cmd_info[param].type), compatalloc_vuid, nullalloc_vuid)
+                    destroy_obj_code += '%s}\n' % indent
                 else:
                     # Call Destroy a single time
                     destroy_obj_code += '%sif (skip) return;\n' % indent
                     destroy_obj_code += '%s{\n' % indent
-                    destroy_obj_code += '%s    std::lock_guard<std::mutex> lock(global_lock);\n' % indent
+                    destroy_obj_code += self.write_lock_guard(self.incIndent(indent))
                     destroy_obj_code += '%s    DestroyObject(%s, %s, %s, pAllocator, %s, %s);\n' % (indent, cmd_info[0].name, cmd_info[param].name, self.GetVulkanObjType(cmd_info[param].type), compatalloc_vuid, nullalloc_vuid)
                     destroy_obj_code += '%s}\n' % indent
         return object_array, destroy_obj_code
@@ -750,14 +812,22 @@ class ObjectTrackerOutputGenerator(OutputGenerator):
         if parent_vuid == 'VALIDATION_ERROR_UNDEFINED':
             commonparent_vuid_string = 'VUID-%s-commonparent' % parent_name
             parent_vuid = self.GetVuid(commonparent_vuid_string)
+        # The command buffer being recorded into is looked up once, both to validate it and to fetch its memo
+        if self.recording_memo and top_level and obj_name == disp_name:
+            pre_call_code += '%s    skip |= ValidateRecordingCommandBuffer(%s, &memo, %s, %s);\n' % (indent, disp_name, param_vuid, parent_vuid)
+            return decl_code, pre_call_code, post_call_code
+        # Handles referenced while recording are checked against the command buffer's memo first
+        if self.recording_memo:
+            validate_func = 'ValidateRecordedObject'
+            disp_args = '%s, memo' % disp_name
+        else:
+            validate_func = 'ValidateObject'
+            disp_args = disp_name
         if obj_count is not None:
-            pre_call_code += '%s    for (uint32_t %s = 0; %s < %s; ++%s) {\n' % (indent, index, index, obj_count, index)
-            indent = self.incIndent(indent)
-            pre_call_code += '%s    skip |= ValidateObject(%s, %s%s[%s], %s, %s, %s, %s);\n' % (indent, disp_name, prefix, obj_name, index, self.GetVulkanObjType(obj_type), null_allowed, param_vuid, parent_vuid)
-            indent = self.decIndent(indent)
-            pre_call_code += '%s    }\n' % indent
+            # Check the whole array in one call rather than looping over ValidateObject
+            pre_call_code += '%s    skip |= %ss(%s, %s%s, %s, %s, %s, %s, %s);\n' % (indent, validate_func, disp_args, prefix, obj_name, obj_count, self.GetVulkanObjType(obj_type), null_allowed, param_vuid, parent_vuid)
         else:
-            pre_call_code += '%s    skip |= ValidateObject(%s, %s%s, %s, %s, %s, %s);\n' % (indent, disp_name, prefix, obj_name, self.GetVulkanObjType(obj_type), null_allowed, param_vuid, parent_vuid)
+            pre_call_code += '%s    skip |= %s(%s, %s%s, %s, %s, %s, %s);\n' % (indent, validate_func, disp_args, prefix, obj_name, self.GetVulkanObjType(obj_type), null_allowed, param_vuid, parent_vuid)
         return decl_code, pre_call_code, post_call_code
     #
     # first_level_param indicates if elements are passed directly into the function else they're below a ptr/struct
@@ -848,16 +918,17 @@ class ObjectTrackerOutputGenerator(OutputGenerator):
             param_post_code = ''
             create_func = True if create_obj_code else False
             destroy_func = True if destroy_object_code else False
+            self.recording_memo = proto.text.startswith('vkCmd') and cmd_info[0].type == 'VkCommandBuffer'
             (paramdecl, param_pre_code, param_post_code) = self.validate_objects(cmd_info, indent, '', 0, create_func, destroy_func, destroy_array, disp_name, proto.text, True)
+            if param_pre_code:
+                if self.recording_memo:
+                    param_pre_code = '%s    ValidatedHandleMemo *memo = nullptr;\n%s' % (indent, param_pre_code)
+                param_pre_code = '%s{\n%s%s%s%s}\n' % ('    ', indent, self.lock_guard(indent), param_pre_code, indent)
+            self.recording_memo = False
             param_post_code += create_obj_code
+            # Objects are untracked before the call down the chain, so a driver reusing a freed handle cannot race with it
             if destroy_object_code:
-                if destroy_array == True:
-                    param_post_code += destroy_object_code
-                else:
-                    param_pre_code += destroy_object_code
-            if param_pre_code:
-                if (not destroy_func) or (destroy_array):
-                    param_pre_code = '%s{\n%s%s%s%s}\n' % ('    ', indent, self.lock_guard(indent), param_pre_code, indent)
+                param_pre_code += destroy_object_code
         return paramdecl, param_pre_code, param_post_code
     #
     # Capture command parameter info needed to create, destroy, and validate objects
@@ -163,8 +163,11 @@ class ParameterValidationOutputGenerator(OutputGenerator):
         self.commands = []                                # List of CommandData records for all Vulkan commands
         self.structMembers = []                           # List of StructMemberData records for all Vulkan structs
         self.validatedStructs = dict()                    # Map of structs type names to generated validation code for that struct type
+        self.outOfLineStructs = set()                     # Validated structs checked by a shared ValidateStruct_ function
+        self.pnextIndexFuncs = set()                      # Names of the generated pNext allowed structure type index functions
+        self.structInlineThreshold = 2                    # Structs with at most this many checks are expanded inline instead
         self.enumRanges = dict()                          # Map of enum name to BEGIN/END range values
-        self.enumValueLists = ''                          # String containing enumerated type map definitions
+        self.enumValidators = ''                          # String containing enumerated type validity predicate definitions
         self.func_pointers = ''                           # String containing function pointers for manual PV functions
         self.typedefs = ''                                # String containing function pointer typedefs
         self.flags = set()                                # Map of flags typenames
@@ -299,7 +302,7 @@ class ParameterValidationOutputGenerator(OutputGenerator):
     def endFile(self):
         # C-specific
         self.newline()
-        write(self.enumValueLists, file=self.outFile)
+        write(self.enumValidators, file=self.outFile)
         self.newline()
         write(self.typedefs, file=self.outFile)
         self.newline()
@@ -523,14 +526,64 @@ class ParameterValidationOutputGenerator(OutputGenerator):
             isEnum = ('FLAG_BITS' not in expandPrefix)
             if isEnum:
                 self.enumRanges[groupName] = (expandPrefix + '_BEGIN_RANGE' + expandSuffix, expandPrefix + '_END_RANGE' + expandSuffix)
-                # Create definition for a list containing valid enum values for this enumerated type
-                enum_entry = 'const std::vector<%s> All%sEnums = {' % (groupName, groupName)
-                for enum in groupElem:
-                    name = enum.get('name')
-                    if name is not None and enum.get('supported') != 'disabled':
-                        enum_entry += '%s, ' % name
-                enum_entry += '};\n'
-                self.enumValueLists += enum_entry
+                self.enumValidators += self.makeEnumValidator(groupName, groupElem)
+    #
+    # Return the numeric value of an enumerant, or None if it is an alias or its value cannot be determined
+    def enumValue(self, elem):
+        value = elem.get('value')
+        if value is not None:
+            try:
+                return int(value, 0)
+            except ValueError:
+                return None
+        offset = elem.get('offset')
+        extnumber = elem.get('extnumber')
+        if offset is not None and extnumber is not None:
+            # Extension enumerant values are assigned as specified in Appendix C.10 of the Vulkan specification
+            value = 1000000000 + (int(extnumber) - 1) * 1000 + int(offset)
+            return -value if elem.get('dir') == '-' else value
+        return None
+    #
+    # Generate a predicate returning true for the valid values of an enumerated type.  Runs of consecutive values, such as
+    # the core tokens, become range checks and the remaining values a switch, so no value list is searched at run time.
+    def makeEnumValidator(self, groupName, groupElem):
+        enums = [enum for enum in groupElem.findall('enum') if enum.get('supported') != 'disabled']
+        names = set([enum.get('name') for enum in enums])
+        valued = []
+        unvalued = []
+        for enum in enums:
+            if enum.get('alias') in names:
+                continue
+            value = self.enumValue(enum)
+            if value is None:
+                unvalued.append(enum.get('name'))
+            else:
+                valued.append((value, enum.get('name')))
+        valued.sort()
+        # Split the known values into runs of consecutive values
+        runs = []
+        for value, name in valued:
+            if runs and runs[-1][-1][0] == value - 1:
+                runs[-1].append((value, name))
+            elif not runs or runs[-1][-1][0] != value:
+                runs.append([(value, name)])
+        ranges = [run for run in runs if len(run) > 2]
+        cases = [name for run in runs if len(run) <= 2 for value, name in run] + unvalued
+        validator = 'bool IsValid%s(%s value) {\n' % (groupName, groupName)
+        for run in ranges:
+            validator += '    if ((value >= %s) && (value <= %s)) return true;\n' % (run[0][1], run[-1][1])
+        if cases:
+            validator += '    switch (value) {\n'
+            for name in cases:
+                validator += '        case %s:\n' % name
+            validator += '            return true;\n'
+            validator += '        default:\n'
+            validator += '            return false;\n'
+            validator += '    }\n'
+        else:
+            validator += '    return false;\n'
+        validator += '}\n'
+        return validator
     #
     # Capture command parameter info to be used for param check code generation.
     def genCmd(self, cmdinfo, name, alias):
@@ -778,7 +831,11 @@ class ParameterValidationOutputGenerator(OutputGenerator):
         checkedExpr.append(localIndent + '{\n')
         localIndent = self.incIndent(localIndent)
         for expr in exprs:
-            checkedExpr.append(localIndent + expr)
+            if type(expr) is list:
+                for sub in expr:
+                    checkedExpr.append(localIndent + sub)
+            else:
+                checkedExpr.append(localIndent + expr)
         localIndent = self.decIndent(localIndent)
         checkedExpr.append(localIndent + '}\n')
         return [checkedExpr]
@@ -833,7 +890,26 @@ class ParameterValidationOutputGenerator(OutputGenerator):
             raise('Unsupported parameter validation case: Output handles are not NULL checked')
         return checkExpr
     #
-    # Generate check string for an array of VkFlags values
+    # Generate check string for a VkFlags or FlagBits value.  The mask test is inlined so that valid values take no call,
+    # and validate_flags is only reached to report an error.
+    def makeFlagsCheck(self, prefix, value, flagBitsName, flagsRequired, singleFlag, vuid, funcPrintName, valuePrintName, postProcSpec):
+        allFlags = 'All' + flagBitsName
+        flags = '{}{}'.format(prefix, value.name)
+        conditions = []
+        if flagsRequired == 'true':
+            conditions.append('({} == 0)'.format(flags))
+        conditions.append('(({} & ~{}) != 0)'.format(flags, allFlags))
+        if singleFlag == 'true':
+            conditions.append('(({f} & ({f} - 1)) != 0)'.format(f=flags))
+        checkExpr = []
+        checkExpr.append('if ({})\n'.format(' || '.join(conditions)))
+        checkExpr.append('{\n')
+        checkExpr.append('    skip |= validate_flags(local_data->report_data, "{}", {ppp}"{}"{pps}, "{}", {}, {}, {}, {}, {});\n'.format(funcPrintName, valuePrintName, flagBitsName, allFlags, flags, flagsRequired, singleFlag, vuid, **postProcSpec))
+        checkExpr.append('}\n')
+        return [checkExpr]
+    #
+    # Generate check string for an array of VkFlags values.  The elements are tested in an inlined loop, and
+    # validate_flags_array is only called to report a missing array or an invalid element.
     def makeFlagsArrayCheck(self, prefix, value, lenValue, valueRequired, lenValueRequired, funcPrintName, lenPrintName, valuePrintName, postProcSpec):
         checkExpr = []
         flagBitsName = value.type.replace('Flags', 'FlagBits')
@@ -841,26 +917,69 @@ class ParameterValidationOutputGenerator(OutputGenerator):
             raise('Unsupported parameter validation case: array of reserved VkFlags')
         else:
             allFlags = 'All' + flagBitsName
-            checkExpr.append('skip |= validate_flags_array(local_data->report_data, "{}", {ppp}"{}"{pps}, {ppp}"{}"{pps}, "{}", {}, {pf}{}, {pf}{}, {}, {});\n'.format(funcPrintName, lenPrintName, valuePrintName, flagBitsName, allFlags, lenValue.name, value.name, lenValueRequired, valueRequired, pf=prefix, **postProcSpec))
-        return checkExpr
+            count = '{}{}'.format(prefix, lenValue.name)
+            array = '{}{}'.format(prefix, value.name)
+            indexName = lenValue.name.replace('Count', 'Index')
+            reportCall = 'skip |= validate_flags_array(local_data->report_data, "{}", {ppp}"{}"{pps}, {ppp}"{}"{pps}, "{}", {}, {}, {}, {}, {});\n'.format(funcPrintName, lenPrintName, valuePrintName, flagBitsName, allFlags, count, array, lenValueRequired, valueRequired, **postProcSpec)
+            elementCheck = '(({}[{}] & ~{}) != 0)'.format(array, indexName, allFlags)
+            if valueRequired == 'true':
+                # Elements of a required array may not be 0
+                elementCheck = '({}[{}] == 0) || {}'.format(array, indexName, elementCheck)
+            if lenValueRequired == 'true' or valueRequired == 'true':
+                checkExpr.append('if (({} == 0) || ({} == NULL))\n'.format(count, array))
+                checkExpr.append('{\n')
+                checkExpr.append('    ' + reportCall)
+                checkExpr.append('}\n')
+                checkExpr.append('else\n')
+            else:
+                checkExpr.append('if (({} != 0) && ({} != NULL))\n'.format(count, array))
+            checkExpr.append('{\n')
+            checkExpr.append('    for (uint32_t {i} = 0; {i} < {}; ++{i})\n'.format(count, i=indexName))
+            checkExpr.append('    {\n')
+            checkExpr.append('        if ({})\n'.format(elementCheck))
+            checkExpr.append('        {\n')
+            checkExpr.append('            ' + reportCall)
+            checkExpr.append('            break;\n')
+            checkExpr.append('        }\n')
+            checkExpr.append('    }\n')
+            checkExpr.append('}\n')
+        return [checkExpr]
     #
     # Generate pNext check string
     def makeStructNextCheck(self, prefix, value, funcPrintName, valuePrintName, postProcSpec, struct_type_name):
         checkExpr = []
-        # Generate an array of acceptable VkStructureType values for pNext
-        extStructCount = 0
-        extStructVar = 'NULL'
+        # Generate a predicate mapping each acceptable VkStructureType value for pNext to a small index
+        extStructFunc = 'NULL'
         extStructNames = 'NULL'
         vuid = self.GetVuid("VUID-%s-pNext-pNext" % struct_type_name)
         if value.extstructs:
-            extStructVar = 'allowed_structs_{}'.format(struct_type_name)
-            extStructCount = 'ARRAY_SIZE({})'.format(extStructVar)
+            extStructFunc = 'AllowedPNextIndex_{}'.format(struct_type_name)
             extStructNames = '"' + ', '.join(value.extstructs) + '"'
-            checkExpr.append('const VkStructureType {}[] = {{ {} }};\n'.format(extStructVar, ', '.join([self.getStructType(s) for s in value.extstructs])))
-        checkExpr.append('skip |= validate_struct_pnext(local_data->report_data, "{}", {ppp}"{}"{pps}, {}, {}{}, {}, {}, GeneratedHeaderVersion, {});\n'.format(
-            funcPrintName, valuePrintName, extStructNames, prefix, value.name, extStructCount, extStructVar, vuid, **postProcSpec))
+            if extStructFunc not in self.pnextIndexFuncs:
+                self.pnextIndexFuncs.add(extStructFunc)
+                self.validation.append(self.makePNextIndexFunc(extStructFunc, value.extstructs))
+        checkExpr.append('skip |= validate_struct_pnext(local_data->report_data, "{}", {ppp}"{}"{pps}, {}, {}{}, {}, GeneratedHeaderVersion, {});\n'.format(
+            funcPrintName, valuePrintName, extStructNames, prefix, value.name, extStructFunc, vuid, **postProcSpec))
         return checkExpr
     #
+    # Generate the function returning the position of a structure type in a pNext allowed list, or -1 if it is not allowed
+    def makePNextIndexFunc(self, funcName, extstructs):
+        func = 'int %s(VkStructureType s_type) {\n' % funcName
+        func += '    switch (s_type) {\n'
+        stypes = []
+        for struct in extstructs:
+            stype = self.getStructType(struct)
+            if stype not in stypes:
+                stypes.append(stype)
+        for index, stype in enumerate(stypes):
+            func += '        case %s:\n' % stype
+            func += '            return %d;\n' % index
+        func += '        default:\n'
+        func += '            return -1;\n'
+        func += '    }\n'
+        func += '}\n'
+        return func
+    #
     # Generate the pointer check string
     def makePointerCheck(self, prefix, value, lenValue, valueRequired, lenValueRequired, lenPtrRequired, funcPrintName, lenPrintName, valuePrintName, postProcSpec, struct_type_name):
         checkExpr = []
@@ -915,7 +1034,7 @@ class ParameterValidationOutputGenerator(OutputGenerator):
         if '{postProcPrefix}' in line:
             # If we have a tuple that includes a format string and format parameters, need to use ParameterName class
             if type(memberDisplayNamePrefix) is tuple:
-                kwargs['postProcPrefix'] = 'ParameterName('
+                kwargs['postProcPrefix'] = 'ParameterName(' + postProcSpec['ppr']
             else:
                 kwargs['postProcPrefix'] = postProcSpec['ppp']
         if '{postProcSuffix}' in line:
@@ -930,6 +1049,8 @@ class ParameterValidationOutputGenerator(OutputGenerator):
                 kwargs['postProcInsert'] = '{}{}, '.format(postProcSpec['ppi'], memberDisplayNamePrefix[1])
             else:
                 kwargs['postProcInsert'] = postProcSpec['ppi']
+        if '{postProcParent}' in line:
+            kwargs['postProcParent'] = postProcSpec['ppr']
         if '{funcName}' in line:
             kwargs['funcName'] = funcName
         if '{valuePrefix}' in line:
@@ -963,6 +1084,8 @@ class ParameterValidationOutputGenerator(OutputGenerator):
     #
     # Process struct pointer/array validation code, perfoeming name substitution if required
     def expandStructPointerCode(self, prefix, value, lenValue, funcName, valueDisplayName, postProcSpec):
+        if value.type in self.outOfLineStructs:
+            return self.makeStructValidatorPointerCall(prefix, value, lenValue, funcName, valueDisplayName, postProcSpec)
         expr = []
         expr.append('if ({}{} != NULL)\n'.format(prefix, value.name))
         expr.append('{')
@@ -997,6 +1120,76 @@ class ParameterValidationOutputGenerator(OutputGenerator):
         expr.append('}\n')
         return expr
     #
+    # Flatten nested lists of generated code lines into a single list
+    def flattenLines(self, lines):
+        flat = []
+        for line in lines:
+            if type(line) is list:
+                flat += self.flattenLines(line)
+            else:
+                flat.append(line)
+        return flat
+    #
+    # Generate the shared validation function for a struct type from its member check code.  Member names are built
+    # relative to the caller-supplied struct_name, and the API name is passed in as func_name.
+    def makeStructValidator(self, structName, lines):
+        kwargs = {}
+        kwargs['funcName'] = 'func_name'
+        kwargs['valuePrefix'] = 'value.'
+        kwargs['displayNamePrefix'] = ''
+        kwargs['postProcPrefix'] = 'ParameterName(struct_name, '
+        kwargs['postProcSuffix'] = ')'
+        kwargs['postProcInsert'] = ''
+        kwargs['postProcParent'] = 'struct_name, '
+        func = 'template <typename T>\n'
+        func += 'static bool ValidateStruct_{}(T *local_data, const char *func_name, const ParameterName &struct_name,\n'.format(structName)
+        func += '{}const {} &value) {{\n'.format(' ' * len('static bool ValidateStruct_{}('.format(structName)), structName)
+        func += '    bool skip = false;\n'
+        for line in self.flattenLines(lines):
+            # The API name is a parameter of the generated function rather than a string literal
+            line = line.replace('"{funcName}"', '{funcName}')
+            if any(('{%s}' % key) in line for key in kwargs):
+                # Need to escape the C++ curly braces
+                if 'IndexVector' in line:
+                    line = line.replace('IndexVector{ ', 'IndexVector{{ ')
+                    line = line.replace(' }),', ' }}),')
+                line = line.format(**kwargs)
+            for sub in line.split('\n'):
+                if sub.strip():
+                    func += '    {}\n'.format(sub.rstrip())
+        func += '    return skip;\n'
+        func += '}\n'
+        return func
+    #
+    # Generate the call to a shared struct validation function for a struct pointer or array of structs
+    def makeStructValidatorPointerCall(self, prefix, value, lenValue, funcName, valueDisplayName, postProcSpec):
+        expr = []
+        expr.append('if ({}{} != NULL)\n'.format(prefix, value.name))
+        expr.append('{\n')
+        call = 'skip |= ValidateStruct_{}(local_data, "{}", '.format(value.type, funcName)
+        if lenValue:
+            # Need to process all elements in the array
+            indexName = lenValue.name.replace('Count', 'Index')
+            count = '{}{}{}'.format('*' if lenValue.ispointer else '', prefix, lenValue.name)
+            if value.ispointer == 2:
+                element = '*{}{}[{}]'.format(prefix, value.name, indexName)
+                elementDisplayName = '{}[%i]->'.format(valueDisplayName)
+            else:
+                element = '{}{}[{}]'.format(prefix, value.name, indexName)
+                elementDisplayName = '{}[%i].'.format(valueDisplayName)
+            # Built by concatenation, as the C++ braces must not be taken for format fields here
+            call += 'ParameterName(' + postProcSpec['ppr'] + '"' + elementDisplayName + '", ParameterName::IndexVector{ '
+            call += postProcSpec['ppi'] + indexName + ' }), ' + element + ');\n'
+            expr.append('    for (uint32_t {i} = 0; {i} < {}; ++{i})\n'.format(count, i=indexName))
+            expr.append('    {\n')
+            expr.append('        ' + call)
+            expr.append('    }\n')
+        else:
+            call += '{ppp}"{}->"{pps}, *{}{});\n'.format(valueDisplayName, prefix, value.name, **postProcSpec)
+            expr.append('    ' + call)
+        expr.append('}\n')
+        return expr
+    #
     # Generate the parameter checking code
     def genFuncBody(self, funcName, values, valuePrefix, displayNamePrefix, structTypeName):
         lines = []    # Generated lines of code
@@ -1010,6 +1203,7 @@ class ParameterValidationOutputGenerator(OutputGenerator):
             postProcSpec['ppp'] = '' if not structTypeName else '{postProcPrefix}'
             postProcSpec['pps'] = '' if not structTypeName else '{postProcSuffix}'
             postProcSpec['ppi'] = '' if not structTypeName else '{postProcInsert}'
+            postProcSpec['ppr'] = '' if not structTypeName else '{postProcParent}'
             #
             # Generate the full name of the value, which will be printed in the error message, by adding the variable prefix to the value name
             valueDisplayName = '{}{}'.format(displayNamePrefix, value.name)
@@ -1061,7 +1255,7 @@ class ParameterValidationOutputGenerator(OutputGenerator):
                     elif value.isbool and value.isconst:
                         usedLines.append('skip |= validate_bool32_array(local_data->report_data, "{}", {ppp}"{}"{pps}, {ppp}"{}"{pps}, {pf}{}, {pf}{}, {}, {});\n'.format(funcName, lenDisplayName, valueDisplayName, lenParam.name, value.name, cvReq, req, pf=valuePrefix, **postProcSpec))
                     elif value.israngedenum and value.isconst:
-                        enum_value_list = 'All%sEnums' % value.type
+                        enum_value_list = 'IsValid%s' % value.type
                         usedLines.append('skip |= validate_ranged_enum_array(local_data->report_data, "{}", {ppp}"{}"{pps}, {ppp}"{}"{pps}, "{}", {}, {pf}{}, {pf}{}, {}, {});\n'.format(funcName, lenDisplayName, valueDisplayName, value.type, enum_value_list, lenParam.name, value.name, cvReq, req, pf=valuePrefix, **postProcSpec))
                     elif value.name == 'pNext':
                         # We need to ignore VkDeviceCreateInfo and VkInstanceCreateInfo, as the loader manipulates them in a way that is not documented in vk.xml
@@ -1102,21 +1296,21 @@ class ParameterValidationOutputGenerator(OutputGenerator):
                             else:
                                 flagsRequired = 'true'
                                 vuid = self.GetVuid("VUID-%s-%s-requiredbitmask" % (vuid_name_tag, value.name))
-                            allFlagsName = 'All' + flagBitsName
-                            usedLines.append('skip |= validate_flags(local_data->report_data, "{}", {ppp}"{}"{pps}, "{}", {}, {pf}{}, {}, false, {});\n'.format(funcName, valueDisplayName, flagBitsName, allFlagsName, value.name, flagsRequired, vuid, pf=valuePrefix, **postProcSpec))
+                            usedLines += self.makeFlagsCheck(valuePrefix, value, flagBitsName, flagsRequired, 'false', vuid, funcName, valueDisplayName, postProcSpec)
                     elif value.type in self.flagBits:
                         flagsRequired = 'false' if value.isoptional else 'true'
-                        allFlagsName = 'All' + value.type
                         vuid = self.GetVuid("VUID-%s-%s-parameter" % (vuid_name_tag, value.name))
-                        usedLines.append('skip |= validate_flags(local_data->report_data, "{}", {ppp}"{}"{pps}, "{}", {}, {pf}{}, {}, true, {});\n'.format(funcName, valueDisplayName, value.type, allFlagsName, value.name, flagsRequired, vuid, pf=valuePrefix, **postProcSpec))
+                        usedLines += self.makeFlagsCheck(valuePrefix, value, value.type, flagsRequired, 'true', vuid, funcName, valueDisplayName, postProcSpec)
                     elif value.isbool:
                         usedLines.append('skip |= validate_bool32(local_data->report_data, "{}", {ppp}"{}"{pps}, {}{});\n'.format(funcName, valueDisplayName, valuePrefix, value.name, **postProcSpec))
                     elif value.israngedenum:
                         vuid = self.GetVuid("VUID-%s-%s-parameter" % (vuid_name_tag, value.name))
-                        enum_value_list = 'All%sEnums' % value.type
+                        enum_value_list = 'IsValid%s' % value.type
                         usedLines.append('skip |= validate_ranged_enum(local_data->report_data, "{}", {ppp}"{}"{pps}, "{}", {}, {}{}, {});\n'.format(funcName, valueDisplayName, value.type, enum_value_list, valuePrefix, value.name, vuid, **postProcSpec))
                     # If this is a struct, see if it contains members that need to be checked
-                    if value.type in self.validatedStructs:
+                    if value.type in self.outOfLineStructs:
+                        usedLines.append('skip |= ValidateStruct_{}(local_data, "{}", {ppp}"{}."{pps}, {}{});\n'.format(value.type, funcName, valueDisplayName, valuePrefix, value.name, **postProcSpec))
+                    elif value.type in self.validatedStructs:
                         memberNamePrefix = '{}{}.'.format(valuePrefix, value.name)
                         memberDisplayNamePrefix = '{}.'.format(valueDisplayName)
                         usedLines.append(self.expandStructCode(self.validatedStructs[value.type], funcName, memberNamePrefix, memberDisplayNamePrefix, '', [], postProcSpec))
@@ -1143,6 +1337,10 @@ class ParameterValidationOutputGenerator(OutputGenerator):
             lines, unused = self.genFuncBody('{funcName}', struct.members, '{valuePrefix}', '{displayNamePrefix}', struct.name)
             if lines:
                 self.validatedStructs[struct.name] = lines
+                # Structs with more than a few checks get one shared validation function instead of being expanded at every use
+                if ''.join(self.flattenLines(lines)).count('skip |=') > self.structInlineThreshold:
+                    self.outOfLineStructs.add(struct.name)
+                    self.validation.append(self.makeStructValidator(struct.name, lines))
     #
     # Generate the command param check code from the captured data
     def processCmdData(self):
@@ -127,6 +127,7 @@ class ThreadOutputGenerator(OutputGenerator):
         # Internal state - accumulators for different inner block text
         self.sections = dict([(section, []) for section in self.ALL_SECTIONS])
         self.intercepts = []
+        self.counted_commands = []    # Command names, indexed by their layer_data::command_call_counts slot
 
     # Check if the parameter passed in is a pointer to an array
     def paramIsArray(self, param):
@@ -273,6 +274,11 @@ class ThreadOutputGenerator(OutputGenerator):
         # Finish C++ namespace and multiple inclusion protection
         self.newline()
         # record intercepted procedures
+        write('// Names of the commands counted by the generated intercepts when telemetry is enabled', file=self.outFile)
+        write('static const char *const command_names[] = {', file=self.outFile)
+        write('\n'.join(['    "%s",' % name for name in self.counted_commands]), file=self.outFile)
+        write('};', file=self.outFile)
+        write('static const uint32_t command_count = %d;\n' % len(self.counted_commands), file=self.outFile)
         write('// Map of all APIs to be intercepted by this layer', file=self.outFile)
         write('static const std::unordered_map<std::string, void*> name_to_funcptr_map = {', file=self.outFile)
         write('\n'.join(self.intercepts), file=self.outFile)
@@ -435,17 +441,21 @@ class ThreadOutputGenerator(OutputGenerator):
         else:
             assignresult = ''
 
+        self.appendSection('command', '    countCall(my_data, %d);' % len(self.counted_commands))
+        self.counted_commands.append(name)
+        self.appendSection('command', '    static THREAD_LOCAL_DECL uint32_t sample_count = 0;')
         self.appendSection('command', '    bool threadChecks = startMultiThread();')
-        self.appendSection('command', '    if (threadChecks) {')
+        self.appendSection('command', '    bool trackUse = threadChecks && sampleThreadUse(&sample_count);')
+        self.appendSection('command', '    if (trackUse) {')
         self.appendSection('command', "    "+"\n    ".join(str(startthreadsafety).rstrip().split("\n")))
         self.appendSection('command', '    }')
         params = cmdinfo.elem.findall('param/name')
         paramstext = ','.join([str(param.text) for param in params])
         API = cmdinfo.elem.attrib.get('name').replace('vk','pTable->',1)
         self.appendSection('command', '    ' + assignresult + API + '(' + paramstext + ');')
-        self.appendSection('command', '    if (threadChecks) {')
+        self.appendSection('command', '    if (trackUse) {')
         self.appendSection('command', "    "+"\n    ".join(str(finishthreadsafety).rstrip().split("\n")))
-        self.appendSection('command', '    } else {')
+        self.appendSection('command', '    } else if (!threadChecks) {')
         self.appendSection('command', '        finishMultiThread();')
         self.appendSection('command', '    }')
         # Return result variable, if any.
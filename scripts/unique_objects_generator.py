@@ -34,6 +34,8 @@ from common_codegen import *
 # Additional members
 #   prefixText - list of strings to prefix generated header with
 #     (usually a copyright statement + calling convention macros).
+#   minimalStructCopy - if True, struct parameters containing NDOs are shallow copied and only
+#     the members leading to NDOs are replaced; if False, the whole struct tree is deep copied
 #   protectFile - True if multiple inclusion protection should be
 #     generated (based on the filename) around the entire header.
 #   protectFeature - True if #ifndef..#endif protection should be
@@ -82,7 +84,8 @@ class UniqueObjectsGeneratorOptions(GeneratorOptions):
                  indentFuncProto = True,
                  indentFuncPointer = False,
                  alignFuncParam = 0,
-                 expandEnumerants = True):
+                 expandEnumerants = True,
+                 minimalStructCopy = True):
         GeneratorOptions.__init__(self, filename, directory, apiname, profile,
                                   versions, emitversions, defaultExtensions,
                                   addExtensions, removeExtensions, emitExtensions, sortProcedure)
@@ -97,6 +100,7 @@ class UniqueObjectsGeneratorOptions(GeneratorOptions):
         self.indentFuncPointer = indentFuncPointer
         self.alignFuncParam   = alignFuncParam
         self.expandEnumerants = expandEnumerants
+        self.minimalStructCopy = minimalStructCopy
 
 
 # UniqueObjectsOutputGenerator - subclass of OutputGenerator.
@@ -123,6 +127,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
         OutputGenerator.__init__(self, errFile, warnFile, diagFile)
         self.INDENT_SPACES = 4
         self.intercepts = []
+        self.passthrough_commands = []
         self.instance_extensions = []
         self.device_extensions = []
         # Commands which are not autogenerated but still intercepted
@@ -152,11 +157,34 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
             'vkCmdPushDescriptorSetWithTemplateKHR',
             'vkDebugMarkerSetObjectTagEXT',
             'vkDebugMarkerSetObjectNameEXT',
-            'vkCreateRenderPass',
-            'vkDestroyRenderPass',
             'vkSetDebugUtilsObjectNameEXT',
             'vkSetDebugUtilsObjectTagEXT',
             ]
+        # Hand-written device commands which only wrap and unwrap device-level handles, so devices in pass-through mode
+        # can bypass them like the generated wrappers
+        self.passthrough_manual_commands = [
+            'vkCreateComputePipelines',
+            'vkCreateGraphicsPipelines',
+            'vkGetSwapchainImagesKHR',
+            'vkDestroySwapchainKHR',
+            'vkQueuePresentKHR',
+            'vkCreateDescriptorUpdateTemplate',
+            'vkCreateDescriptorUpdateTemplateKHR',
+            'vkDestroyDescriptorUpdateTemplate',
+            'vkDestroyDescriptorUpdateTemplateKHR',
+            'vkUpdateDescriptorSetWithTemplate',
+            'vkUpdateDescriptorSetWithTemplateKHR',
+            'vkCmdPushDescriptorSetWithTemplateKHR',
+            ]
+        # Non-dispatchable handle types owned by the instance rather than a device.  These stay wrapped on devices in
+        # pass-through mode, so device commands taking them are always intercepted.
+        self.instance_handle_types = [
+            'VkSurfaceKHR',
+            'VkDisplayKHR',
+            'VkDisplayModeKHR',
+            'VkDebugReportCallbackEXT',
+            'VkDebugUtilsMessengerEXT',
+            ]
         # Commands shadowed by interface functions and are not implemented
         self.interface_functions = [
             'vkGetPhysicalDeviceDisplayPropertiesKHR',
@@ -173,6 +201,21 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
             'vkDestroyDebugUtilsMessengerEXT',
             'vkSubmitDebugUtilsMessageEXT',
             ]
+        # Struct pointer members which are ignored, and may be invalid, unless the struct's descriptorType selects them
+        image_descriptor_types = ['VK_DESCRIPTOR_TYPE_SAMPLER', 'VK_DESCRIPTOR_TYPE_COMBINED_IMAGE_SAMPLER',
+                                  'VK_DESCRIPTOR_TYPE_SAMPLED_IMAGE', 'VK_DESCRIPTOR_TYPE_STORAGE_IMAGE',
+                                  'VK_DESCRIPTOR_TYPE_INPUT_ATTACHMENT']
+        self.descriptor_type_members = {
+            'VkWriteDescriptorSet' : {
+                'pImageInfo' : image_descriptor_types,
+                'pBufferInfo' : ['VK_DESCRIPTOR_TYPE_UNIFORM_BUFFER', 'VK_DESCRIPTOR_TYPE_STORAGE_BUFFER',
+                                 'VK_DESCRIPTOR_TYPE_UNIFORM_BUFFER_DYNAMIC', 'VK_DESCRIPTOR_TYPE_STORAGE_BUFFER_DYNAMIC'],
+                'pTexelBufferView' : ['VK_DESCRIPTOR_TYPE_UNIFORM_TEXEL_BUFFER', 'VK_DESCRIPTOR_TYPE_STORAGE_TEXEL_BUFFER'],
+                },
+            'VkDescriptorSetLayoutBinding' : {
+                'pImmutableSamplers' : ['VK_DESCRIPTOR_TYPE_SAMPLER', 'VK_DESCRIPTOR_TYPE_COMBINED_IMAGE_SAMPLER'],
+                },
+            }
         self.headerVersion = None
         # Internal state - accumulators for different inner block text
         self.sections = dict([(section, []) for section in self.ALL_SECTIONS])
@@ -236,6 +279,8 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
         self.newline()
         write('// Unique Objects pNext extension handling function', file=self.outFile)
         write('%s' % extension_proc, file=self.outFile)
+        # Build and write out the descriptor update template compiler
+        write('%s' % self.build_template_compiler_func(), file=self.outFile)
 
         # Actually write the interface to the output file.
         if (self.emit):
@@ -255,6 +300,10 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
         write('static const std::unordered_map<std::string, void*> name_to_funcptr_map = {', file=self.outFile)
         write('\n'.join(self.intercepts), file=self.outFile)
         write('};\n', file=self.outFile)
+        write('// Device commands which devices in pass-through mode resolve straight to the next layer', file=self.outFile)
+        write('static const std::unordered_set<std::string> passthrough_device_commands = {', file=self.outFile)
+        write('\n'.join(self.passthrough_commands), file=self.outFile)
+        write('};\n', file=self.outFile)
         self.newline()
         write('} // namespace unique_objects', file=self.outFile)
         # Finish processing in superclass
@@ -406,9 +455,51 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
         self.structMembers.append(self.StructMemberData(name=typeName, members=membersInfo))
 
     #
-    # Insert a lock_guard line
-    def lock_guard(self, indent):
-        return '%sstd::lock_guard<std::mutex> lock(global_lock);\n' % indent
+    # Build the descriptor update template compiler, which flattens a template's entries into the byte ranges an update
+    # copies out of the application's data and the handle slots within them to unwrap.  The element type for each
+    # descriptor type is that of the VkWriteDescriptorSet member carrying it.
+    def build_template_compiler_func(self):
+        write_members = dict([(member.name, member) for member in self.struct_member_dict['VkWriteDescriptorSet']])
+        func = '// Compile a descriptor update template into the data an update copies and the handles it unwraps\n'
+        func += 'static void CompileDescriptorUpdateTemplate(const VkDescriptorUpdateTemplateCreateInfo *create_info,\n'
+        func += '                                            TEMPLATE_STATE *template_state) {\n'
+        func += '    for (uint32_t i = 0; i < create_info->descriptorUpdateEntryCount; i++) {\n'
+        func += '        const VkDescriptorUpdateTemplateEntry &entry = create_info->pDescriptorUpdateEntries[i];\n'
+        func += '        switch (entry.descriptorType) {\n'
+        for member_name, descriptor_types in sorted(self.descriptor_type_members['VkWriteDescriptorSet'].items()):
+            element_type = write_members[member_name].type
+            for descriptor_type in descriptor_types:
+                func += '            case %s:\n' % descriptor_type
+            func += '                template_state->AddCopyRange(entry, sizeof(%s));\n' % element_type
+            if self.isHandleTypeNonDispatchable(element_type) == True:
+                func += '                template_state->AddHandleSlots(entry, 0);\n'
+            else:
+                for member in self.struct_member_dict[element_type]:
+                    if self.isHandleTypeNonDispatchable(member.type) == True:
+                        func += '                template_state->AddHandleSlots(entry, offsetof(%s, %s));\n' % (element_type, member.name)
+            func += '                break;\n'
+        func += '            default:\n'
+        func += '                assert(0);\n'
+        func += '                break;\n'
+        func += '        }\n'
+        func += '    }\n'
+        func += '}\n'
+        return func
+    #
+    # Determine if any of the given members, or members of structs they contain or extend with, is an instance-level NDO
+    def uses_instance_handles(self, members, visited=None):
+        if visited is None:
+            visited = set()
+        for member in members:
+            if member.type in self.instance_handle_types:
+                return True
+            struct_types = [member.type] + (member.extstructs if member.extstructs else [])
+            for struct_type in struct_types:
+                if struct_type in self.struct_member_dict and struct_type not in visited:
+                    visited.add(struct_type)
+                    if self.uses_instance_handles(self.struct_member_dict[struct_type], visited) == True:
+                        return True
+        return False
     #
     # Determine if a struct has an NDO as a member or an embedded member
     def struct_contains_ndo(self, struct_item):
@@ -474,63 +565,116 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
     #
     # Generate pNext handling function
     def build_extension_processing_func(self):
-        # Construct helper functions to build and free pNext extension chains
+        # Emit a case label for each extension struct, wrapped in its feature protect if any
+        def extension_case(item, body, indent='            '):
+            struct_info = self.struct_member_dict[item]
+            case = ''
+            if struct_info[0].feature_protect is not None:
+                case += '#ifdef %s \n' % struct_info[0].feature_protect
+            case += '%scase %s%s' % (indent, self.structTypes[item].value, body)
+            if struct_info[0].feature_protect is not None:
+                case += '#endif // %s \n' % struct_info[0].feature_protect
+            return case
+        ndo_structs = [item for item in self.extension_structs if self.struct_contains_ndo(item) == True]
+        # Construct a predicate for pNext links which hold NDOs
         pnext_proc = ''
+        pnext_proc += '// Returns true if a pNext chain link of this type holds non-dispatchable handles which must be unwrapped\n'
+        pnext_proc += 'static bool ExtensionStructContainsHandles(VkStructureType sType) {\n'
+        if ndo_structs:
+            pnext_proc += '    switch (sType) {\n'
+            for item in ndo_structs:
+                pnext_proc += extension_case(item, ':\n', '        ')
+            pnext_proc += '            return true;\n'
+            pnext_proc += '        default:\n'
+            pnext_proc += '            return false;\n'
+            pnext_proc += '    }\n'
+        else:
+            pnext_proc += '    return false;\n'
+        pnext_proc += '}\n\n'
+        # Construct helper functions to build and free pNext extension chains
+        pnext_proc += '// Build a pNext chain with unwrapped handles.  Links up to the last one holding handles are shadowed, the rest of\n'
+        pnext_proc += '// the chain is passed down untouched, and a chain without handles is returned as is.\n'
         pnext_proc += 'void *CreateUnwrappedExtensionStructs(const void *pNext) {\n'
+        pnext_proc += '    const GenericHeader *last_unwrapped = NULL;\n'
+        pnext_proc += '    for (const GenericHeader *header = reinterpret_cast<const GenericHeader *>(pNext); header != NULL;\n'
+        pnext_proc += '         header = reinterpret_cast<const GenericHeader *>(header->pNext)) {\n'
+        pnext_proc += '        if (ExtensionStructContainsHandles(header->sType)) {\n'
+        pnext_proc += '            last_unwrapped = header;\n'
+        pnext_proc += '        }\n'
+        pnext_proc += '    }\n'
+        pnext_proc += '    if (last_unwrapped == NULL) {\n'
+        pnext_proc += '        return const_cast<void *>(pNext);\n'
+        pnext_proc += '    }\n\n'
         pnext_proc += '    void *cur_pnext = const_cast<void *>(pNext);\n'
         pnext_proc += '    void *head_pnext = NULL;\n'
-        pnext_proc += '    void *prev_ext_struct = NULL;\n'
-        pnext_proc += '    void *cur_ext_struct = NULL;\n\n'
+        pnext_proc += '    void *prev_ext_struct = NULL;\n\n'
         pnext_proc += '    while (cur_pnext != NULL) {\n'
-        pnext_proc += '        GenericHeader *header = reinterpret_cast<GenericHeader *>(cur_pnext);\n\n'
+        pnext_proc += '        GenericHeader *header = reinterpret_cast<GenericHeader *>(cur_pnext);\n'
+        pnext_proc += '        void *cur_ext_struct = NULL;\n\n'
         pnext_proc += '        switch (header->sType) {\n'
         for item in self.extension_structs:
-            struct_info = self.struct_member_dict[item]
-            if struct_info[0].feature_protect is not None:
-                pnext_proc += '#ifdef %s \n' % struct_info[0].feature_protect
-            pnext_proc += '            case %s: {\n' % self.structTypes[item].value
-            pnext_proc += '                    safe_%s *safe_struct = new safe_%s;\n' % (item, item)
-            pnext_proc += '                    safe_struct->initialize(reinterpret_cast<const %s *>(cur_pnext));\n' % item
-            # Generate code to unwrap the handles
-            indent = '                '
-            (tmp_decl, tmp_pre, tmp_post) = self.uniquify_members(struct_info, indent, 'safe_struct->', 0, False, False, False, False)
-            pnext_proc += tmp_pre
-            pnext_proc += '                    cur_ext_struct = reinterpret_cast<void *>(safe_struct);\n'
-            pnext_proc += '                } break;\n'
-            if struct_info[0].feature_protect is not None:
-                pnext_proc += '#endif // %s \n' % struct_info[0].feature_protect
+            if item in ndo_structs:
+                body = ': {\n'
+                body += '                    safe_%s *safe_struct = new safe_%s;\n' % (item, item)
+                body += '                    safe_struct->initialize(reinterpret_cast<const %s *>(cur_pnext));\n' % item
+                # Generate code to unwrap the handles
+                indent = '                '
+                (tmp_decl, tmp_pre, tmp_post) = self.uniquify_members(self.struct_member_dict[item], indent, 'safe_struct->', 0, False, False, False, False)
+                body += tmp_pre
+                body += '                    cur_ext_struct = reinterpret_cast<void *>(safe_struct);\n'
+                body += '                } break;\n'
+            else:
+                # Links without handles only need a shallow copy so they can be relinked
+                body = ':\n'
+                body += '                cur_ext_struct = new %s(*reinterpret_cast<const %s *>(cur_pnext));\n' % (item, item)
+                body += '                break;\n'
+            pnext_proc += extension_case(item, body)
             pnext_proc += '\n'
         pnext_proc += '            default:\n'
         pnext_proc += '                break;\n'
         pnext_proc += '        }\n\n'
-        pnext_proc += '        // Save pointer to the first structure in the pNext chain\n'
-        pnext_proc += '        head_pnext = (head_pnext ? head_pnext : cur_ext_struct);\n\n'
-        pnext_proc += '        // For any extension structure but the first, link the last struct\'s pNext to the current ext struct\n'
-        pnext_proc += '        if (prev_ext_struct) {\n'
-        pnext_proc += '            (reinterpret_cast<GenericHeader *>(prev_ext_struct))->pNext = cur_ext_struct;\n'
-        pnext_proc += '        }\n'
-        pnext_proc += '        prev_ext_struct = cur_ext_struct;\n\n'
+        pnext_proc += '        if (cur_ext_struct) {\n'
+        pnext_proc += '            // Save pointer to the first structure in the pNext chain\n'
+        pnext_proc += '            head_pnext = (head_pnext ? head_pnext : cur_ext_struct);\n\n'
+        pnext_proc += '            // For any extension structure but the first, link the last struct\'s pNext to the current ext struct\n'
+        pnext_proc += '            if (prev_ext_struct) {\n'
+        pnext_proc += '                (reinterpret_cast<GenericHeader *>(prev_ext_struct))->pNext = cur_ext_struct;\n'
+        pnext_proc += '            }\n'
+        pnext_proc += '            prev_ext_struct = cur_ext_struct;\n'
+        pnext_proc += '        }\n\n'
+        pnext_proc += '        // Nothing past the last link holding handles needs rewriting, so hand the rest of the chain down as is\n'
+        pnext_proc += '        if (header == last_unwrapped) {\n'
+        pnext_proc += '            (reinterpret_cast<GenericHeader *>(prev_ext_struct))->pNext = header->pNext;\n'
+        pnext_proc += '            break;\n'
+        pnext_proc += '        }\n\n'
         pnext_proc += '        // Process the next structure in the chain\n'
         pnext_proc += '        cur_pnext = const_cast<void *>(header->pNext);\n'
         pnext_proc += '    }\n'
         pnext_proc += '    return head_pnext;\n'
         pnext_proc += '}\n\n'
-        pnext_proc += '// Free a pNext extension chain\n'
+        pnext_proc += '// Free a pNext extension chain built by CreateUnwrappedExtensionStructs\n'
         pnext_proc += 'void FreeUnwrappedExtensionStructs(void *head) {\n'
-        pnext_proc += '    GenericHeader *curr_ptr = reinterpret_cast<GenericHeader *>(head);\n'
+        pnext_proc += '    // Shadow copies end at the last link holding handles; anything after it belongs to the application\n'
+        pnext_proc += '    GenericHeader *last_unwrapped = NULL;\n'
+        pnext_proc += '    for (GenericHeader *header = reinterpret_cast<GenericHeader *>(head); header != NULL;\n'
+        pnext_proc += '         header = reinterpret_cast<GenericHeader *>(header->pNext)) {\n'
+        pnext_proc += '        if (ExtensionStructContainsHandles(header->sType)) {\n'
+        pnext_proc += '            last_unwrapped = header;\n'
+        pnext_proc += '        }\n'
+        pnext_proc += '    }\n\n'
+        pnext_proc += '    GenericHeader *curr_ptr = last_unwrapped ? reinterpret_cast<GenericHeader *>(head) : NULL;\n'
         pnext_proc += '    while (curr_ptr) {\n'
         pnext_proc += '        GenericHeader *header = curr_ptr;\n'
-        pnext_proc += '        curr_ptr = reinterpret_cast<GenericHeader *>(header->pNext);\n\n'
+        pnext_proc += '        curr_ptr = (header == last_unwrapped) ? NULL : reinterpret_cast<GenericHeader *>(header->pNext);\n\n'
         pnext_proc += '        switch (header->sType) {\n';
         for item in self.extension_structs:
-            struct_info = self.struct_member_dict[item]
-            if struct_info[0].feature_protect is not None:
-                pnext_proc += '#ifdef %s \n' % struct_info[0].feature_protect
-            pnext_proc += '            case %s:\n' % self.structTypes[item].value
-            pnext_proc += '                delete reinterpret_cast<safe_%s *>(header);\n' % item
-            pnext_proc += '                break;\n'
-            if struct_info[0].feature_protect is not None:
-                pnext_proc += '#endif // %s \n' % struct_info[0].feature_protect
+            body = ':\n'
+            if item in ndo_structs:
+                body += '                delete reinterpret_cast<safe_%s *>(header);\n' % item
+            else:
+                body += '                delete reinterpret_cast<%s *>(header);\n' % item
+            body += '                break;\n'
+            pnext_proc += extension_case(item, body)
             pnext_proc += '\n'
         pnext_proc += '            default:\n'
         pnext_proc += '                assert(0);\n'
@@ -550,22 +694,25 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
             if cmd_info[-1].len is not None:
                 ndo_array = True;
             handle_name = params[-1].find('name')
-            create_ndo_code += '%sif (VK_SUCCESS == result) {\n' % (indent)
+            if self.is_device_command(cmd_info) and self.uses_instance_handles(cmd_info):
+                # Intercepted even on pass-through devices, whose device-level handles must not be wrapped
+                create_ndo_code += '%sif ((VK_SUCCESS == result) && !dev_data->passthrough) {\n' % (indent)
+            else:
+                create_ndo_code += '%sif (VK_SUCCESS == result) {\n' % (indent)
             indent = self.incIndent(indent)
-            create_ndo_code += '%sstd::lock_guard<std::mutex> lock(global_lock);\n' % (indent)
-            ndo_dest = '*%s' % handle_name.text
-            if ndo_array == True:
-                create_ndo_code += '%sfor (uint32_t index0 = 0; index0 < %s; index0++) {\n' % (indent, cmd_info[-1].len)
-                indent = self.incIndent(indent)
-                ndo_dest = '%s[index0]' % cmd_info[-1].name
-            create_ndo_code += '%s%s = WrapNew(%s);\n' % (indent, ndo_dest, ndo_dest)
             if ndo_array == True:
-                indent = self.decIndent(indent)
-                create_ndo_code += '%s}\n' % indent
+                # Wrap the whole array with one contiguous ID range
+                create_ndo_code += '%sWrapNewArray(%s, %s);\n' % (indent, cmd_info[-1].name, cmd_info[-1].len)
+            else:
+                create_ndo_code += '%s*%s = WrapNew(*%s);\n' % (indent, handle_name.text, handle_name.text)
             indent = self.decIndent(indent)
             create_ndo_code += '%s}\n' % (indent)
         return create_ndo_code
     #
+    # Returns True if the command is dispatched on a device, queue or command buffer
+    def is_device_command(self, cmd_info):
+        return cmd_info[0].type in ['VkDevice', 'VkQueue', 'VkCommandBuffer']
+    #
     # Generate source for destroying a non-dispatchable object
     def generate_destroy_ndo_code(self, indent, proto, cmd_info):
         destroy_ndo_code = ''
@@ -582,23 +729,16 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                     # This API is freeing an array of handles.  Remove them from the unique_id map.
                     destroy_ndo_code += '%sif ((VK_SUCCESS == result) && (%s)) {\n' % (indent, cmd_info[param].name)
                     indent = self.incIndent(indent)
-                    destroy_ndo_code += '%sstd::unique_lock<std::mutex> lock(global_lock);\n' % (indent)
                     destroy_ndo_code += '%sfor (uint32_t index0 = 0; index0 < %s; index0++) {\n' % (indent, cmd_info[param].len)
                     indent = self.incIndent(indent)
-                    destroy_ndo_code += '%s%s handle = %s[index0];\n' % (indent, cmd_info[param].type, cmd_info[param].name)
-                    destroy_ndo_code += '%suint64_t unique_id = reinterpret_cast<uint64_t &>(handle);\n' % (indent)
-                    destroy_ndo_code += '%sunique_id_mapping.erase(unique_id);\n' % (indent)
+                    destroy_ndo_code += '%sUnwrapAndErase(%s[index0]);\n' % (indent, cmd_info[param].name)
                     indent = self.decIndent(indent);
                     destroy_ndo_code += '%s}\n' % indent
                     indent = self.decIndent(indent);
                     destroy_ndo_code += '%s}\n' % indent
                 else:
                     # Remove a single handle from the map
-                    destroy_ndo_code += '%sstd::unique_lock<std::mutex> lock(global_lock);\n' % (indent)
-                    destroy_ndo_code += '%suint64_t %s_id = reinterpret_cast<uint64_t &>(%s);\n' % (indent, cmd_info[param].name, cmd_info[param].name)
-                    destroy_ndo_code += '%s%s = (%s)unique_id_mapping[%s_id];\n' % (indent, cmd_info[param].name, cmd_info[param].type, cmd_info[param].name)
-                    destroy_ndo_code += '%sunique_id_mapping.erase(%s_id);\n' % (indent, cmd_info[param].name)
-                    destroy_ndo_code += '%slock.unlock();\n' % (indent)
+                    destroy_ndo_code += '%s%s = UnwrapAndErase(%s);\n' % (indent, cmd_info[param].name, cmd_info[param].name)
         return ndo_array, destroy_ndo_code
 
     #
@@ -610,11 +750,11 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                 cleanup += '%s    for (uint32_t %s = 0; %s < %s%s; ++%s) {\n' % (indent, index, index, prefix, len, index)
                 cleanup += '%s        FreeUnwrappedExtensionStructs(const_cast<void *>(local_%s%s[%s].pNext));\n' % (indent, prefix, name, index)
                 cleanup += '%s    }\n' % indent
-            cleanup += '%s    delete[] local_%s%s;\n' % (indent, prefix, name)
+            cleanup += '%s    DeleteLocalArray(local_%s%s, %s%s);\n' % (indent, prefix, name, prefix, len)
         else:
             if process_pnext:
                 cleanup += '%s    FreeUnwrappedExtensionStructs(const_cast<void *>(local_%s%s->pNext));\n' % (indent, prefix, name)
-            cleanup += '%s    delete local_%s%s;\n' % (indent, prefix, name)
+            cleanup += '%s    DeleteLocal(local_%s%s);\n' % (indent, prefix, name)
         cleanup += "%s}\n" % (indent)
         return cleanup
     #
@@ -629,7 +769,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
             pre_call_code += '%s    if (%s%s) {\n' % (indent, prefix, ndo_name)
             indent = self.incIndent(indent)
             if top_level == True:
-                pre_call_code += '%s    local_%s%s = new %s[%s];\n' % (indent, prefix, ndo_name, ndo_type, ndo_count)
+                pre_call_code += '%s    local_%s%s = NewLocalArray<%s>(%s);\n' % (indent, prefix, ndo_name, ndo_type, ndo_count)
                 pre_call_code += '%s    for (uint32_t %s = 0; %s < %s; ++%s) {\n' % (indent, index, index, ndo_count, index)
                 indent = self.incIndent(indent)
                 pre_call_code += '%s    local_%s%s[%s] = Unwrap(%s[%s]);\n' % (indent, prefix, ndo_name, index, ndo_name, index)
@@ -644,7 +784,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
             if top_level == True:
                 post_call_code += '%sif (local_%s%s)\n' % (indent, prefix, ndo_name)
                 indent = self.incIndent(indent)
-                post_call_code += '%sdelete[] local_%s;\n' % (indent, ndo_name)
+                post_call_code += '%sDeleteLocalArray(local_%s, %s);\n' % (indent, ndo_name, ndo_count)
         else:
             if top_level == True:
                 if (destroy_func == False) or (destroy_array == True):
@@ -660,6 +800,90 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                 pre_call_code += '%s    }\n' % indent
         return decl_code, pre_call_code, post_call_code
     #
+    # Return the condition under which a struct pointer member is valid, for members ignored for some descriptor types
+    def member_valid_condition(self, struct_type, member_name, src):
+        descriptor_types = self.descriptor_type_members.get(struct_type, {}).get(member_name)
+        if descriptor_types is None:
+            return ''
+        return '(%s) && ' % ' || '.join(['%sdescriptorType == %s' % (src, type) for type in descriptor_types])
+    #
+    # Emit code replacing the members of a shallow struct copy that lead to NDOs.  src is the application's struct and
+    # dst the local copy; pointers to sub-structs or handle arrays are re-pointed at local copies of their own, and
+    # everything else keeps pointing at the application's data.
+    def shadow_members(self, struct_type, indent, src, dst, array_index, local_names):
+        code = ''
+        index = 'index%s' % str(array_index)
+        for member in self.struct_member_dict[struct_type]:
+            condition = self.member_valid_condition(struct_type, member.name, src)
+            if self.isHandleTypeNonDispatchable(member.type) == True:
+                if member.len is None:
+                    code += '%sif (%s%s) {\n' % (indent, src, member.name)
+                    code += '%s    %s%s = Unwrap(%s%s);\n' % (indent, dst, member.name, src, member.name)
+                    code += '%s}\n' % indent
+                else:
+                    local_name = 'local_%s%d' % (member.name, len(local_names))
+                    local_names.append(local_name)
+                    code += '%sif (%s%s%s) {\n' % (indent, condition, src, member.name)
+                    code += '%s    %s *%s = local_copy_scope.Allocate<%s>(%s%s);\n' % (indent, member.type, local_name, member.type, src, member.len)
+                    code += '%s    for (uint32_t %s = 0; %s < %s%s; ++%s) {\n' % (indent, index, index, src, member.len, index)
+                    code += '%s        %s[%s] = Unwrap(%s%s[%s]);\n' % (indent, local_name, index, src, member.name, index)
+                    code += '%s    }\n' % indent
+                    code += '%s    %s%s = %s;\n' % (indent, dst, member.name, local_name)
+                    code += '%s}\n' % indent
+            elif member.type in self.struct_member_dict and self.struct_contains_ndo(member.type) == True:
+                if member.ispointer == False:
+                    # Embedded structs were copied along with their parent
+                    code += self.shadow_members(member.type, indent, '%s%s.' % (src, member.name), '%s%s.' % (dst, member.name), array_index, local_names)
+                    continue
+                local_name = 'local_%s%d' % (member.name, len(local_names))
+                local_names.append(local_name)
+                code += '%sif (%s%s%s) {\n' % (indent, condition, src, member.name)
+                if member.len is None:
+                    code += '%s    %s *%s = local_copy_scope.Allocate<%s>(1);\n' % (indent, member.type, local_name, member.type)
+                    code += '%s    *%s = *%s%s;\n' % (indent, local_name, src, member.name)
+                    code += self.shadow_members(member.type, self.incIndent(indent), '%s%s->' % (src, member.name), '%s->' % local_name, array_index, local_names)
+                else:
+                    code += '%s    %s *%s = local_copy_scope.Allocate<%s>(%s%s);\n' % (indent, member.type, local_name, member.type, src, member.len)
+                    code += '%s    for (uint32_t %s = 0; %s < %s%s; ++%s) {\n' % (indent, index, index, src, member.len, index)
+                    code += '%s        %s[%s] = %s%s[%s];\n' % (indent, local_name, index, src, member.name, index)
+                    code += self.shadow_members(member.type, self.incIndent(self.incIndent(indent)), '%s%s[%s].' % (src, member.name, index), '%s[%s].' % (local_name, index), array_index + 1, local_names)
+                    code += '%s    }\n' % indent
+                code += '%s    %s%s = %s;\n' % (indent, dst, member.name, local_name)
+                code += '%s}\n' % indent
+        return code
+    #
+    # Shadow a first-level struct parameter with a shallow copy in which only the members leading to NDOs are replaced
+    def shadow_struct_param(self, member, indent, process_pnext):
+        local_name = 'local_%s' % member.name
+        local_names = []
+        decls = '%s%s *%s = NULL;\n' % (indent, member.type, local_name)
+        pre_code = '%s    if (%s) {\n' % (indent, member.name)
+        post_code = ''
+        if member.len is not None:
+            pre_code += '%s        %s = local_copy_scope.Allocate<%s>(%s);\n' % (indent, local_name, member.type, member.len)
+            pre_code += '%s        for (uint32_t index0 = 0; index0 < %s; ++index0) {\n' % (indent, member.len)
+            pre_code += '%s            %s[index0] = %s[index0];\n' % (indent, local_name, member.name)
+            pre_code += self.shadow_members(member.type, indent + '            ', '%s[index0].' % member.name, '%s[index0].' % local_name, 1, local_names)
+            if process_pnext:
+                pre_code += '%s            %s[index0].pNext = CreateUnwrappedExtensionStructs(%s[index0].pNext);\n' % (indent, local_name, member.name)
+                post_code += '%sif (%s) {\n' % (indent, local_name)
+                post_code += '%s    for (uint32_t index0 = 0; index0 < %s; ++index0) {\n' % (indent, member.len)
+                post_code += '%s        FreeUnwrappedExtensionStructs(const_cast<void *>(%s[index0].pNext));\n' % (indent, local_name)
+                post_code += '%s    }\n' % indent
+                post_code += '%s}\n' % indent
+            pre_code += '%s        }\n' % indent
+        else:
+            pre_code += '%s        %s = local_copy_scope.Allocate<%s>(1);\n' % (indent, local_name, member.type)
+            pre_code += '%s        *%s = *%s;\n' % (indent, local_name, member.name)
+            pre_code += self.shadow_members(member.type, indent + '        ', '%s->' % member.name, '%s->' % local_name, 0, local_names)
+            if process_pnext:
+                pre_code += '%s        %s->pNext = CreateUnwrappedExtensionStructs(%s->pNext);\n' % (indent, local_name, member.name)
+                post_code += '%sif (%s) {\n' % (indent, local_name)
+                post_code += '%s    FreeUnwrappedExtensionStructs(const_cast<void *>(%s->pNext));\n' % (indent, local_name)
+                post_code += '%s}\n' % indent
+        pre_code += '%s    }\n' % indent
+        return decls, pre_code, post_code
+    #
     # first_level_param indicates if elements are passed directly into the function else they're below a ptr/struct
     # create_func means that this is API creates or allocates NDOs
     # destroy_func indicates that this API destroys or frees NDOs
@@ -689,6 +913,12 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
             elif member.type in self.struct_member_dict:
                 # Structs at first level will have an NDO, OR, we need a safe_struct for the pnext chain
                 if self.struct_contains_ndo(member.type) == True or process_pnext:
+                    if first_level_param == True and self.genOpts.minimalStructCopy:
+                        (tmp_decl, tmp_pre, tmp_post) = self.shadow_struct_param(member, indent, process_pnext)
+                        decls += tmp_decl
+                        pre_code += tmp_pre
+                        post_code += tmp_post
+                        continue
                     struct_info = self.struct_member_dict[member.type]
                     # Struct Array
                     if member.len is not None:
@@ -702,7 +932,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                         pre_code += '%s    if (%s%s) {\n' % (indent, prefix, member.name)
                         indent = self.incIndent(indent)
                         if first_level_param == True:
-                            pre_code += '%s    %s = new safe_%s[%s];\n' % (indent, new_prefix, member.type, member.len)
+                            pre_code += '%s    %s = NewLocalArray<safe_%s>(%s);\n' % (indent, new_prefix, member.type, member.len)
                         pre_code += '%s    for (uint32_t %s = 0; %s < %s%s; ++%s) {\n' % (indent, index, index, prefix, member.len, index)
                         indent = self.incIndent(indent)
                         if first_level_param == True:
@@ -733,7 +963,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                         pre_code += '%s    if (%s%s) {\n' % (indent, prefix, member.name)
                         indent = self.incIndent(indent)
                         if first_level_param == True:
-                            pre_code += '%s    local_%s%s = new safe_%s(%s);\n' % (indent, prefix, member.name, member.type, member.name)
+                            pre_code += '%s    local_%s%s = NewLocal<safe_%s>(%s);\n' % (indent, prefix, member.name, member.type, member.name)
                         # Process sub-structs in this struct
                         (tmp_decl, tmp_pre, tmp_post) = self.uniquify_members(struct_info, indent, new_prefix, array_index, create_func, destroy_func, destroy_array, False)
                         decls += tmp_decl
@@ -781,7 +1011,7 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                     param_pre_code += destroy_ndo_code
             if param_pre_code:
                 if (not destroy_func) or (destroy_array):
-                    param_pre_code = '%s{\n%s%s%s%s}\n' % ('    ', indent, self.lock_guard(indent), param_pre_code, indent)
+                    param_pre_code = '%s{\n%s%s}\n' % ('    ', param_pre_code, indent)
         return paramdecl, param_pre_code, param_post_code
     #
     # Capture command parameter info needed to wrap NDOs as well as handling some boilerplate code
@@ -856,6 +1086,8 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                 self.appendSection('command', '// Declare only')
                 self.appendSection('command', decls[0])
                 self.intercepts += [ '    {"%s", (void *)%s},' % (cmdname,cmdname[2:]) ]
+                if cmdname in self.passthrough_manual_commands:
+                    self.passthrough_commands += [ '    "%s",' % cmdname ]
                 continue
             # Generate NDO wrapping/unwrapping code for all parameters
             (api_decls, api_pre, api_post) = self.generate_wrapping_code(cmdinfo.elem)
@@ -869,6 +1101,14 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                 self.intercepts += [ '#ifdef %s' % feature_extra_protect ]
             # Add intercept to procmap
             self.intercepts += [ '    {"%s", (void*)%s},' % (cmdname,cmdname[2:]) ]
+            cmd_members = cmd_member_dict[cmdname]
+            passthrough = self.is_device_command(cmd_members) and not self.uses_instance_handles(cmd_members)
+            if passthrough:
+                if (feature_extra_protect != None):
+                    self.passthrough_commands += [ '#ifdef %s' % feature_extra_protect ]
+                self.passthrough_commands += [ '    "%s",' % cmdname ]
+                if (feature_extra_protect != None):
+                    self.passthrough_commands += [ '#endif' ]
             decls = self.makeCDecls(cmdinfo.elem)
             self.appendSection('command', '')
             self.appendSection('command', decls[0][:-1])
@@ -891,6 +1131,8 @@ class UniqueObjectsOutputGenerator(OutputGenerator):
                 assignresult = ''
             # Pre-pend declarations and pre-api-call codegen
             if api_decls:
+                # Local copies come from the per-thread arena and are released when this scope exits
+                self.appendSection('command', '    LocalCopyScope local_copy_scope;')
                 self.appendSection('command', "\n".join(str(api_decls).rstrip().split("\n")))
             if api_pre:
                 self.appendSection('command', "\n".join(str(api_pre).rstrip().split("\n")))
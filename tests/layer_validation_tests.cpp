@@ -40,6 +40,7 @@
 #include "test_common.h"
 #include "vk_layer_config.h"
 #include "vk_format_utils.h"
+#include "vk_object_types.h"
 #include "vk_validation_error_messages.h"
 #include "vkrenderframework.h"
 #include "vk_typemap_helper.h"
@@ -1410,6 +1411,64 @@ TEST_F(VkLayerTest, DebugMarkerNameTest) {
     vkQueueWaitIdle(m_device->m_queue);
 }
 
+TEST_F(VkLayerTest, UniqueObjectsDebugMarkerPassthrough) {
+    TEST_DESCRIPTION("Name and tag a device-level object with the debug marker extension, as done by pass-through devices.");
+
+    ASSERT_NO_FATAL_FAILURE(InitFramework(myDbgFunc, m_errorMonitor));
+    if (DeviceExtensionSupported(gpu(), "VK_LAYER_LUNARG_core_validation", VK_EXT_DEBUG_MARKER_EXTENSION_NAME)) {
+        m_device_extension_names.push_back(VK_EXT_DEBUG_MARKER_EXTENSION_NAME);
+    } else {
+        printf("%s Debug Marker Extension not supported, skipping test\n", kSkipPrefix);
+        return;
+    }
+    ASSERT_NO_FATAL_FAILURE(InitState());
+
+    PFN_vkDebugMarkerSetObjectNameEXT fpvkDebugMarkerSetObjectNameEXT =
+        (PFN_vkDebugMarkerSetObjectNameEXT)vkGetDeviceProcAddr(m_device->device(), "vkDebugMarkerSetObjectNameEXT");
+    PFN_vkDebugMarkerSetObjectTagEXT fpvkDebugMarkerSetObjectTagEXT =
+        (PFN_vkDebugMarkerSetObjectTagEXT)vkGetDeviceProcAddr(m_device->device(), "vkDebugMarkerSetObjectTagEXT");
+    if (!(fpvkDebugMarkerSetObjectNameEXT) || !(fpvkDebugMarkerSetObjectTagEXT)) {
+        printf("%s Can't find debug marker functions; skipped.\n", kSkipPrefix);
+        return;
+    }
+
+    // With google_unique_objects.passthrough the event handle is the driver's own, and must reach it unchanged
+    m_errorMonitor->ExpectSuccess();
+    VkEvent event_handle = VK_NULL_HANDLE;
+    VkEventCreateInfo event_info = {};
+    event_info.sType = VK_STRUCTURE_TYPE_EVENT_CREATE_INFO;
+    vkCreateEvent(device(), &event_info, NULL, &event_handle);
+    VkDebugMarkerObjectNameInfoEXT name_info = {};
+    name_info.sType = VK_STRUCTURE_TYPE_DEBUG_MARKER_OBJECT_NAME_INFO_EXT;
+    name_info.object = (uint64_t)event_handle;
+    name_info.objectType = VK_DEBUG_REPORT_OBJECT_TYPE_EVENT_EXT;
+    name_info.pObjectName = "PassedThroughEventName";
+    fpvkDebugMarkerSetObjectNameEXT(device(), &name_info);
+    const uint32_t tag = 0x1234;
+    VkDebugMarkerObjectTagInfoEXT tag_info = {};
+    tag_info.sType = VK_STRUCTURE_TYPE_DEBUG_MARKER_OBJECT_TAG_INFO_EXT;
+    tag_info.object = (uint64_t)event_handle;
+    tag_info.objectType = VK_DEBUG_REPORT_OBJECT_TYPE_EVENT_EXT;
+    tag_info.tagName = 1;
+    tag_info.tagSize = sizeof(tag);
+    tag_info.pTag = &tag;
+    fpvkDebugMarkerSetObjectTagEXT(device(), &tag_info);
+    m_errorMonitor->VerifyNotFound();
+
+    m_commandBuffer->begin();
+    vkCmdSetEvent(m_commandBuffer->handle(), event_handle, VK_PIPELINE_STAGE_BOTTOM_OF_PIPE_BIT);
+    m_commandBuffer->end();
+    VkSubmitInfo submit_info = {};
+    submit_info.sType = VK_STRUCTURE_TYPE_SUBMIT_INFO;
+    submit_info.commandBufferCount = 1;
+    submit_info.pCommandBuffers = &m_commandBuffer->handle();
+    vkQueueSubmit(m_device->m_queue, 1, &submit_info, VK_NULL_HANDLE);
+    m_errorMonitor->SetDesiredFailureMsg(VK_DEBUG_REPORT_ERROR_BIT_EXT, "PassedThroughEventName");
+    vkDestroyEvent(m_device->device(), event_handle, NULL);
+    m_errorMonitor->VerifyFound();
+    vkQueueWaitIdle(m_device->m_queue);
+}
+
 TEST_F(VkLayerTest, InvalidStructSType) {
     TEST_DESCRIPTION("Specify an invalid VkStructureType for a Vulkan structure's sType field");
 
@@ -2498,9 +2557,122 @@ TEST_F(VkLayerTest, LeakAnObject) {
 
     // Induce failure by not calling vkDestroyFence
     vkDestroyDevice(testDevice, NULL);
+    // A leak reported individually is not repeated in a summary message
+    EXPECT_TRUE(m_errorMonitor->GetOtherFailureMsgs().empty());
     m_errorMonitor->VerifyFound();
 }
 
+TEST_F(VkLayerTest, LeakManyObjects) {
+    VkResult err;
+
+    TEST_DESCRIPTION("Leak more fences than lunarg_object_tracker.leak_report_limit reports individually at vkDestroyDevice.");
+
+    // Leaked objects past the default limit of 100 are only counted in the summary message
+    const uint32_t leaked_fence_count = 101;
+    m_errorMonitor->SetDesiredFailureMsg(VK_DEBUG_REPORT_ERROR_BIT_EXT, "101 objects have not been destroyed (101 Fence)");
+
+    ASSERT_NO_FATAL_FAILURE(Init());
+
+    vk_testing::QueueCreateInfoArray queue_info(m_device->queue_props);
+
+    VkDevice testDevice;
+    VkDeviceCreateInfo device_create_info = {};
+    auto features = m_device->phy().features();
+    device_create_info.sType = VK_STRUCTURE_TYPE_DEVICE_CREATE_INFO;
+    device_create_info.queueCreateInfoCount = queue_info.size();
+    device_create_info.pQueueCreateInfos = queue_info.data();
+    device_create_info.pEnabledFeatures = &features;
+    err = vkCreateDevice(gpu(), &device_create_info, NULL, &testDevice);
+    ASSERT_VK_SUCCESS(err);
+
+    VkFenceCreateInfo fence_create_info = {};
+    fence_create_info.sType = VK_STRUCTURE_TYPE_FENCE_CREATE_INFO;
+    for (uint32_t i = 0; i < leaked_fence_count; i++) {
+        VkFence fence;
+        err = vkCreateFence(testDevice, &fence_create_info, NULL, &fence);
+        ASSERT_VK_SUCCESS(err);
+    }
+
+    vkDestroyDevice(testDevice, NULL);
+    m_errorMonitor->VerifyFound();
+}
+
+// Layer-specific entry point exported by the object tracker
+typedef void(VKAPI_PTR *PFN_vkGetObjectCountsLUNARG)(VkDevice device, uint64_t *pLiveCounts, uint64_t *pPeakCounts);
+
+TEST_F(VkPositiveLayerTest, ObjectTrackerObjectCounts) {
+    TEST_DESCRIPTION("Read live and peak object counts through vkGetObjectCountsLUNARG while creating and destroying fences.");
+
+    ASSERT_NO_FATAL_FAILURE(Init());
+
+    PFN_vkGetObjectCountsLUNARG fpvkGetObjectCountsLUNARG =
+        (PFN_vkGetObjectCountsLUNARG)vkGetDeviceProcAddr(m_device->device(), "vkGetObjectCountsLUNARG");
+    if (!(fpvkGetObjectCountsLUNARG)) {
+        printf("%s Can't find vkGetObjectCountsLUNARG; skipped.\n", kSkipPrefix);
+        return;
+    }
+
+    m_errorMonitor->ExpectSuccess();
+
+    uint64_t initial_live[kVulkanObjectTypeMax];
+    uint64_t initial_peak[kVulkanObjectTypeMax];
+    fpvkGetObjectCountsLUNARG(m_device->device(), initial_live, initial_peak);
+
+    const uint32_t fence_count = 3;
+    VkFence fences[fence_count];
+    VkFenceCreateInfo fence_create_info = {};
+    fence_create_info.sType = VK_STRUCTURE_TYPE_FENCE_CREATE_INFO;
+    for (uint32_t i = 0; i < fence_count; i++) {
+        ASSERT_VK_SUCCESS(vkCreateFence(m_device->device(), &fence_create_info, NULL, &fences[i]));
+    }
+
+    uint64_t live[kVulkanObjectTypeMax];
+    uint64_t peak[kVulkanObjectTypeMax];
+    fpvkGetObjectCountsLUNARG(m_device->device(), live, peak);
+    EXPECT_EQ(initial_live[kVulkanObjectTypeFence] + fence_count, live[kVulkanObjectTypeFence]);
+    EXPECT_GE(peak[kVulkanObjectTypeFence], live[kVulkanObjectTypeFence]);
+
+    for (uint32_t i = 0; i < fence_count; i++) {
+        vkDestroyFence(m_device->device(), fences[i], NULL);
+    }
+
+    // Destroying objects lowers the live count but leaves the peak in place; either array may be omitted
+    uint64_t peak_after_destroy[kVulkanObjectTypeMax];
+    fpvkGetObjectCountsLUNARG(m_device->device(), live, nullptr);
+    fpvkGetObjectCountsLUNARG(m_device->device(), nullptr, peak_after_destroy);
+    EXPECT_EQ(initial_live[kVulkanObjectTypeFence], live[kVulkanObjectTypeFence]);
+    EXPECT_EQ(peak[kVulkanObjectTypeFence], peak_after_destroy[kVulkanObjectTypeFence]);
+
+    m_errorMonitor->VerifyNotFound();
+}
+
+TEST_F(VkLayerTest, UniqueObjectsStaleHandle) {
+    TEST_DESCRIPTION("Use a fence after destroying it, once a new fence has been created in its place.");
+
+    ASSERT_NO_FATAL_FAILURE(Init());
+
+    VkFenceCreateInfo fence_create_info = {};
+    fence_create_info.sType = VK_STRUCTURE_TYPE_FENCE_CREATE_INFO;
+    VkFence stale_fence;
+    ASSERT_VK_SUCCESS(vkCreateFence(m_device->device(), &fence_create_info, NULL, &stale_fence));
+    vkDestroyFence(m_device->device(), stale_fence, NULL);
+    VkFence fence;
+    ASSERT_VK_SUCCESS(vkCreateFence(m_device->device(), &fence_create_info, NULL, &fence));
+
+    // With google_unique_objects.slab_handles the new fence reuses the freed slot under a new generation, so the two
+    // wrapped handles still differ and the stale one no longer unwraps
+    ASSERT_NE(stale_fence, fence);
+
+    m_errorMonitor->SetDesiredFailureMsg(VK_DEBUG_REPORT_ERROR_BIT_EXT, "VUID-vkGetFenceStatus-fence-parameter");
+    vkGetFenceStatus(m_device->device(), stale_fence);
+    m_errorMonitor->VerifyFound();
+
+    m_errorMonitor->ExpectSuccess();
+    vkGetFenceStatus(m_device->device(), fence);
+    vkDestroyFence(m_device->device(), fence, NULL);
+    m_errorMonitor->VerifyNotFound();
+}
+
 TEST_F(VkLayerTest, InvalidCommandPoolConsistency) {
     TEST_DESCRIPTION("Allocate command buffers from one command pool and attempt to delete them from another.");
 
@@ -13,3 +13,11 @@ set -e
 # catch the errors that they are supposed to by intentionally doing things
 # that are wrong
 ./vk_layer_validation_tests
+
+# Run the tests covering unique_objects' slab handles again with that mode enabled, since it is latched per process
+VK_LAYER_SETTINGS_PATH=vk_layer_settings_slab_handles.txt ./vk_layer_validation_tests \
+    --gtest_filter=VkLayerTest.UniqueObjectsStaleHandle
+
+# Run the tests covering unique_objects' pass-through devices again with that mode enabled
+VK_LAYER_SETTINGS_PATH=vk_layer_settings_passthrough.txt ./vk_layer_validation_tests \
+    --gtest_filter=VkLayerTest.UniqueObjectsDebugMarkerPassthrough